@@ -1,10 +1,32 @@
 #!/bin/bash
 # Setup script for tree-sitter MCP server
 # Creates a Python virtual environment with mcp-server-tree-sitter installed
+#
+# Usage: setup-tree-sitter.sh [--prewarm <project-dir>]...
+#   --prewarm  Build the persistent symbol cache (tree_sitter_index.py) for a project,
+#              so the first symbol query of a new session is a cache load, not a parse
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 VENV_DIR="${SCRIPT_DIR}/tree-sitter-env"
 
+PREWARM=()
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --prewarm)
+            if [ $# -lt 2 ]; then
+                echo "Usage: $0 [--prewarm <project-dir>]..."
+                exit 1
+            fi
+            PREWARM+=("$2")
+            shift 2
+            ;;
+        *)
+            echo "Usage: $0 [--prewarm <project-dir>]..."
+            exit 1
+            ;;
+    esac
+done
+
 echo "Creating virtual environment at ${VENV_DIR}..."
 python3 -m venv "${VENV_DIR}"
 
@@ -12,5 +34,12 @@ echo "Installing mcp-server-tree-sitter..."
 "${VENV_DIR}/bin/pip" install --upgrade pip
 "${VENV_DIR}/bin/pip" install -r "${SCRIPT_DIR}/requirements-tree-sitter.txt"
 
+for project in "${PREWARM[@]}"; do
+    echo "Prewarming symbol cache for ${project}..."
+    "${VENV_DIR}/bin/python3" "${SCRIPT_DIR}/tree_sitter_index.py" index "${project}"
+done
+
 echo "Done. Tree-sitter MCP server installed at:"
 echo "  ${VENV_DIR}/bin/python3 -m mcp_server_tree_sitter.server"
+echo "Symbol cache (refresh after large regenerations):"
+echo "  ${VENV_DIR}/bin/python3 ${SCRIPT_DIR}/tree_sitter_index.py index <project-dir>"
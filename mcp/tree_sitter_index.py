@@ -0,0 +1,419 @@
+#!/usr/bin/env python3
+"""
+Persistent symbol and reference cache next to the tree-sitter MCP server.
+
+The MCP server keeps parsed trees in memory only, so each new session parses a
+project again before it can answer the first symbol query; with generated Java
+trees (entities, mappers, OpenAPI model classes) that is the bulk of the wait.
+This indexer parses a project once with the same tree-sitter grammars and persists
+per file the symbols (classes, interfaces, enums, records, methods, fields, with
+line ranges and enclosing type) and references (used type names and called
+methods, with lines) to ~/.claude/tree-sitter-cache/<project-name>.json.
+
+Entries are keyed by content hash: files whose mtime and size are unchanged are
+not read, touched files are re-hashed but not re-parsed, identical files share one
+entry, and only changed files are parsed (in parallel when there are many). A query
+is then a cache load plus a stat walk. Run `index` from setup-tree-sitter.sh
+(--prewarm) or after large regenerations.
+
+Grammars come from the standalone tree_sitter_<language> packages when installed,
+otherwise from tree_sitter_language_pack (installed with the MCP server).
+
+Usage:
+    python3 tree_sitter_index.py index <project_dir> [--exclude <dir>]...
+    python3 tree_sitter_index.py find <project_dir> <name> [--kind <kind>] [--prefix] [--json]
+    python3 tree_sitter_index.py refs <project_dir> <name> [--json]
+    python3 tree_sitter_index.py symbols <project_dir> <file> [--json]
+
+Example:
+    ~/.claude/mcp/tree-sitter-env/bin/python3 tree_sitter_index.py find ~/work/trouble-ticket-api TroubleTicketMapper
+"""
+
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+
+CACHE_DIR = os.path.expanduser('~/.claude/tree-sitter-cache')
+CACHE_VERSION = 1
+
+# Same defaults as the MCP server's excluded_dirs, plus IDE and virtualenv folders
+EXCLUDED_DIRS = frozenset({'.git', 'node_modules', '__pycache__', '.idea', '.vscode', '.venv', 'venv',
+                           'tree-sitter-env'})
+
+LANGUAGES = {
+    '.java': 'java',
+    '.py': 'python',
+    '.ts': 'typescript',
+    '.tsx': 'tsx',
+    '.js': 'javascript',
+}
+
+# Definition node types per language and the symbol kind they produce
+SYMBOL_NODES = {
+    'java': {
+        'class_declaration': 'class',
+        'interface_declaration': 'interface',
+        'enum_declaration': 'enum',
+        'record_declaration': 'record',
+        'annotation_type_declaration': 'annotation',
+        'method_declaration': 'method',
+        'constructor_declaration': 'constructor',
+        'field_declaration': 'field',
+        'constant_declaration': 'field',
+        'enum_constant': 'constant',
+    },
+    'python': {
+        'class_definition': 'class',
+        'function_definition': 'function',
+    },
+    'typescript': {
+        'class_declaration': 'class',
+        'abstract_class_declaration': 'class',
+        'interface_declaration': 'interface',
+        'enum_declaration': 'enum',
+        'type_alias_declaration': 'type',
+        'function_declaration': 'function',
+        'method_definition': 'method',
+    },
+    'javascript': {
+        'class_declaration': 'class',
+        'function_declaration': 'function',
+        'method_definition': 'method',
+    },
+}
+SYMBOL_NODES['tsx'] = SYMBOL_NODES['typescript']
+
+# Reference node types per language and the field holding the referenced name
+# (None: the node itself is the name)
+REFERENCE_NODES = {
+    'java': {'type_identifier': None, 'method_invocation': 'name'},
+    'python': {'call': 'function'},
+    'typescript': {'type_identifier': None, 'call_expression': 'function', 'new_expression': 'constructor'},
+    'javascript': {'call_expression': 'function', 'new_expression': 'constructor'},
+}
+REFERENCE_NODES['tsx'] = REFERENCE_NODES['typescript']
+
+TYPE_KINDS = frozenset({'class', 'interface', 'enum', 'record', 'annotation', 'type'})
+
+# Below this many files to parse, worker start-up costs more than it saves
+PARALLEL_FILES = 32
+
+_PARSERS: Dict[str, Any] = {}
+
+
+def project_key(project_dir: str) -> str:
+    return os.path.abspath(project_dir).replace('/', '-')
+
+
+def get_parser(language: str):
+    """A tree-sitter parser for the language, created once per process."""
+    parser = _PARSERS.get(language)
+    if parser is not None:
+        return parser
+
+    module_name = 'tree_sitter_typescript' if language in ('typescript', 'tsx') else f'tree_sitter_{language}'
+    try:
+        from tree_sitter import Language, Parser
+        module = importlib.import_module(module_name)
+        factory = {'typescript': 'language_typescript', 'tsx': 'language_tsx'}.get(language, 'language')
+        parser = Parser(Language(getattr(module, factory)()))
+    except ImportError:
+        from tree_sitter_language_pack import get_parser as pack_parser
+        parser = pack_parser(language)
+    _PARSERS[language] = parser
+    return parser
+
+
+def node_name(node) -> Optional[str]:
+    name = node.child_by_field_name('name')
+    return name.text.decode('utf-8', errors='replace') if name is not None else None
+
+
+def reference_name(node, field: Optional[str]) -> Optional[str]:
+    if field is not None:
+        node = node.child_by_field_name(field)
+        if node is None:
+            return None
+    text = node.text.decode('utf-8', errors='replace')
+    # obj.method / pkg.Type: the last segment is the referenced name
+    name = text.rsplit('.', 1)[-1].strip()
+    return name if name.isidentifier() else None
+
+
+def extract_symbols(source: bytes, language: str) -> Dict[str, Any]:
+    """
+    Symbols and references of one file.
+
+    Returns:
+        {'symbols': [[name, kind, start_line, end_line, container]], 'refs': {name: [lines]}}
+    """
+    tree = get_parser(language).parse(source)
+    symbol_nodes = SYMBOL_NODES[language]
+    reference_nodes = REFERENCE_NODES[language]
+    symbols: List[List[Any]] = []
+    refs: Dict[str, List[int]] = {}
+
+    stack: List[Tuple[Any, Optional[str]]] = [(tree.root_node, None)]
+    while stack:
+        node, container = stack.pop()
+        node_type = node.type
+        child_container = container
+
+        kind = symbol_nodes.get(node_type)
+        if kind is not None:
+            start, end = node.start_point[0] + 1, node.end_point[0] + 1
+            if kind == 'field':
+                for declarator in node.children:
+                    if declarator.type == 'variable_declarator':
+                        name = node_name(declarator)
+                        if name:
+                            symbols.append([name, kind, start, end, container])
+            else:
+                name = node_name(node)
+                if name:
+                    symbols.append([name, kind, start, end, container])
+                    if kind in TYPE_KINDS:
+                        child_container = name
+                    elif language == 'python' and container is not None:
+                        symbols[-1][1] = 'method'
+
+        if node_type in reference_nodes:
+            name = reference_name(node, reference_nodes[node_type])
+            if name:
+                refs.setdefault(name, []).append(node.start_point[0] + 1)
+
+        stack.extend((child, child_container) for child in reversed(node.children) if child.is_named)
+
+    for name, lines in refs.items():
+        refs[name] = sorted(set(lines))
+    symbols.sort(key=lambda s: s[2])
+    return {'symbols': symbols, 'refs': refs}
+
+
+def _extract_job(job: Tuple[bytes, str]) -> Dict[str, Any]:
+    return extract_symbols(*job)
+
+
+def walk_project(project_dir: str, excluded: Set[str]) -> Dict[str, Dict[str, int]]:
+    """Source files of the project (relative paths) with their mtime and size."""
+    files = {}
+    for root, dirs, names in os.walk(project_dir):
+        dirs[:] = [d for d in dirs if d not in excluded and not d.startswith('.')]
+        for name in names:
+            if os.path.splitext(name)[1] not in LANGUAGES:
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[os.path.relpath(path, project_dir)] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+    return files
+
+
+class SymbolCache:
+    """
+    Symbols and references of a project, keyed by file content hash.
+
+    Layout: {"version": 1, "files": {relpath: {"mtime", "size", "hash"}},
+    "entries": {hash: {"language", "symbols", "refs"}}}. Name lookups go through
+    an in-memory index built on load.
+    """
+
+    def __init__(self, project_dir: str, cache_dir: str = CACHE_DIR):
+        self.project_dir = os.path.abspath(project_dir)
+        self.path = os.path.join(cache_dir, project_key(project_dir) + '.json')
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+        self._by_name: Optional[Dict[str, List[Tuple[str, List[Any]]]]] = None
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.files = data['files']
+                self.entries = data['entries']
+
+    def refresh(self, excluded: Set[str] = EXCLUDED_DIRS) -> Dict[str, int]:
+        """
+        Bring the cache up to date with the project.
+
+        Returns:
+            {'files', 'parsed', 'rehashed', 'removed'}
+        """
+        current = walk_project(self.project_dir, excluded)
+        removed = [p for p in self.files if p not in current]
+        for rel_path in removed:
+            del self.files[rel_path]
+
+        rehashed = 0
+        pending: Dict[str, Tuple[bytes, str]] = {}
+        for rel_path, stat in current.items():
+            record = self.files.get(rel_path)
+            if record and record['mtime'] == stat['mtime'] and record['size'] == stat['size']:
+                continue
+            try:
+                with open(os.path.join(self.project_dir, rel_path), 'rb') as f:
+                    source = f.read()
+            except OSError:
+                continue
+            digest = hashlib.sha1(source).hexdigest()
+            self.files[rel_path] = {**stat, 'hash': digest}
+            rehashed += 1
+            if digest not in self.entries and digest not in pending:
+                pending[digest] = (source, LANGUAGES[os.path.splitext(rel_path)[1]])
+
+        if len(pending) >= PARALLEL_FILES:
+            with ProcessPoolExecutor() as pool:
+                results = list(pool.map(_extract_job, pending.values(), chunksize=16))
+        else:
+            results = [_extract_job(job) for job in pending.values()]
+        for (digest, (_, language)), result in zip(pending.items(), results):
+            self.entries[digest] = {'language': language, **result}
+
+        # Entries no file points at any more
+        used = {record['hash'] for record in self.files.values()}
+        for digest in [d for d in self.entries if d not in used]:
+            del self.entries[digest]
+
+        if rehashed or removed:
+            self.dirty = True
+            self._by_name = None
+        return {'files': len(self.files), 'parsed': len(pending), 'rehashed': rehashed, 'removed': len(removed)}
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'project': self.project_dir,
+                       'files': self.files, 'entries': self.entries}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def _name_index(self) -> Dict[str, List[Tuple[str, List[Any]]]]:
+        if self._by_name is None:
+            self._by_name = {}
+            for rel_path, record in self.files.items():
+                for symbol in self.entries[record['hash']]['symbols']:
+                    self._by_name.setdefault(symbol[0], []).append((rel_path, symbol))
+        return self._by_name
+
+    def symbols(self, path: str) -> List[Dict[str, Any]]:
+        """Symbols of a file, given relative to the project or to the working directory."""
+        rel_path = os.path.relpath(os.path.abspath(path), self.project_dir) if os.path.exists(path) else path
+        record = self.files.get(rel_path)
+        if record is None:
+            return []
+        return [symbol_dict(rel_path, s) for s in self.entries[record['hash']]['symbols']]
+
+    def find(self, name: str, kind: Optional[str] = None, prefix: bool = False) -> List[Dict[str, Any]]:
+        """Definitions named `name` (or starting with it), optionally of one kind."""
+        index = self._name_index()
+        names = [n for n in index if n.startswith(name)] if prefix else [name]
+        found = [symbol_dict(rel_path, symbol) for n in sorted(names) for rel_path, symbol in index.get(n, [])
+                 if kind is None or symbol[1] == kind]
+        return sorted(found, key=lambda s: (s['file'], s['line']))
+
+    def references(self, name: str) -> List[Dict[str, Any]]:
+        """Files and lines referencing `name`."""
+        found = []
+        for rel_path in sorted(self.files):
+            lines = self.entries[self.files[rel_path]['hash']]['refs'].get(name)
+            if lines:
+                found.append({'file': rel_path, 'lines': lines})
+        return found
+
+
+def symbol_dict(rel_path: str, symbol: List[Any]) -> Dict[str, Any]:
+    name, kind, start, end, container = symbol
+    return {'name': name, 'kind': kind, 'file': rel_path, 'line': start, 'end_line': end, 'container': container}
+
+
+def open_cache(project_dir: str, excluded: Set[str] = EXCLUDED_DIRS) -> SymbolCache:
+    """Load the cache of a project, bring it up to date and save it."""
+    cache = SymbolCache(project_dir)
+    cache.refresh(excluded)
+    cache.save()
+    return cache
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] not in ('index', 'find', 'refs', 'symbols'):
+        print(__doc__)
+        sys.exit(1)
+
+    command, project_dir = args[0], args[1]
+    positional = []
+    excluded = set(EXCLUDED_DIRS)
+    kind = None
+    prefix = as_json = False
+
+    i = 2
+    while i < len(args):
+        if args[i] == '--exclude' and i + 1 < len(args):
+            excluded.add(args[i + 1])
+            i += 2
+        elif args[i] == '--kind' and i + 1 < len(args):
+            kind = args[i + 1]
+            i += 2
+        elif args[i] == '--prefix':
+            prefix = True
+            i += 1
+        elif args[i] == '--json':
+            as_json = True
+            i += 1
+        elif not args[i].startswith('--'):
+            positional.append(args[i])
+            i += 1
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    if not os.path.isdir(project_dir):
+        print(f"Error: Project directory not found: {project_dir}", file=sys.stderr)
+        sys.exit(1)
+    if command != 'index' and len(positional) != 1:
+        print(__doc__)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    cache = SymbolCache(project_dir)
+    stats = cache.refresh(excluded)
+    cache.save()
+
+    if command == 'index':
+        print(f"{stats['files']} files, {stats['parsed']} parsed, {stats['rehashed'] - stats['parsed']} unchanged "
+              f"after re-hash, {stats['removed']} removed in {time.perf_counter() - start:.2f}s")
+        print(f"Cache: {cache.path}")
+        return
+
+    if command == 'find':
+        results = cache.find(positional[0], kind, prefix)
+    elif command == 'refs':
+        results = cache.references(positional[0])
+    else:
+        results = cache.symbols(positional[0])
+
+    if as_json:
+        print(json.dumps(results, indent=2))
+    elif command == 'refs':
+        for ref in results:
+            print(f"{ref['file']}: {', '.join(map(str, ref['lines']))}")
+    else:
+        for symbol in results:
+            container = f" in {symbol['container']}" if symbol['container'] else ''
+            print(f"{symbol['file']}:{symbol['line']}-{symbol['end_line']}  {symbol['kind']} {symbol['name']}{container}")
+
+
+if __name__ == '__main__':
+    main()
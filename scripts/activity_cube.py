@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Activity rollup cube over the sessions of every project.
+
+Keeps a materialized rollup (~/.claude/activity-cube/cube.json) of all session
+transcripts under ~/.claude/projects/, aggregated by project x day x tool:
+
+    messages  user and assistant entries       (tool '' row)
+    prompts   real user prompts                (tool '' row)
+    minutes   distinct minutes with activity   (tool '' row)
+    sessions  distinct sessions                (tool '' row)
+    calls     tool calls                       (one row per tool)
+    files     distinct files edited or written (Edit/Write/MultiEdit/NotebookEdit rows)
+    commits   git commit commands              (Bash row)
+
+Days are local dates of the entry timestamps. Each session's contribution is stored
+next to the rollup, so updates are incremental: grown transcripts are parsed from the
+byte offset where the previous update stopped, rewritten ones are subtracted and
+re-read, and unchanged ones are only stat'ed. Distinct measures keep reference counts
+in the rollup, so range queries never touch a transcript.
+
+Usage:
+    python3 activity_cube.py update
+    python3 activity_cube.py query [--project <project_path>]... [--since YYYY-MM-DD] [--until YYYY-MM-DD]
+                                   [--by day|week|project|tool] [--tool <name>] [--json]
+
+Example:
+    python3 activity_cube.py query --project /home/vedat/t/atlassian --since 2025-12-01 --by week
+"""
+
+import glob
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, Any, Iterable, List, Optional, Set
+
+from session_archive import archived_members, open_session, session_stat
+from session_model import parse_entry, parse_timestamp
+
+
+CUBE_PATH = os.path.expanduser('~/.claude/activity-cube/cube.json')
+PROJECTS_DIR = os.path.expanduser('~/.claude/projects')
+CUBE_VERSION = 1
+
+COUNTERS = ('messages', 'prompts', 'calls', 'commits')
+DISTINCT = ('files', 'minutes', 'sessions')
+FILE_TOOLS = frozenset({'Edit', 'Write', 'MultiEdit', 'NotebookEdit'})
+CONVERSATION_TYPES = frozenset({'user', 'assistant'})
+GROUPINGS = ('day', 'week', 'project', 'tool')
+
+
+def project_key(project_path: str) -> str:
+    """Directory name of a project under ~/.claude/projects/."""
+    return project_path.replace('/', '-')
+
+
+def cell_key(project: str, day: str, tool: str) -> str:
+    return f'{project}|{day}|{tool}'
+
+
+def split_cell_key(key: str):
+    project, day, tool = key.rsplit('|', 2)
+    return project, day, tool
+
+
+def new_cell() -> Dict[str, Any]:
+    cell = {name: 0 for name in COUNTERS}
+    cell.update({name: {} for name in DISTINCT})
+    return cell
+
+
+def rollup_lines(lines: Iterable[str], project: str, session_id: str) -> Dict[str, Dict[str, Any]]:
+    """Per-cell contributions ({key: counters and value sets}) of transcript lines."""
+    cells: Dict[str, Dict[str, Any]] = {}
+
+    def cell(day: str, tool: str) -> Dict[str, Any]:
+        key = cell_key(project, day, tool)
+        if key not in cells:
+            cells[key] = {**{name: 0 for name in COUNTERS}, **{name: set() for name in DISTINCT}}
+        return cells[key]
+
+    for line in lines:
+        if not line or line.isspace():
+            continue
+        try:
+            raw = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if not isinstance(raw, dict) or raw.get('type') not in CONVERSATION_TYPES:
+            continue
+        entry = parse_entry(raw)
+        try:
+            moment = parse_timestamp(entry.timestamp)
+        except ValueError:
+            moment = None
+        if moment is None:
+            continue
+        moment = moment.astimezone() if moment.tzinfo else moment
+        day = moment.strftime('%Y-%m-%d')
+
+        session = cell(day, '')
+        session['messages'] += 1
+        session['minutes'].add(moment.strftime('%H:%M'))
+        session['sessions'].add(session_id)
+        if entry.type == 'user' and entry.message.kind == 'prompt':
+            session['prompts'] += 1
+
+        for call in entry.message.tool_calls:
+            tool = cell(day, call.name)
+            tool['calls'] += 1
+            if call.name in FILE_TOOLS:
+                path = call.input.get('file_path') or call.input.get('notebook_path')
+                if path:
+                    tool['files'].add(path)
+            elif call.name == 'Bash' and 'git commit' in (call.input.get('command') or ''):
+                tool['commits'] += 1
+    return cells
+
+
+class ActivityCube:
+    """
+    The rollup and the per-session contributions it was built from.
+
+    Layout: {"version": 1, "cells": {"project|day|tool": {counters, distinct: {value: sessions}}},
+    "sessions": {"project/session_id": {"size", "mtime", "offset",
+    "cells": {"project|day|tool": {counters, distinct: [values]}}}}}
+    """
+
+    def __init__(self, path: str = CUBE_PATH):
+        self.path = path
+        self.cells: Dict[str, Dict[str, Any]] = {}
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.dirty = False
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == CUBE_VERSION:
+                self.cells = data['cells']
+                self.sessions = data['sessions']
+
+    def _merge(self, record: Dict[str, Any], contributions: Dict[str, Dict[str, Any]]):
+        """Add new contributions to a session record and to the rollup."""
+        for key, delta in contributions.items():
+            own = record['cells'].setdefault(key, {**{n: 0 for n in COUNTERS}, **{n: [] for n in DISTINCT}})
+            total = self.cells.setdefault(key, new_cell())
+            for name in COUNTERS:
+                own[name] += delta[name]
+                total[name] += delta[name]
+            for name in DISTINCT:
+                added = delta[name].difference(own[name])
+                own[name].extend(sorted(added))
+                counts = total[name]
+                for value in added:
+                    counts[value] = counts.get(value, 0) + 1
+        self.dirty = True
+
+    def _remove(self, session_key: str):
+        record = self.sessions.pop(session_key, None)
+        if record is None:
+            return
+        for key, own in record['cells'].items():
+            total = self.cells.get(key)
+            if total is None:
+                continue
+            for name in COUNTERS:
+                total[name] -= own[name]
+            for name in DISTINCT:
+                counts = total[name]
+                for value in own[name]:
+                    remaining = counts.get(value, 0) - 1
+                    if remaining > 0:
+                        counts[value] = remaining
+                    else:
+                        counts.pop(value, None)
+            if not any(total[name] for name in COUNTERS + DISTINCT):
+                del self.cells[key]
+        self.dirty = True
+
+    def _update_session(self, project: str, session_id: str, path: str, stat: Dict[str, Any]) -> bool:
+        session_key = f'{project}/{session_id}'
+        record = self.sessions.get(session_key)
+        if record and record['size'] == stat['size'] and record['mtime'] == stat['mtime']:
+            return False
+        if record and stat['size'] < record['offset']:
+            # Rewritten rather than appended; start over
+            self._remove(session_key)
+            record = None
+        if record is None:
+            record = self.sessions[session_key] = {'size': 0, 'mtime': 0, 'offset': 0, 'cells': {}}
+
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                f.seek(record['offset'])
+                data = f.read(stat['size'] - record['offset'])
+            # Only whole lines; a partially written last line is picked up next time
+            end = data.rfind(b'\n') + 1
+            lines = data[:end].decode('utf-8', errors='replace').splitlines()
+            record['offset'] += end
+        else:
+            if record['offset']:
+                # Packed since the last update; the member is read whole, so start over
+                self._remove(session_key)
+                record = self.sessions[session_key] = {'size': 0, 'mtime': 0, 'offset': 0, 'cells': {}}
+            with open_session(path) as f:
+                lines = f.read().splitlines()
+            record['offset'] = stat['size']
+
+        self._merge(record, rollup_lines(lines, project, session_id))
+        record['size'] = stat['size']
+        record['mtime'] = stat['mtime']
+        return True
+
+    def update(self, projects: Optional[List[str]] = None, session_ids: Optional[Set[str]] = None) -> int:
+        """
+        Bring the rollup up to date for all projects (or the given project paths).
+
+        With session_ids, only those sessions of the given projects are checked.
+
+        Returns:
+            Number of sessions (re)read
+        """
+        if projects is None:
+            dirs = sorted(d for d in glob.glob(os.path.join(PROJECTS_DIR, '*')) if os.path.isdir(d))
+        else:
+            dirs = [os.path.join(PROJECTS_DIR, project_key(p)) for p in projects]
+
+        updated = 0
+        for sessions_dir in dirs:
+            project = os.path.basename(sessions_dir)
+            if session_ids is not None:
+                names = [f'{sid}.jsonl' for sid in session_ids]
+            else:
+                names = {os.path.basename(p) for p in glob.glob(os.path.join(sessions_dir, '*.jsonl'))}
+                names.update(archived_members(sessions_dir) if os.path.isdir(sessions_dir) else {})
+                names = sorted(n for n in names if not n.startswith('agent-'))
+
+            seen = set()
+            for name in names:
+                session_id = name[:-len('.jsonl')]
+                path = os.path.join(sessions_dir, name)
+                stat = session_stat(path)
+                if stat is None:
+                    continue
+                seen.add(f'{project}/{session_id}')
+                updated += self._update_session(project, session_id, path, stat)
+
+            if session_ids is None:
+                for session_key in [k for k in self.sessions if k.startswith(project + '/') and k not in seen]:
+                    self._remove(session_key)
+        return updated
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': CUBE_VERSION, 'cells': self.cells, 'sessions': self.sessions},
+                      f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def query(self, projects: Optional[List[str]] = None, since: Optional[str] = None,
+              until: Optional[str] = None, by: str = 'day', tool: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Roll the cells in a day range up to one row per day, ISO week, project or tool.
+
+        Returns:
+            [{'key', 'messages', 'prompts', 'calls', 'commits', 'files', 'active_minutes',
+              'sessions'}] sorted by key
+        """
+        wanted = {project_key(p) for p in projects} if projects else None
+        groups: Dict[str, Dict[str, Any]] = {}
+        for key, cell in self.cells.items():
+            project, day, cell_tool = split_cell_key(key)
+            if wanted is not None and project not in wanted:
+                continue
+            if (since and day < since) or (until and day > until):
+                continue
+            if tool is not None and cell_tool != tool:
+                continue
+
+            if by == 'day':
+                group_key = day
+            elif by == 'week':
+                group_key = datetime.strptime(day, '%Y-%m-%d').strftime('%G-W%V')
+            elif by == 'project':
+                group_key = project
+            else:
+                group_key = cell_tool or '(session)'
+
+            group = groups.setdefault(group_key, {**{n: 0 for n in COUNTERS}, **{n: set() for n in DISTINCT}})
+            for name in COUNTERS:
+                group[name] += cell[name]
+            group['files'].update(cell['files'])
+            group['sessions'].update(cell['sessions'])
+            group['minutes'].update(f'{day} {m}' for m in cell['minutes'])
+
+        return [{
+            'key': group_key,
+            **{name: group[name] for name in COUNTERS},
+            'files': len(group['files']),
+            'active_minutes': len(group['minutes']),
+            'sessions': len(group['sessions']),
+        } for group_key, group in sorted(groups.items())]
+
+    def session_totals(self, project_path: str, session_ids: Iterable[str]) -> Dict[str, int]:
+        """Summed measures of some sessions of a project, from their stored contributions."""
+        totals = {name: 0 for name in COUNTERS}
+        minutes = set()
+        project = project_key(project_path)
+        for session_id in session_ids:
+            record = self.sessions.get(f'{project}/{session_id}')
+            if record is None:
+                continue
+            for key, own in record['cells'].items():
+                for name in COUNTERS:
+                    totals[name] += own[name]
+                day = split_cell_key(key)[1]
+                minutes.update(f'{day} {m}' for m in own['minutes'])
+        totals['active_minutes'] = len(minutes)
+        return totals
+
+
+def open_cube(projects: Optional[List[str]] = None, session_ids: Optional[Set[str]] = None) -> ActivityCube:
+    """Load the cube, bring it up to date (for the given projects/sessions) and save it."""
+    cube = ActivityCube()
+    cube.update(projects, session_ids)
+    cube.save()
+    return cube
+
+
+def print_rows(rows: List[Dict[str, Any]], by: str):
+    print(f"{by:<24} {'sessions':>8} {'prompts':>8} {'messages':>9} {'calls':>7} {'commits':>7} "
+          f"{'files':>6} {'active':>8}")
+    for row in rows:
+        hours = row['active_minutes'] / 60
+        print(f"{row['key'][:24]:<24} {row['sessions']:>8} {row['prompts']:>8} {row['messages']:>9} "
+              f"{row['calls']:>7} {row['commits']:>7} {row['files']:>6} {hours:>7.1f}h")
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('update', 'query'):
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    projects = []
+    since = until = tool = None
+    by = 'day'
+    as_json = False
+
+    i = 1
+    while i < len(args):
+        if args[i] == '--project' and i + 1 < len(args):
+            projects.append(args[i + 1])
+            i += 2
+        elif args[i] == '--since' and i + 1 < len(args):
+            since = args[i + 1]
+            i += 2
+        elif args[i] == '--until' and i + 1 < len(args):
+            until = args[i + 1]
+            i += 2
+        elif args[i] == '--by' and i + 1 < len(args) and args[i + 1] in GROUPINGS:
+            by = args[i + 1]
+            i += 2
+        elif args[i] == '--tool' and i + 1 < len(args):
+            tool = args[i + 1]
+            i += 2
+        elif args[i] == '--json':
+            as_json = True
+            i += 1
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    cube = ActivityCube()
+    updated = cube.update(projects or None)
+    cube.save()
+    if command == 'update':
+        print(f"{updated} sessions updated, {len(cube.sessions)} sessions in {len(cube.cells)} cells")
+        return
+
+    rows = cube.query(projects or None, since, until, by, tool)
+    if as_json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_rows(rows, by)
+
+
+if __name__ == '__main__':
+    main()
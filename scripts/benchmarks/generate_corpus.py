@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Generate a deterministic synthetic Claude Code session corpus.
+
+Writes `<root>/.claude/projects/<project-name>/*.jsonl` session files and a matching
+`<root>/.claude/history.jsonl`, shaped like real transcripts: prompts with system
+reminders and slash commands, assistant text with Edit/Write/Bash/Read tool calls,
+tool results of configurable size, and context-compression continuations that
+carry a session over into a new file. With --agents, that fraction of turns also
+spawns a sub-agent through a Task call, whose sidechain is written to
+agent-<id>.jsonl next to the session.
+
+Usage:
+    python3 generate_corpus.py <root> [--sessions N] [--turns N] [--tool-result-size BYTES]
+                               [--continuations FRACTION] [--agents FRACTION] [--project PATH] [--seed N]
+
+Example:
+    python3 generate_corpus.py /tmp/corpus --sessions 200 --turns 40
+    HOME=/tmp/corpus python3 ../export_sessions_by_topic.py auth out.html --project /home/dev/project
+"""
+
+import json
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any
+
+
+DEFAULTS = {
+    'sessions': 50,
+    'turns': 30,
+    'tool_result_size': 2000,
+    'continuations': 0.2,
+    'agents': 0.0,
+    'project': '/home/dev/project',
+    'seed': 42,
+}
+
+TOPICS = [
+    'authentication', 'oauth', 'mapper', 'entity', 'validation', 'mongodb', 'kafka',
+    'jira', 'confluence', 'srs', 'work log', 'export', 'polymorphic', 'discriminator',
+    'repository', 'controller', 'integration test', 'migration', 'cache', 'pipeline',
+]
+
+VERBS = ['implement', 'fix', 'review', 'refactor', 'document', 'test', 'explain', 'design']
+
+FILLER = (
+    'Please keep the existing conventions and make sure the build still passes. '
+    'Check the related guide first and mention anything that looks inconsistent. '
+)
+
+SHORT_PROMPTS = ['continue', 'yes', 'ok, go ahead', 'run the tests', 'commit this']
+
+TOOLS = ['Edit', 'Write', 'Bash', 'Read', 'Grep']
+
+AGENT_TYPES = ['implementer', 'code-reviewer', 'api-generator', 'Explore']
+
+CONTINUATION_TEXT = (
+    'This session is being continued from a previous conversation that ran out of context. '
+    'The conversation is summarized below:\n'
+)
+
+SYSTEM_REMINDER = '<system-reminder>\nAs you answer the user\'s questions, you can use the following context.\n</system-reminder>'
+
+
+class SessionWriter:
+    """Writes one session file, chaining uuids and advancing the clock."""
+
+    def __init__(self, path: str, session_id: str, cwd: str, clock: datetime, rng: random.Random,
+                 agent_id: str = None):
+        self.f = open(path, 'w')
+        self.session_id = session_id
+        self.cwd = cwd
+        self.clock = clock
+        self.rng = rng
+        self.agent_id = agent_id
+        self.parent = None
+
+    def write(self, entry_type: str, message: Dict[str, Any] = None, seconds: float = 5, **extra):
+        self.clock += timedelta(seconds=seconds)
+        entry_uuid = str(uuid.UUID(int=self.rng.getrandbits(128)))
+        entry = {
+            'parentUuid': self.parent,
+            'isSidechain': self.agent_id is not None,
+            'type': entry_type,
+            'uuid': entry_uuid,
+            'sessionId': self.session_id,
+            'cwd': self.cwd,
+            'version': '2.0.0',
+            'timestamp': self.clock.strftime('%Y-%m-%dT%H:%M:%S.') + f'{self.clock.microsecond // 1000:03d}Z',
+        }
+        if self.agent_id is not None:
+            entry['agentId'] = self.agent_id
+        if message is not None:
+            entry['message'] = message
+        entry.update(extra)
+        self.f.write(json.dumps(entry) + '\n')
+        self.parent = entry_uuid
+
+    def close(self):
+        # Like a real transcript, the file was last written at its last entry
+        self.f.close()
+        mtime = self.clock.timestamp()
+        os.utime(self.f.name, (mtime, mtime))
+
+
+def make_prompt(rng: random.Random, topic: str) -> str:
+    if rng.random() < 0.25:
+        return rng.choice(SHORT_PROMPTS)
+    verb = rng.choice(VERBS)
+    other = rng.choice(TOPICS)
+    return f"{verb.capitalize()} the {topic} handling in the {other} module. " + FILLER * rng.randint(0, 3)
+
+
+def make_tool_call(rng: random.Random, turn: int, cwd: str) -> Dict[str, Any]:
+    name = rng.choice(TOOLS)
+    path = f"{cwd}/src/module_{rng.randint(1, 40)}.py"
+    if name == 'Edit':
+        tool_input = {'file_path': path, 'old_string': 'a = 1', 'new_string': 'a = 2'}
+    elif name == 'Write':
+        tool_input = {'file_path': path, 'content': 'x = 1\n' * rng.randint(1, 20)}
+    elif name == 'Bash':
+        if rng.random() < 0.15:
+            tool_input = {'command': f'git add -A && git commit -m "Change {turn}"'}
+        else:
+            tool_input = {'command': 'python -m pytest -q'}
+    elif name == 'Read':
+        tool_input = {'file_path': path}
+    else:
+        tool_input = {'pattern': 'def ', 'path': cwd}
+    return {'type': 'tool_use', 'id': f'toolu_{rng.getrandbits(48):012x}', 'name': name, 'input': tool_input}
+
+
+def write_tool_calls(writer: SessionWriter, rng: random.Random, turn: int, topic: str, tool_result_size: int,
+                     count: int):
+    """Write assistant tool calls, each followed by its tool result."""
+    for _ in range(count):
+        call = make_tool_call(rng, turn, writer.cwd)
+        writer.write('assistant', {
+            'role': 'assistant',
+            'model': 'claude-sonnet',
+            'content': [{'type': 'text', 'text': f'I will work on the {topic} change now.'}, call],
+            'usage': {'input_tokens': rng.randint(100, 5000), 'output_tokens': rng.randint(50, 800)},
+        }, seconds=rng.uniform(2, 20))
+        result = ('line of tool output for ' + topic + '\n') * max(1, tool_result_size // 30)
+        writer.write('user', {'role': 'user', 'content': [
+            {'type': 'tool_result', 'tool_use_id': call['id'], 'content': result[:tool_result_size]}
+        ]}, seconds=rng.uniform(1, 60))
+
+
+def write_agent(writer: SessionWriter, rng: random.Random, turn: int, topic: str, tool_result_size: int):
+    """Spawn a sub-agent through a Task call and write its sidechain to agent-<id>.jsonl."""
+    agent_type = rng.choice(AGENT_TYPES)
+    prompt = f"Go through the {topic} changes of turn {turn} and fix what you find. " + FILLER
+    call = {'type': 'tool_use', 'id': f'toolu_{rng.getrandbits(48):012x}', 'name': 'Task', 'input': {
+        'description': f'{agent_type} pass on {topic}', 'prompt': prompt, 'subagent_type': agent_type}}
+    writer.write('assistant', {
+        'role': 'assistant',
+        'model': 'claude-sonnet',
+        'content': [{'type': 'text', 'text': f'Delegating the {topic} pass.'}, call],
+        'usage': {'input_tokens': rng.randint(100, 5000), 'output_tokens': rng.randint(50, 800)},
+    }, seconds=rng.uniform(2, 20))
+
+    agent_id = f'{rng.getrandbits(32):08x}'
+    path = os.path.join(os.path.dirname(writer.f.name), f'agent-{agent_id}.jsonl')
+    agent = SessionWriter(path, writer.session_id, writer.cwd, writer.clock, rng, agent_id)
+    agent.write('user', {'role': 'user', 'content': prompt}, seconds=1)
+    calls = rng.randint(2, 8)
+    write_tool_calls(agent, rng, turn, topic, tool_result_size, calls)
+    agent.write('assistant', {
+        'role': 'assistant',
+        'model': 'claude-sonnet',
+        'content': [{'type': 'text', 'text': f'Finished the {topic} pass.'}],
+        'usage': {'input_tokens': rng.randint(100, 5000), 'output_tokens': rng.randint(50, 800)},
+    }, seconds=rng.uniform(2, 20))
+    agent.close()
+
+    duration = agent.clock - writer.clock
+    writer.clock = agent.clock
+    writer.write('user', {'role': 'user', 'content': [
+        {'type': 'tool_result', 'tool_use_id': call['id'], 'content': f'Finished the {topic} pass.'}
+    ]}, seconds=1, toolUseResult={'status': 'completed', 'agentId': agent_id,
+                                  'totalDurationMs': int(duration.total_seconds() * 1000),
+                                  'totalToolUseCount': calls})
+
+
+def write_turn(writer: SessionWriter, rng: random.Random, turn: int, topic: str, tool_result_size: int,
+               agents: float = 0.0) -> str:
+    """Write one prompt/response exchange; returns the prompt text."""
+    prompt = make_prompt(rng, topic)
+
+    if rng.random() < 0.1:
+        writer.write('user', {'role': 'user', 'content': (
+            '<command-name>/clear</command-name>\n<command-message>clear</command-message>\n<command-args></command-args>'
+        )}, seconds=rng.uniform(10, 120))
+
+    content = [{'type': 'text', 'text': prompt}]
+    if rng.random() < 0.3:
+        content.append({'type': 'text', 'text': SYSTEM_REMINDER})
+    writer.write('user', {'role': 'user', 'content': content}, seconds=rng.uniform(20, 600))
+
+    write_tool_calls(writer, rng, turn, topic, tool_result_size, rng.randint(1, 4))
+    # Only draw from rng when enabled, so corpora without agents stay unchanged
+    if agents and rng.random() < agents:
+        write_agent(writer, rng, turn, topic, tool_result_size)
+
+    writer.write('assistant', {
+        'role': 'assistant',
+        'model': 'claude-sonnet',
+        'content': [{'type': 'text', 'text': f'Done with the {topic} update. ' + FILLER}],
+        'usage': {'input_tokens': rng.randint(100, 5000), 'output_tokens': rng.randint(50, 800)},
+    }, seconds=rng.uniform(2, 20))
+
+    return prompt
+
+
+def generate_corpus(root: str, sessions: int = DEFAULTS['sessions'], turns: int = DEFAULTS['turns'],
+                    tool_result_size: int = DEFAULTS['tool_result_size'],
+                    continuations: float = DEFAULTS['continuations'], agents: float = DEFAULTS['agents'],
+                    project: str = DEFAULTS['project'], seed: int = DEFAULTS['seed']) -> Dict[str, Any]:
+    """
+    Generate a corpus under root.
+
+    Returns:
+        Dictionary with the project path, sessions directory, history file and
+        the list of session files (continuation files follow their original)
+    """
+    rng = random.Random(seed)
+    claude_dir = os.path.join(root, '.claude')
+    sessions_dir = os.path.join(claude_dir, 'projects', project.replace('/', '-'))
+    os.makedirs(sessions_dir, exist_ok=True)
+    history_file = os.path.join(claude_dir, 'history.jsonl')
+
+    clock = datetime(2025, 12, 1, 8, 0, tzinfo=timezone.utc)
+    session_files = []
+
+    with open(history_file, 'w') as history:
+        for _ in range(sessions):
+            topic = rng.choice(TOPICS)
+            clock += timedelta(hours=rng.uniform(1, 20))
+            continued = rng.random() < continuations
+            split_at = rng.randint(turns // 3, max(turns // 3, 2 * turns // 3)) if continued else turns
+
+            session_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            path = os.path.join(sessions_dir, f'{session_id}.jsonl')
+            writer = SessionWriter(path, session_id, project, clock, rng)
+            writer.write('summary', None, seconds=0, summary=f'{topic} work', leafUuid=None)
+            session_files.append(path)
+
+            for turn in range(turns):
+                if turn == split_at:
+                    clock = writer.clock
+                    writer.close()
+                    session_id = str(uuid.UUID(int=rng.getrandbits(128)))
+                    path = os.path.join(sessions_dir, f'{session_id}.jsonl')
+                    writer = SessionWriter(path, session_id, project, clock, rng)
+                    writer.write('user', {'role': 'user', 'content': CONTINUATION_TEXT + FILLER * 5}, seconds=30)
+                    session_files.append(path)
+
+                prompt = write_turn(writer, rng, turn, topic, tool_result_size, agents)
+                history.write(json.dumps({
+                    'display': prompt,
+                    'pastedContents': {},
+                    'timestamp': int(writer.clock.timestamp() * 1000),
+                    'project': project,
+                    'sessionId': session_id,
+                }) + '\n')
+
+            clock = writer.clock
+            writer.close()
+
+    return {
+        'project': project,
+        'sessions_dir': sessions_dir,
+        'history_file': history_file,
+        'session_files': session_files,
+    }
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0].startswith('--'):
+        print(__doc__)
+        sys.exit(1)
+
+    root = args[0]
+    options = dict(DEFAULTS)
+    casts = {'sessions': int, 'turns': int, 'tool_result_size': int,
+             'continuations': float, 'agents': float, 'project': str, 'seed': int}
+
+    i = 1
+    while i < len(args):
+        key = args[i][2:].replace('-', '_')
+        if args[i].startswith('--') and key in casts and i + 1 < len(args):
+            try:
+                options[key] = casts[key](args[i + 1])
+            except ValueError:
+                print(f"Invalid value for {args[i]}: {args[i + 1]}", file=sys.stderr)
+                sys.exit(1)
+            i += 2
+        else:
+            print(f"Unknown argument: {args[i]}", file=sys.stderr)
+            sys.exit(1)
+
+    corpus = generate_corpus(root, **options)
+    print(f"Generated {len(corpus['session_files'])} session files in {corpus['sessions_dir']}")
+    print(f"History: {corpus['history_file']}")
+
+
+if __name__ == '__main__':
+    main()
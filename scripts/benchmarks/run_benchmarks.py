@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Benchmark the session scripts against synthetic corpora.
+
+For every corpus size a deterministic corpus is generated (see generate_corpus.py)
+and export_sessions_by_topic.py, extract_session_data.py and
+score_prompts_with_corrections.py are run against it as separate processes.
+Wall time, input lines/sec and peak RSS of each run are recorded to a JSON
+baseline; with --compare the results are checked against an earlier baseline.
+
+The scripts keep persistent caches under HOME (term store, session index, activity
+cube, rating memo), so every script is timed twice: cold, with those caches removed
+before each sample, and warm, after one priming run. Both are the best of --repeat
+samples; the comparison uses the cold times.
+
+Usage:
+    python3 run_benchmarks.py [--sizes 10,50,200] [--turns N] [--tool-result-size BYTES]
+                              [--continuations FRACTION] [--repeat N] [--work-dir DIR]
+                              [--output baseline.json] [--compare old-baseline.json]
+
+Peak RSS comes from wait4() and is reported in KB (Linux) or bytes (macOS).
+"""
+
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import List, Dict, Any
+
+from generate_corpus import generate_corpus, DEFAULTS
+
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Caches the scripts keep under ~/.claude, removed before every cold sample
+PERSISTENT_CACHES = ('term-stats', 'session-index', 'activity-cube', 'prompt-ratings-memo.json')
+
+# Results slower than this factor against the compared baseline are flagged
+REGRESSION_FACTOR = 1.2
+
+
+def count_lines(paths: List[str]) -> int:
+    total = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            total += sum(1 for _ in f)
+    return total
+
+
+def clear_caches(home: str):
+    """Remove the persistent caches of the scripts under a corpus HOME."""
+    for name in PERSISTENT_CACHES:
+        path = os.path.join(home, '.claude', name)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def run_timed(cmd: List[str], env: Dict[str, str], cwd: str) -> Dict[str, Any]:
+    """Run a command, returning wall time and the child's own peak RSS."""
+    # stderr goes to a file: a pipe that is only read after wait4() would block a
+    # child writing more than a pipe buffer
+    with tempfile.TemporaryFile() as stderr_file:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, env=env, cwd=cwd, stdout=subprocess.DEVNULL, stderr=stderr_file)
+        _, status, rusage = os.wait4(proc.pid, 0)
+        wall = time.perf_counter() - start
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode('utf-8', errors='replace')
+    proc.returncode = os.waitstatus_to_exitcode(status)
+
+    if proc.returncode != 0:
+        print(f"Error: {' '.join(cmd)} exited with {proc.returncode}\n{stderr}", file=sys.stderr)
+        sys.exit(1)
+
+    return {'wall_s': wall, 'peak_rss': rusage.ru_maxrss}
+
+
+def write_scoring_inputs(work_dir: str, prompts: int, seed: int) -> List[str]:
+    """Write a ratings CSV and corrections JSON for the scoring script."""
+    rng = random.Random(seed)
+    ratings_csv = os.path.join(work_dir, 'ratings.csv')
+    corrections_json = os.path.join(work_dir, 'corrections.json')
+    columns = ['C1_Clarity', 'C2_Context', 'C3_Constraint', 'C4_Output', 'C5_Verify',
+               'C6_Iterate', 'C7_Decomp', 'C8_Source', 'C9_Role', 'C10_Example']
+
+    with open(ratings_csv, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['ID', 'Timestamp', 'Prompt_Preview'] + columns)
+        for p in range(1, prompts + 1):
+            writer.writerow([f'P{p}', '', f'Synthetic prompt {p}'] + [rng.randint(0, 10) for _ in columns])
+
+    corrections = []
+    for number in range(5, prompts, 10):
+        target = rng.randint(1, number - 1)
+        corrections.append({
+            'number': number,
+            'severity': rng.choice(['minor', 'moderate', 'major']),
+            'target_pid': f'P{target}',
+            'collateral_pids': [f'P{p}' for p in range(target + 1, number)],
+        })
+    with open(corrections_json, 'w') as f:
+        json.dump(corrections, f)
+
+    return [ratings_csv, corrections_json]
+
+
+def benchmark_size(sessions: int, options: Dict[str, Any], repeat: int, work_root: str) -> List[Dict[str, Any]]:
+    """Generate one corpus and benchmark every script against it."""
+    root = os.path.join(work_root, f'corpus-{sessions}')
+    corpus = generate_corpus(root, sessions=sessions, turns=options['turns'],
+                             tool_result_size=options['tool_result_size'],
+                             continuations=options['continuations'], seed=DEFAULTS['seed'])
+
+    # The daemon would serve from its own in-memory caches; time the scripts themselves
+    env = dict(os.environ, HOME=root, CLAUDE_SESSION_DAEMON='off')
+    session_files = corpus['session_files']
+    corpus_lines = count_lines(session_files)
+    history_lines = count_lines([corpus['history_file']])
+    corpus_bytes = sum(os.path.getsize(p) for p in session_files)
+
+    # extract_session_data is normally run on one logical session; use a slice of
+    # ~10 files so sizes stay comparable as the corpus grows
+    extract_files = session_files[:10]
+    scoring_inputs = write_scoring_inputs(root, sessions * options['turns'] // 4, DEFAULTS['seed'])
+
+    runs = {
+        'export_sessions_by_topic': (
+            [sys.executable, os.path.join(SCRIPTS_DIR, 'export_sessions_by_topic.py'),
+             'oauth,mapper', os.path.join(root, 'export.html'), '--project', corpus['project']],
+            corpus_lines + history_lines
+        ),
+        'extract_session_data': (
+            [sys.executable, os.path.join(SCRIPTS_DIR, 'extract_session_data.py')] + extract_files,
+            count_lines(extract_files)
+        ),
+        'score_prompts_with_corrections': (
+            [sys.executable, os.path.join(SCRIPTS_DIR, 'score_prompts_with_corrections.py')] + scoring_inputs,
+            count_lines(scoring_inputs[:1])
+        ),
+    }
+
+    results = []
+    for script, (cmd, lines) in runs.items():
+        cold = []
+        for _ in range(repeat):
+            clear_caches(root)
+            cold.append(run_timed(cmd, env, root))
+        run_timed(cmd, env, root)
+        warm = [run_timed(cmd, env, root) for _ in range(repeat)]
+        best = min(cold, key=lambda s: s['wall_s'])
+        best_warm = min(warm, key=lambda s: s['wall_s'])
+        result = {
+            'script': script,
+            'sessions': sessions,
+            'session_files': len(session_files),
+            'corpus_bytes': corpus_bytes,
+            'lines': lines,
+            'wall_s': round(best['wall_s'], 4),
+            'lines_per_sec': round(lines / best['wall_s']) if best['wall_s'] else 0,
+            'warm_wall_s': round(best_warm['wall_s'], 4),
+            'peak_rss': max(s['peak_rss'] for s in cold + warm),
+        }
+        results.append(result)
+        print(f"  {script:32} {sessions:5} sessions  cold {result['wall_s']:8.3f}s  "
+              f"warm {result['warm_wall_s']:8.3f}s  {result['lines_per_sec']:10,} lines/s (cold)  "
+              f"{result['peak_rss']:10,} peak RSS")
+
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_file: str) -> bool:
+    """Print changes against an earlier baseline; returns False on regressions."""
+    with open(baseline_file, 'r') as f:
+        baseline = json.load(f)
+
+    previous = {(r['script'], r['sessions']): r for r in baseline['results']}
+    ok = True
+
+    print(f"\nComparison with {baseline_file} ({baseline['meta']['date']}):")
+    for r in results:
+        old = previous.get((r['script'], r['sessions']))
+        if not old:
+            continue
+        time_ratio = r['wall_s'] / old['wall_s'] if old['wall_s'] else 1.0
+        rss_ratio = r['peak_rss'] / old['peak_rss'] if old['peak_rss'] else 1.0
+        flag = ''
+        if time_ratio > REGRESSION_FACTOR or rss_ratio > REGRESSION_FACTOR:
+            flag = '  REGRESSION'
+            ok = False
+        print(f"  {r['script']:32} {r['sessions']:5} sessions  time ×{time_ratio:.2f}  RSS ×{rss_ratio:.2f}{flag}")
+
+    return ok
+
+
+def main():
+    args = sys.argv[1:]
+    sizes = [10, 50, 200]
+    options = {
+        'turns': DEFAULTS['turns'],
+        'tool_result_size': DEFAULTS['tool_result_size'],
+        'continuations': DEFAULTS['continuations'],
+    }
+    repeat = 3
+    work_dir = None
+    output_file = 'benchmark-baseline.json'
+    compare_file = None
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--sizes' and i + 1 < len(args) and all(s.isdigit() for s in args[i + 1].split(',')):
+            sizes = [int(s) for s in args[i + 1].split(',')]
+            i += 2
+        elif args[i] == '--turns' and i + 1 < len(args) and args[i + 1].isdigit():
+            options['turns'] = int(args[i + 1])
+            i += 2
+        elif args[i] == '--tool-result-size' and i + 1 < len(args) and args[i + 1].isdigit():
+            options['tool_result_size'] = int(args[i + 1])
+            i += 2
+        elif args[i] == '--continuations' and i + 1 < len(args) and args[i + 1].replace('.', '', 1).isdigit():
+            options['continuations'] = float(args[i + 1])
+            i += 2
+        elif args[i] == '--repeat' and i + 1 < len(args) and args[i + 1].isdigit():
+            repeat = int(args[i + 1])
+            i += 2
+        elif args[i] == '--work-dir' and i + 1 < len(args):
+            work_dir = args[i + 1]
+            i += 2
+        elif args[i] == '--output' and i + 1 < len(args):
+            output_file = args[i + 1]
+            i += 2
+        elif args[i] == '--compare' and i + 1 < len(args):
+            compare_file = args[i + 1]
+            i += 2
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    work_root = work_dir or tempfile.mkdtemp(prefix='session-bench-')
+    results = []
+    try:
+        for sessions in sizes:
+            results.extend(benchmark_size(sessions, options, repeat, work_root))
+    finally:
+        if work_dir is None:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    baseline = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'options': options,
+        },
+        'results': results,
+    }
+    with open(output_file, 'w') as f:
+        json.dump(baseline, f, indent=2)
+    print(f"\nBaseline written to {output_file}")
+
+    if compare_file and not compare(results, compare_file):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,509 @@
+#!/usr/bin/env python3
+"""
+Static pre-compile checks for generated DNext API sources.
+
+Indexes every .java file under the given roots (parsed in parallel) and, with --spec,
+the OAS type hierarchy (cached by oas_slice.py), then reports the problems that
+otherwise surface one `mvn clean compile` at a time:
+
+- imports that resolve to nothing: project classes missing from the sources, TMF model
+  classes missing from the spec, and framework classes imported from the wrong
+  package (BusinessValidationService, ValidationUtil, EventService, ...; see
+  agents/api-generator/known-issues-fixes.md)
+- Internal* superclasses that are not among the generated sources
+- managed-entity mappers without a @type case for every subtype in the spec
+- nested oneOf types (e.g. PartyOrPartyRole) reached from a managed entity that no
+  mapper in the uses={...} closure handles and that are not ignored via @Mapping
+- package conventions (agents/api-generator/package-structure-conventions.md)
+
+Output is one `path:line: error|warning: message` line per finding; the exit status
+is 1 if any error was found.
+
+Usage:
+    python3 check_generated_java.py <source-root> [source-root...] [--spec <oas.yaml>]... [--jobs N] [--json]
+
+Example:
+    python3 check_generated_java.py dcmms-api/src/main/java --spec dcmms-model/TMF629-Customer_Management-v5.0.1.oas.yaml
+"""
+
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from oas_slice import SpecIndex, iter_refs, schema_ref_name
+
+
+PROJECT_PREFIX = 'com.pia.orbitant.'
+FRAMEWORK_PREFIXES = ('com.pia.orbitant.common.', 'com.pia.orbitant.validator.')
+MODEL_PATTERN = re.compile(r'^org\.tmforum\.openapi\.[\w.]+\.model\.(\w+)$')
+
+# Imports assumed to resolve (JDK and third-party dependencies of the generated poms)
+EXTERNAL_PREFIXES = (
+    'java.', 'javax.', 'jakarta.', 'org.springframework.', 'org.mapstruct.', 'lombok.',
+    'com.fasterxml.', 'io.swagger.', 'org.openapitools.', 'org.slf4j.', 'org.bson.',
+    'com.mongodb.', 'org.apache.', 'io.micrometer.', 'reactor.',
+)
+
+# Framework classes and the package they live in. Generators repeatedly import
+# these from neighbouring packages that compile nowhere.
+FRAMEWORK_CLASSES = {
+    'AbstractEvent': 'com.pia.orbitant.common.core.event',
+    'AclOwnershipUtil': 'com.pia.orbitant.common.acl.util',
+    'BaseAppEventMapper': 'com.pia.orbitant.common.core.mapper',
+    'BaseAppMapper': 'com.pia.orbitant.common.core.mapper',
+    'BaseAppService': 'com.pia.orbitant.common.core.service',
+    'BaseAppServiceImpl': 'com.pia.orbitant.common.core.service',
+    'BaseAppServiceGateway': 'com.pia.orbitant.common.core.servicegateway',
+    'BaseAppServiceGatewayImpl': 'com.pia.orbitant.common.core.servicegateway',
+    'BaseRepository': 'com.pia.orbitant.common.core.repository',
+    'BusinessValidationService': 'com.pia.orbitant.validator.business.common',
+    'DeleteValidator': 'com.pia.orbitant.validator.business.validator',
+    'EntityValidator': 'com.pia.orbitant.validator.business.validator',
+    'EventService': 'com.pia.orbitant.common.core.service',
+    'EventSubscriptionModel': 'com.pia.orbitant.common.core.model',
+    'ExceptionFactory': 'com.pia.orbitant.common.exception.common',
+    'HrefUtil': 'com.pia.orbitant.common.core.component',
+    'IfMatchService': 'com.pia.orbitant.common.core.service',
+    'JsonPatchValidator': 'com.pia.orbitant.validator.business.validator',
+    'MapField': 'com.pia.orbitant.common.core.rest.annotation',
+    'OrbitantException': 'com.pia.orbitant.common.exception.common',
+    'Patcher': 'com.pia.orbitant.common.core.component',
+    'TenantEntity': 'com.pia.orbitant.common.mongo.entity.base',
+    'UpdateValidator': 'com.pia.orbitant.validator.business.validator',
+    'ValidationUtil': 'com.pia.orbitant.common.core.component',
+}
+
+# Framework classes that do not exist at all, with their replacement
+REPLACED_CLASSES = {
+    'EventMapper': 'com.pia.orbitant.common.core.mapper.BaseAppEventMapper',
+}
+
+IMPL_LAYERS = {'ApiImpl': 'api', 'ServiceGatewayImpl': 'servicegateway', 'ServiceImpl': 'service'}
+FLAT_LAYERS = ('entity', 'event', 'mapper', 'repository')
+SOURCE_ROOT_MARKERS = ('/src/main/java/', '/generated-sources/')
+
+COMMENT_PATTERN = re.compile(r'"(?:\\.|[^"\\\n])*"|//[^\n]*|/\*.*?\*/', re.DOTALL)
+PACKAGE_PATTERN = re.compile(r'^\s*package\s+([\w.]+)\s*;', re.MULTILINE)
+IMPORT_PATTERN = re.compile(r'^\s*import\s+(static\s+)?([\w.]+(?:\.\*)?)\s*;', re.MULTILINE)
+TYPE_PATTERN = re.compile(
+    r'^(?:(?:public|protected|private|abstract|final|sealed|non-sealed|static)\s+)*'
+    r'(class|interface|enum|record)\s+(\w+)\s*(<(?:[^<>{]|<[^<>{]*>)*>)?\s*(?:\([^)]*\)\s*)?'
+    r'(?:extends\s+([^{]*?))?\s*(?:implements\s+([^{]*?))?\s*(?:permits\s+[^{]*?)?\{',
+    re.MULTILINE)
+MAPPER_PATTERN = re.compile(r'@Mapper\b(\s*\((?:[^()]|\([^()]*\))*\))?')
+USES_PATTERN = re.compile(r'uses\s*=\s*(\{[^}]*\}|\w+\.class)')
+MAPPING_PATTERN = re.compile(r'@Mapping\s*\(((?:[^()"]|"[^"]*"|\([^()]*\))*)\)')
+TARGET_PATTERN = re.compile(r'target\s*=\s*"([^"]+)"')
+IGNORE_PATTERN = re.compile(r'ignore\s*=\s*true')
+CASE_PATTERN = re.compile(r'\bcase\s+"([^"]+)"\s*(?:->|:)')
+TOKEN_PATTERN = re.compile(r'\b[A-Z]\w*\b')
+STRING_PATTERN = re.compile(r'"(?:\\.|[^"\\\n])*"')
+
+
+def strip_comments(source: str) -> str:
+    """Blank out comments (keeping their newlines so line numbers stay valid)."""
+    def blank(match):
+        text = match.group(0)
+        return text if text.startswith('"') else '\n' * text.count('\n')
+    return COMMENT_PATTERN.sub(blank, source)
+
+
+def split_types(text: Optional[str]) -> List[str]:
+    """Simple names from an extends/implements clause, generics removed."""
+    if not text:
+        return []
+    previous = None
+    while previous != text:
+        previous, text = text, re.sub(r'<[^<>]*>', '', text)
+    return [t.strip().rsplit('.', 1)[-1] for t in text.split(',') if t.strip()]
+
+
+def generic_arguments(clause: Optional[str], name: str) -> List[str]:
+    """Top-level type arguments of `name<...>` in an extends/implements clause."""
+    match = re.search(r'\b' + name + r'\s*<', clause or '')
+    if not match:
+        return []
+    depth, start, arguments = 1, match.end(), []
+    for i in range(match.end(), len(clause)):
+        if clause[i] == '<':
+            depth += 1
+        elif clause[i] == '>':
+            depth -= 1
+            if not depth:
+                arguments.append(clause[start:i])
+                break
+        elif clause[i] == ',' and depth == 1:
+            arguments.append(clause[start:i])
+            start = i + 1
+    return [a.strip().rsplit('.', 1)[-1] for a in arguments]
+
+
+def line_of(text: str, offset: int) -> int:
+    return text.count('\n', 0, offset) + 1
+
+
+def parse_file(path: str) -> Dict[str, Any]:
+    """Everything the checks need from one source file."""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        source = strip_comments(f.read())
+
+    package = PACKAGE_PATTERN.search(source)
+    imports = [(line_of(source, m.start()), m.group(2), bool(m.group(1)))
+               for m in IMPORT_PATTERN.finditer(source)]
+
+    types = []
+    for m in TYPE_PATTERN.finditer(source):
+        extends = m.group(4)
+        types.append({
+            'line': line_of(source, m.start()),
+            'kind': m.group(1),
+            'name': m.group(2),
+            'extends': split_types(extends),
+            'implements': split_types(m.group(5)),
+            'mapper_types': generic_arguments(extends, 'BaseAppMapper'),
+        })
+
+    mapper = MAPPER_PATTERN.search(source)
+    uses = []
+    if mapper and mapper.group(1):
+        clause = USES_PATTERN.search(mapper.group(1))
+        if clause:
+            uses = re.findall(r'(\w+)\.class', clause.group(1))
+
+    ignored = []
+    for m in MAPPING_PATTERN.finditer(source):
+        target = TARGET_PATTERN.search(m.group(1))
+        if target and IGNORE_PATTERN.search(m.group(1)):
+            ignored.append(target.group(1))
+
+    return {
+        'path': path,
+        'package': package.group(1) if package else '',
+        'package_line': line_of(source, package.start()) if package else 1,
+        'imports': imports,
+        'types': types,
+        'is_mapper': mapper is not None,
+        'uses': uses,
+        'ignored': sorted(set(ignored)),
+        'cases': sorted(set(CASE_PATTERN.findall(source))),
+        'tokens': sorted(set(TOKEN_PATTERN.findall(STRING_PATTERN.sub('""', source)))),
+    }
+
+
+def find_sources(roots: List[str]) -> List[str]:
+    paths = []
+    for root in roots:
+        if os.path.isfile(root):
+            paths.append(root)
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+            paths.extend(os.path.join(dirpath, name) for name in sorted(filenames) if name.endswith('.java'))
+    return paths
+
+
+def parse_all(paths: List[str], jobs: int) -> List[Dict[str, Any]]:
+    """Parse the files, across worker processes when there are enough of them."""
+    if jobs <= 1 or len(paths) < 32:
+        return [parse_file(p) for p in paths]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(parse_file, paths, chunksize=max(1, len(paths) // (jobs * 4))))
+
+
+def java_name(schema: str) -> str:
+    """Class name openapi-generator gives a schema (TroubleTicket_FVO -> TroubleTicketFVO)."""
+    return re.sub(r'[^0-9A-Za-z]', '', schema)
+
+
+def is_variant(schema: str) -> bool:
+    return schema.endswith(('_FVO', '_MVO'))
+
+
+class SourceIndex:
+    """Declared types of the parsed sources, by fully qualified and simple name."""
+
+    def __init__(self, files: List[Dict[str, Any]]):
+        self.files = files
+        self.fqns: Dict[str, Dict[str, Any]] = {}
+        self.by_name: Dict[str, List[Tuple[Dict[str, Any], Dict[str, Any]]]] = {}
+        self.packages: Set[str] = set()
+        for source in files:
+            self.packages.add(source['package'])
+            for declared in source['types']:
+                self.fqns[f"{source['package']}.{declared['name']}"] = declared
+                self.by_name.setdefault(declared['name'], []).append((source, declared))
+
+    def resolve(self, source: Dict[str, Any], name: str) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """The declaration a simple name refers to from a file, if it is in the sources."""
+        candidates = self.by_name.get(name, [])
+        packages = {source['package']}
+        for _, imported, static in source['imports']:
+            if static:
+                continue
+            if imported.endswith('.' + name):
+                packages = {imported[:-len(name) - 1]}
+                break
+            if imported.endswith('.*'):
+                packages.add(imported[:-2])
+        for candidate in candidates:
+            if candidate[0]['package'] in packages:
+                return candidate
+        return None
+
+
+class SpecTypes:
+    """Schema names and polymorphic structure of one or more OAS specs."""
+
+    def __init__(self, specs: List[SpecIndex]):
+        self.specs = specs
+        self.schemas: Dict[str, Tuple[SpecIndex, str]] = {}
+        for spec in specs:
+            for name in (spec.spec.get('components') or {}).get('schemas') or {}:
+                self.schemas.setdefault(java_name(name), (spec, name))
+
+    def dispatch_values(self, dto: str) -> Dict[str, str]:
+        """Discriminator values a managed entity's mapper must dispatch on ({value: schema})."""
+        if dto not in self.schemas:
+            return {}
+        spec, schema = self.schemas[dto]
+        concrete = [schema] + [s for s in spec.subtypes_of(schema) if not is_variant(s)]
+        if len(concrete) < 2:
+            return {}
+        mapping = spec.index['hierarchy'].get(schema, {}).get('mapping', {})
+        by_schema = {target: value for value, target in mapping.items()}
+        return {by_schema.get(s, s): s for s in concrete}
+
+    def nested_variants(self, dto: str) -> Dict[str, Set[str]]:
+        """oneOf/anyOf types reachable from a managed entity, keyed by its top-level property."""
+        if dto not in self.schemas:
+            return {}
+        spec, schema = self.schemas[dto]
+        schemas = (spec.spec.get('components') or {}).get('schemas') or {}
+        hierarchy = spec.index['hierarchy']
+
+        found: Dict[str, Set[str]] = {}
+        for prop, node in properties(schemas, schema).items():
+            seen: Set[str] = set()
+            stack = [n for n in (schema_ref_name(r) for r in iter_refs(node, skip_examples=True)) if n]
+            while stack:
+                name = stack.pop()
+                if name in seen or name not in schemas:
+                    continue
+                seen.add(name)
+                if hierarchy.get(name, {}).get('variants'):
+                    found.setdefault(prop, set()).add(java_name(name))
+                    continue
+                for child in properties(schemas, name).values():
+                    stack.extend(n for n in (schema_ref_name(r) for r in iter_refs(child, skip_examples=True)) if n)
+        return found
+
+
+def properties(schemas: Dict[str, Any], name: str, seen: Optional[Set[str]] = None) -> Dict[str, Any]:
+    """Properties of a schema including those inherited through allOf."""
+    seen = seen if seen is not None else set()
+    if name in seen or not isinstance(schemas.get(name), dict):
+        return {}
+    seen.add(name)
+    schema = schemas[name]
+    found: Dict[str, Any] = {}
+    for part in schema.get('allOf', []):
+        if isinstance(part, dict) and '$ref' in part:
+            found.update(properties(schemas, schema_ref_name(part['$ref']), seen))
+        elif isinstance(part, dict):
+            found.update(part.get('properties') or {})
+    found.update(schema.get('properties') or {})
+    return found
+
+
+def check_imports(index: SourceIndex, spec_types: Optional[SpecTypes], source: Dict[str, Any]):
+    local_projects = {'.'.join(p.split('.')[:4]) for p in index.packages if p.startswith(PROJECT_PREFIX)}
+    for line, imported, static in source['imports']:
+        if static or imported.startswith(EXTERNAL_PREFIXES):
+            continue
+        package, _, name = imported.rpartition('.')
+
+        if imported.startswith(FRAMEWORK_PREFIXES):
+            if name in REPLACED_CLASSES:
+                yield line, 'error', f"{imported} does not exist; use {REPLACED_CLASSES[name]}"
+            elif name in FRAMEWORK_CLASSES and package != FRAMEWORK_CLASSES[name]:
+                yield line, 'error', f"{name} is in {FRAMEWORK_CLASSES[name]}, not {package}"
+            continue
+
+        model = MODEL_PATTERN.match(imported)
+        if model:
+            if spec_types and name != '*' and name not in spec_types.schemas and imported not in index.fqns:
+                yield line, 'error', f"{imported}: no schema {name} in the spec"
+            continue
+
+        if imported.startswith(PROJECT_PREFIX) and '.'.join(imported.split('.')[:4]) in local_projects:
+            if name == '*':
+                if package not in index.packages:
+                    yield line, 'error', f"{imported}: package {package} not in the sources"
+            elif imported not in index.fqns:
+                yield line, 'error', f"{imported} not found in the sources"
+
+
+def check_types(index: SourceIndex, source: Dict[str, Any]):
+    for declared in source['types']:
+        for parent in declared['extends']:
+            if parent.startswith('Internal') and index.resolve(source, parent) is None:
+                yield declared['line'], 'error', f"{declared['name']} extends {parent}, which is not in the sources"
+
+
+def check_packages(index: SourceIndex, source: Dict[str, Any]):
+    package = source['package']
+    segments = package.split('.')
+    path = source['path'].replace(os.sep, '/')
+    for marker in SOURCE_ROOT_MARKERS:
+        if marker in path:
+            relative = os.path.dirname(path.split(marker, 1)[1]).split('/')
+            # generated-sources/<tool>/ may add one directory before the package path
+            if relative != segments and relative[1:] != segments:
+                yield source['package_line'], 'error', f"package {package} does not match directory {'/'.join(relative)}"
+            break
+
+    if 'impl' in segments:
+        layer = segments[segments.index('impl') - 1]
+        if layer in FLAT_LAYERS:
+            yield source['package_line'], 'error', f"{layer}/ must not have an impl/ subpackage"
+
+    for declared in source['types']:
+        name, line = declared['name'], declared['line']
+        if declared['kind'] == 'interface' and segments[-1] == 'impl':
+            yield line, 'error', f"interface {name} belongs in {'.'.join(segments[:-1])}, not impl/"
+        suffix = next((s for s in IMPL_LAYERS if name.endswith(s)), None)
+        if suffix and declared['kind'] == 'class':
+            layer = IMPL_LAYERS[suffix]
+            interface = name[:-len('Impl')]
+            if segments[-2:] != [layer, 'impl']:
+                yield line, 'error', f"{name} belongs in {layer}.impl, not {package}"
+            if interface not in declared['implements']:
+                yield line, 'error', f"{name} does not implement {interface}"
+            elif index.resolve(source, interface) is None and interface in index.by_name:
+                yield line, 'error', f"{name} implements {interface} without importing it"
+        if (name.startswith('Internal') and declared['kind'] == 'class' and segments[-1] != 'entity'
+                and not any(s in ('event', 'entity') for s in segments)):
+            yield line, 'warning', f"{name} belongs in the entity package, not {package}"
+        if source['is_mapper'] and declared['kind'] == 'interface' and 'mapper' not in segments \
+                and 'event' not in segments:
+            yield line, 'warning', f"mapper {name} belongs in the mapper package, not {package}"
+
+
+def uses_closure(index: SourceIndex, source: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Set[str]]:
+    """Mapper files reachable through uses={...}, and the names of all used mappers."""
+    files, names, stack = [], set(), [source]
+    while stack:
+        current = stack.pop()
+        if any(f is current for f in files):
+            continue
+        files.append(current)
+        for used in current['uses']:
+            names.add(used)
+            resolved = index.resolve(current, used)
+            if resolved is not None:
+                stack.append(resolved[0])
+    return files, names
+
+
+def check_mapper(index: SourceIndex, spec_types: Optional[SpecTypes], source: Dict[str, Any]):
+    if not source['is_mapper']:
+        return
+    explicit = {imported.rsplit('.', 1)[-1] for _, imported, _ in source['imports']}
+    for used in source['uses']:
+        if used not in explicit and index.resolve(source, used) is None:
+            yield source['types'][0]['line'] if source['types'] else 1, 'warning', \
+                f"uses {used}, which is not in the sources"
+
+    if spec_types is None:
+        return
+    for declared in source['types']:
+        if not declared['mapper_types']:
+            continue
+        dto, line = declared['mapper_types'][0], declared['line']
+
+        values = spec_types.dispatch_values(dto)
+        if values:
+            missing = sorted(v for v in values if v not in source['cases'])
+            if not source['cases']:
+                yield line, 'error', (f"{dto} has subtypes {', '.join(sorted(values))} but {declared['name']} "
+                                      f"has no @type dispatch (see polymorphic-mapper-pattern.md)")
+            elif missing:
+                yield line, 'error', f"{declared['name']} has no case for {dto} subtype(s) {', '.join(missing)}"
+            for value, schema in sorted(values.items()):
+                entity = 'Internal' + java_name(schema)
+                if entity not in index.by_name:
+                    yield line, 'warning', f"no {entity} entity for subtype {value}"
+
+        closure, used_names = uses_closure(index, source)
+        tokens = set().union(*(set(f['tokens']) for f in closure))
+        for prop, variants in sorted(spec_types.nested_variants(dto).items()):
+            if any(t == prop or t.startswith(prop + '.') for t in source['ignored']):
+                continue
+            for variant in sorted(variants):
+                if variant in tokens or any(variant in used for used in used_names):
+                    continue
+                yield line, 'error', (f"{dto}.{prop} reaches polymorphic {variant}, which no mapper in the uses "
+                                      f"closure handles and {prop} is not ignored (see "
+                                      f"nested-polymorphic-field-mapper-pattern.md)")
+
+
+def check(files: List[Dict[str, Any]], spec_types: Optional[SpecTypes]) -> List[Dict[str, Any]]:
+    index = SourceIndex(files)
+    findings = []
+    for source in files:
+        for checker in (check_imports(index, spec_types, source), check_types(index, source),
+                        check_packages(index, source), check_mapper(index, spec_types, source)):
+            for line, severity, message in checker:
+                findings.append({'path': source['path'], 'line': line, 'severity': severity, 'message': message})
+    findings.sort(key=lambda f: (f['path'], f['line']))
+    return findings
+
+
+def main():
+    args = sys.argv[1:]
+    roots = []
+    spec_paths = []
+    jobs = os.cpu_count() or 1
+    as_json = False
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--spec' and i + 1 < len(args):
+            spec_paths.append(args[i + 1])
+            i += 2
+        elif args[i] == '--jobs' and i + 1 < len(args) and args[i + 1].isdigit() and int(args[i + 1]) > 0:
+            jobs = int(args[i + 1])
+            i += 2
+        elif args[i] == '--json':
+            as_json = True
+            i += 1
+        elif args[i].startswith('--'):
+            print(__doc__)
+            sys.exit(1)
+        else:
+            roots.append(args[i])
+            i += 1
+
+    if not roots:
+        print(__doc__)
+        sys.exit(1)
+
+    spec_types = SpecTypes([SpecIndex(p) for p in spec_paths]) if spec_paths else None
+    files = parse_all(find_sources(roots), jobs)
+    findings = check(files, spec_types)
+    errors = sum(1 for f in findings if f['severity'] == 'error')
+
+    if as_json:
+        print(json.dumps({'files': len(files), 'findings': findings}, indent=2))
+    else:
+        for f in findings:
+            print(f"{f['path']}:{f['line']}: {f['severity']}: {f['message']}")
+        print(f"{len(files)} files checked: {errors} errors, {len(findings) - errors} warnings", file=sys.stderr)
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Context-budget analyzer and duplicate-content detector for agents, skills and commands.
+
+Estimates the tokens each entry point puts into context:
+
+  metadata    name + description frontmatter of every agent and skill, loaded into
+              every session
+  body        the command/agent/SKILL.md text loaded when it is invoked, plus the
+              bodies of what it pulls in by name: commands delegate to agents and
+              activate skills, agents activate skills (sub-agents cannot spawn
+              further agents), skills only link files
+  referenced  files reachable through markdown links from those bodies (transitively,
+              directories expand to their files), read on demand
+
+Duplicate content is found across agents/, skills/, commands/ and docs/: identical
+files by content hash, near-identical markdown sections (split at headings) by
+MinHash over word shingles with LSH banding. Each cluster reports the tokens spent on copies beyond the first.
+
+Token counts are estimates (about four characters per word token, one per symbol);
+use them to compare entries, not as exact billing figures.
+
+Usage:
+    python3 context_budget.py [--root <dir>] [--top N] [--threshold <0-1>] [--json]
+
+Example:
+    python3 context_budget.py --root ~/.claude --top 15
+"""
+
+import glob
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Dict, Any, List, Set, Tuple
+
+from near_duplicates import LSHIndex, normalize, shingle_signature
+
+
+SCAN_DIRS = ('agents', 'skills', 'commands', 'docs')
+TEXT_EXTENSIONS = ('.md', '.yaml', '.yml', '.java', '.json', '.txt', '.py', '.sh')
+
+# Which entry kinds each kind can pull into context by naming them
+INVOKES = {
+    'command': ('agent', 'skill'),
+    'agent': ('skill',),
+    'skill': (),
+}
+
+TOKEN_PATTERN = re.compile(r'\w+|[^\w\s]')
+LINK_PATTERN = re.compile(r'\[[^\]]*\]\(([^)\s]+)\)')
+HEADING_PATTERN = re.compile(r'^#{1,6} ')
+FRONTMATTER_PATTERN = re.compile(r'\A---\n(.*?)\n---\n', re.DOTALL)
+
+WORD_SHINGLE = 5
+MIN_SECTION_TOKENS = 50
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: words cost one token per four characters, symbols one each."""
+    return sum((len(t) + 3) // 4 for t in TOKEN_PATTERN.findall(text))
+
+
+def read_text(path: str) -> str:
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+class Entry:
+    """An agent, skill or command and what invoking it loads."""
+
+    __slots__ = ('kind', 'name', 'path', 'text', 'metadata_tokens')
+
+    def __init__(self, kind: str, name: str, path: str):
+        self.kind = kind
+        self.name = name
+        self.path = path
+        self.text = read_text(path)
+        frontmatter = FRONTMATTER_PATTERN.match(self.text)
+        self.metadata_tokens = estimate_tokens(frontmatter.group(1)) if frontmatter and kind != 'command' else 0
+
+
+def find_entries(root: str) -> Dict[str, Entry]:
+    """Agents (agents/*.md), skills (skills/*/SKILL.md) and commands (commands/*.md), by name."""
+    entries = {}
+    for path in sorted(glob.glob(os.path.join(root, 'agents', '*.md'))):
+        name = os.path.basename(path)[:-3]
+        entries[name] = Entry('agent', name, path)
+    for path in sorted(glob.glob(os.path.join(root, 'skills', '*', 'SKILL.md'))):
+        name = os.path.basename(os.path.dirname(path))
+        entries[name] = Entry('skill', name, path)
+    for path in sorted(glob.glob(os.path.join(root, 'commands', '*.md'))):
+        name = os.path.basename(path)[:-3]
+        entries.setdefault(name, Entry('command', name, path))
+    return entries
+
+
+class ContextGraph:
+    """Links between entries (named invocations) and files (markdown links)."""
+
+    def __init__(self, entries: Dict[str, Entry]):
+        self.entries = entries
+        self._tokens: Dict[str, int] = {}
+        self._links: Dict[str, List[str]] = {}
+        names = sorted(entries, key=len, reverse=True)
+        self._name_pattern = re.compile(r'(?<![\w/-])(' + '|'.join(map(re.escape, names)) + r')(?![\w-])') if names else None
+
+    def tokens(self, path: str) -> int:
+        if path not in self._tokens:
+            self._tokens[path] = estimate_tokens(read_text(path))
+        return self._tokens[path]
+
+    def _resolve(self, source: str, target: str) -> List[str]:
+        target = target.split('#', 1)[0]
+        if not target or '://' in target or target.startswith('mailto:'):
+            return []
+        base = os.path.dirname(source)
+        candidates = [os.path.normpath(os.path.join(base, os.path.expanduser(target)))]
+        if source.endswith('.md'):
+            # Agents keep their guides in a directory named after them
+            candidates.append(os.path.normpath(os.path.join(source[:-3], target)))
+        for candidate in candidates:
+            if os.path.isfile(candidate):
+                return [candidate]
+            if os.path.isdir(candidate):
+                return sorted(p for p in glob.glob(os.path.join(candidate, '**', '*'), recursive=True)
+                              if os.path.isfile(p))
+        return []
+
+    def links(self, path: str) -> List[str]:
+        """Files linked from a markdown file."""
+        if path not in self._links:
+            found = []
+            if path.endswith('.md'):
+                for target in LINK_PATTERN.findall(read_text(path)):
+                    for resolved in self._resolve(path, target):
+                        if resolved not in found:
+                            found.append(resolved)
+            self._links[path] = found
+        return self._links[path]
+
+    def invoked(self, entry: Entry) -> List[str]:
+        """Entries named in an entry's text that invoking it can pull in (see INVOKES)."""
+        if self._name_pattern is None or not INVOKES[entry.kind]:
+            return []
+        named = []
+        for name in self._name_pattern.findall(entry.text):
+            if name != entry.name and self.entries[name].kind in INVOKES[entry.kind] and name not in named:
+                named.append(name)
+        return named
+
+    def closure(self, name: str) -> Dict[str, Any]:
+        """Everything invoking an entry can load: entry bodies and linked files, each counted once."""
+        loaded: List[str] = []
+        pending = [name]
+        while pending:
+            current = pending.pop()
+            if current in loaded:
+                continue
+            loaded.append(current)
+            pending.extend(n for n in self.invoked(self.entries[current]) if n not in loaded)
+
+        bodies = {self.entries[n].path for n in loaded}
+        referenced: Set[str] = set()
+        stack = list(bodies)
+        while stack:
+            for linked in self.links(stack.pop()):
+                if linked not in bodies and linked not in referenced:
+                    referenced.add(linked)
+                    stack.append(linked)
+
+        entry = self.entries[name]
+        return {
+            'name': name,
+            'kind': entry.kind,
+            'own_tokens': self.tokens(entry.path),
+            'body_tokens': sum(self.tokens(p) for p in bodies),
+            'referenced_tokens': sum(self.tokens(p) for p in referenced),
+            'invokes': loaded[1:],
+            'referenced_files': len(referenced),
+        }
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """(heading, text) sections of a markdown file, split at headings outside code fences."""
+    lines = text.splitlines(keepends=True)
+    sections = []
+    start, label, in_fence = 0, '(top)', False
+    for i, line in enumerate(lines):
+        if line.startswith('```'):
+            in_fence = not in_fence
+        elif not in_fence and HEADING_PATTERN.match(line):
+            if i > start:
+                sections.append((label, ''.join(lines[start:i])))
+            start, label = i, line.strip()
+    sections.append((label, ''.join(lines[start:])))
+    return sections
+
+
+def word_shingles(normalized: str) -> Set[str]:
+    words = normalized.split()
+    if len(words) <= WORD_SHINGLE:
+        return {' '.join(words)}
+    return {' '.join(words[i:i + WORD_SHINGLE]) for i in range(len(words) - WORD_SHINGLE + 1)}
+
+
+def find_duplicates(root: str, threshold: float) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Exact duplicate files and near-duplicate sections across the scanned directories.
+
+    Returns:
+        {'files': [{'paths', 'tokens', 'wasted_tokens'}],
+         'sections': [{'copies': [{'path', 'section'}], 'tokens', 'wasted_tokens'}]}
+    """
+    files = []
+    for directory in SCAN_DIRS:
+        for path in sorted(glob.glob(os.path.join(root, directory, '**', '*'), recursive=True)):
+            if os.path.isfile(path) and path.endswith(TEXT_EXTENSIONS):
+                files.append(path)
+
+    by_hash: Dict[str, List[str]] = {}
+    texts = {}
+    for path in files:
+        text = read_text(path)
+        digest = hashlib.sha1(text.encode('utf-8')).hexdigest()
+        if digest not in by_hash:
+            texts[path] = text
+        by_hash.setdefault(digest, []).append(path)
+
+    rel = lambda p: os.path.relpath(p, root)
+    file_groups = []
+    for paths in by_hash.values():
+        if len(paths) > 1:
+            tokens = estimate_tokens(texts[paths[0]])
+            file_groups.append({'paths': [rel(p) for p in paths], 'tokens': tokens,
+                                'wasted_tokens': tokens * (len(paths) - 1)})
+
+    # Sections of distinct markdown files only; identical files are already reported
+    # above, and specs and sources repeat themselves by design
+    index = LSHIndex()
+    exact: Dict[str, str] = {}
+    clusters: Dict[str, Dict[str, Any]] = {}
+    for path, text in texts.items():
+        if not path.endswith('.md'):
+            continue
+        for label, section in split_sections(text):
+            tokens = estimate_tokens(section)
+            if tokens < MIN_SECTION_TOKENS:
+                continue
+            normalized = normalize(section)
+            key = f'{rel(path)}\t{label}'
+            digest = hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+            rep = exact.get(digest)
+            signature = None
+            if rep is None:
+                signature = shingle_signature(word_shingles(normalized))
+                rep = index.query(signature, threshold)
+            if rep is None:
+                exact[digest] = key
+                index.add(key, signature)
+                clusters[key] = {'copies': [{'path': rel(path), 'section': label}], 'tokens': tokens,
+                                 'wasted_tokens': 0}
+            else:
+                exact.setdefault(digest, rep)
+                clusters[rep]['copies'].append({'path': rel(path), 'section': label})
+                clusters[rep]['wasted_tokens'] += tokens
+
+    section_groups = [c for c in clusters.values() if len(c['copies']) > 1]
+    file_groups.sort(key=lambda g: g['wasted_tokens'], reverse=True)
+    section_groups.sort(key=lambda g: g['wasted_tokens'], reverse=True)
+    return {'files': file_groups, 'sections': section_groups}
+
+
+def analyze(root: str, threshold: float) -> Dict[str, Any]:
+    entries = find_entries(root)
+    graph = ContextGraph(entries)
+    paths = sorted((graph.closure(name) for name in entries),
+                   key=lambda p: p['body_tokens'] + p['referenced_tokens'], reverse=True)
+    return {
+        'metadata_tokens': sum(e.metadata_tokens for e in entries.values()),
+        'entries': paths,
+        'duplicates': find_duplicates(root, threshold),
+    }
+
+
+def print_report(result: Dict[str, Any], top: int):
+    print(f"Always loaded (agent and skill descriptions): ~{result['metadata_tokens']:,} tokens\n")
+
+    print("Invocation paths (estimated tokens)")
+    print(f"  {'entry':<34} {'kind':<8} {'own':>8} {'body':>8} {'referenced':>11}  invokes")
+    for p in result['entries'][:top]:
+        invokes = ', '.join(p['invokes']) or '-'
+        print(f"  {p['name']:<34} {p['kind']:<8} {p['own_tokens']:>8,} {p['body_tokens']:>8,} "
+              f"{p['referenced_tokens']:>11,}  {invokes}")
+
+    duplicates = result['duplicates']
+    wasted_files = sum(g['wasted_tokens'] for g in duplicates['files'])
+    wasted_sections = sum(g['wasted_tokens'] for g in duplicates['sections'])
+    print(f"\nIdentical files: {len(duplicates['files'])} groups, ~{wasted_files:,} tokens in extra copies")
+    for g in duplicates['files'][:top]:
+        print(f"  {g['wasted_tokens']:>8,}  " + '  =  '.join(g['paths']))
+
+    print(f"\nNear-duplicate sections: {len(duplicates['sections'])} groups, ~{wasted_sections:,} tokens in extra copies")
+    for g in duplicates['sections'][:top]:
+        first = g['copies'][0]
+        print(f"  {g['wasted_tokens']:>8,}  {first['path']} {first['section'][:60]}")
+        for copy in g['copies'][1:]:
+            print(f"            ≈ {copy['path']} {copy['section'][:60]}")
+
+
+def main():
+    args = sys.argv[1:]
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    top = 20
+    threshold = 0.8
+    as_json = False
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--root' and i + 1 < len(args):
+            root = os.path.expanduser(args[i + 1])
+            i += 2
+        elif args[i] == '--top' and i + 1 < len(args) and args[i + 1].isdigit():
+            top = int(args[i + 1])
+            i += 2
+        elif args[i] == '--threshold' and i + 1 < len(args) and args[i + 1].replace('.', '', 1).isdigit():
+            threshold = float(args[i + 1])
+            i += 2
+        elif args[i] == '--json':
+            as_json = True
+            i += 1
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    result = analyze(os.path.abspath(root), threshold)
+    if as_json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result, top)
+
+
+if __name__ == '__main__':
+    main()
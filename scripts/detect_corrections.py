@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Detect correction prompts in Claude Code sessions and attribute them to source prompts.
+
+Usage:
+    python3 detect_corrections.py <session-file> [session-file...] [--ratings <ratings.csv>] [--output <corrections.json>] [--task-gap <minutes>]
+
+Options:
+    --ratings   Ratings CSV used by score_prompts_with_corrections.py. Prompt IDs are
+                taken from it by matching timestamps; only rated prompts can be targets
+                or collateral. Without it, prompt #N is reported as "PN".
+    --output    Write corrections JSON to this file instead of stdout.
+    --task-gap  Minutes of silence that start a new task (default: 30). Attribution
+                never crosses a task boundary.
+
+Output:
+    Corrections JSON in the format read by score_prompts_with_corrections.py:
+    [
+        {
+            "number": 51,
+            "severity": "moderate",
+            "target_pid": "P12",
+            "collateral_pids": ["P13", "P14", "P15"],
+            "markers": ["easy to misinterpret"]
+        }
+    ]
+"""
+
+import csv
+import json
+import math
+import re
+import sys
+from collections import defaultdict
+from typing import List, Dict, Any, Optional
+
+from extract_session_data import extract_session_data
+from session_model import parse_timestamp
+
+
+# Correction markers from the "Correction Penalty System" in commands/extract-work-log.md,
+# grouped by the severity they imply. Compiled into a single alternation so every
+# prompt is scanned once; `lastgroup` tells which severity matched. The markers are
+# matched as whole words, so inflected forms (fixed, typos, ...) are spelled out.
+MARKERS = {
+    'major': [
+        r"completely wrong", r"totally wrong", r"start over", r"not what i asked",
+        r"not what i meant", r"revert (?:all|everything|that)", r"undo (?:all|everything)",
+        r"misunderst(?:ood|anding)",
+    ],
+    'moderate': [
+        r"wrong", r"incorrect(?:ly)?", r"mistakenly", r"should have", r"should mention",
+        r"is ambiguous", r"is unclear", r"easy to misinterpret", r"that'?s not right",
+        r"i meant", r"clarifications?",
+    ],
+    'minor': [
+        r"fix(?:e[ds]|ing)?", r"typos?", r"actually", r"formatting",
+    ],
+    # Scope evolution and preference changes are not corrections (see "When to Skip")
+    'skip': [
+        r"actually,? let'?s also", r"let'?s also add", r"changed my mind",
+        r"on second thought",
+    ],
+}
+
+SEVERITY_RANK = {'minor': 1, 'moderate': 2, 'major': 3}
+
+MARKER_PATTERN = re.compile(
+    '|'.join(
+        f"(?P<{group}>\\b(?:{'|'.join(patterns)})\\b)"
+        for group, patterns in (
+            # Longer, more specific phrases must be tried before the generic ones
+            ('skip', MARKERS['skip']),
+            ('major', MARKERS['major']),
+            ('moderate', MARKERS['moderate']),
+            ('minor', MARKERS['minor']),
+        )
+    ),
+    re.IGNORECASE
+)
+
+WORD_PATTERN = re.compile(r"[a-z][a-z0-9_\-\.]{2,}")
+
+STOPWORDS = frozenset("""
+    the and for are but not you your with this that these those from have has had was were
+    will would can could should shall may might must into onto than then them they there
+    their what when where which while who why how all any each some such only also just
+    very too out off over under more most other same own here about above below
+    again please let lets make sure use using used need needs want wanted like it's its
+    i'm don't doesn't didn't isn't wasn't now one two get got yes okay
+""".split())
+
+
+def classify(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Scan a prompt for correction markers.
+
+    Returns dict with severity and matched markers, or None if the prompt is not a correction.
+    """
+    severity = None
+    markers = []
+    skipped = False
+
+    for match in MARKER_PATTERN.finditer(text):
+        group = match.lastgroup
+        if group == 'skip':
+            skipped = True
+            continue
+        markers.append(match.group(0).lower())
+        if severity is None or SEVERITY_RANK[group] > SEVERITY_RANK[severity]:
+            severity = group
+
+    if severity is None:
+        return None
+
+    # Scope evolution only cancels weak markers; explicit "wrong"/"I meant" still count
+    if skipped and severity == 'minor':
+        return None
+
+    return {'severity': severity, 'markers': sorted(set(markers))}
+
+
+def keywords(text: str) -> set:
+    """Extract the set of indexable keywords from a prompt."""
+    words = set(WORD_PATTERN.findall(text.lower()))
+    return {w.strip('.-') for w in words if w not in STOPWORDS}
+
+
+class TaskIndex:
+    """Keyword inverted index over the prompts of one task."""
+
+    def __init__(self):
+        self.postings = defaultdict(list)  # keyword -> [prompt position, ...]
+        self.prompts = []                  # position -> user message dict
+
+    def add(self, message: Dict[str, Any]):
+        position = len(self.prompts)
+        self.prompts.append(message)
+        for word in keywords(message['text']):
+            self.postings[word].append(position)
+
+    def best_match(self, text: str, eligible) -> Optional[int]:
+        """
+        Return the position of the earlier prompt sharing the most (IDF-weighted)
+        keywords with `text`, preferring the most recent on ties.
+        """
+        total = len(self.prompts)
+        scores = defaultdict(float)
+
+        for word in keywords(text):
+            postings = self.postings.get(word)
+            if not postings:
+                continue
+            weight = math.log(1 + total / len(postings))
+            for position in postings:
+                if eligible(self.prompts[position]):
+                    scores[position] += weight
+
+        if not scores:
+            return None
+
+        return max(scores, key=lambda p: (scores[p], p))
+
+
+def load_pid_map(csv_path: str) -> Dict[str, str]:
+    """Map prompt timestamps to prompt IDs from a ratings CSV."""
+    pid_map = {}
+    with open(csv_path, 'r') as f:
+        for row in csv.DictReader(f):
+            ts = row.get('Timestamp', '')
+            if ts:
+                pid_map[ts] = row['ID']
+    return pid_map
+
+
+def split_tasks(user_messages: List[Dict], gap_minutes: int) -> List[List[Dict]]:
+    """Split user messages into tasks separated by gaps longer than gap_minutes."""
+    tasks = []
+    current = []
+    last_ts = None
+
+    for msg in user_messages:
+        ts = parse_timestamp(msg['timestamp'])
+        if current and ts and last_ts and (ts - last_ts).total_seconds() > gap_minutes * 60:
+            tasks.append(current)
+            current = []
+        current.append(msg)
+        if ts:
+            last_ts = ts
+
+    if current:
+        tasks.append(current)
+
+    return tasks
+
+
+def detect_corrections(user_messages: List[Dict], pid_map: Optional[Dict[str, str]] = None,
+                       gap_minutes: int = 30) -> List[Dict[str, Any]]:
+    """
+    Find correction prompts and attribute each to its source prompt.
+
+    Args:
+        user_messages: User messages as produced by extract_session_data()
+        pid_map: Optional timestamp -> prompt ID map; restricts targets to rated prompts
+        gap_minutes: Silence that separates tasks
+
+    Returns:
+        List of corrections in score_prompts_with_corrections.py format
+    """
+    def pid_of(msg):
+        if pid_map is None:
+            return f"P{msg['number']}"
+        return pid_map.get(msg['timestamp'])
+
+    def eligible(msg):
+        return pid_of(msg) is not None
+
+    corrections = []
+
+    for task in split_tasks(user_messages, gap_minutes):
+        index = TaskIndex()
+
+        for msg in task:
+            found = classify(msg['text']) if index.prompts else None
+
+            if found:
+                position = index.best_match(msg['text'], eligible)
+
+                # Fall back to the immediate (rated) predecessor
+                if position is None:
+                    for candidate in range(len(index.prompts) - 1, -1, -1):
+                        if eligible(index.prompts[candidate]):
+                            position = candidate
+                            break
+
+                if position is not None:
+                    collateral = [
+                        pid_of(p) for p in index.prompts[position + 1:]
+                        if eligible(p)
+                    ]
+                    corrections.append({
+                        'number': msg['number'],
+                        'severity': found['severity'],
+                        'target_pid': pid_of(index.prompts[position]),
+                        'collateral_pids': collateral,
+                        'markers': found['markers']
+                    })
+
+            index.add(msg)
+
+    return corrections
+
+
+def main():
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    session_files = []
+    ratings_csv = None
+    output_file = None
+    gap_minutes = 30
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--ratings' and i + 1 < len(args):
+            ratings_csv = args[i + 1]
+            i += 2
+        elif args[i] == '--output' and i + 1 < len(args):
+            output_file = args[i + 1]
+            i += 2
+        elif args[i] == '--task-gap' and i + 1 < len(args) and args[i + 1].isdigit():
+            gap_minutes = int(args[i + 1])
+            i += 2
+        elif args[i].startswith('--'):
+            print(__doc__)
+            sys.exit(1)
+        else:
+            session_files.append(args[i])
+            i += 1
+
+    if not session_files:
+        print(__doc__)
+        sys.exit(1)
+
+    data = extract_session_data(session_files)
+    pid_map = load_pid_map(ratings_csv) if ratings_csv else None
+    corrections = detect_corrections(data['user_messages'], pid_map, gap_minutes)
+
+    output = json.dumps(corrections, indent=2)
+    if output_file:
+        with open(output_file, 'w') as f:
+            f.write(output + '\n')
+        print(f"Wrote {len(corrections)} correction(s) to {output_file}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
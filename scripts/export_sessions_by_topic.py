@@ -2,177 +2,250 @@
 """
 Export Claude Code conversation sessions filtered by topic/keywords to HTML
 Usage: python3 export_sessions_by_topic.py <keywords> <output_file> [--project <project_path>] [--include-current]
+                                          [--rank] [--top K] [--min-score X]
+                                          [--since DATE] [--until DATE] [--min-messages N]
+                                          [--profile] [--profile-trace <trace.json>]
 Example: python3 export_sessions_by_topic.py "authentication,security" auth-sessions.html
+
+By default any keyword hit anywhere in a transcript selects a session. --rank scores
+sessions with BM25 (first query boosted) and exports them best first; --top keeps the
+K best and --min-score drops weak matches (both imply --rank).
+
+--since/--until (YYYY-MM-DD or ISO datetime, local time; a bare --until date includes
+that day) keep sessions with activity in the window, and --min-messages N keeps
+sessions with at least N user prompts. The filters are checked against history.jsonl
+and file mtime/size before any transcript is opened.
+
+The statistics block (messages, tool calls, active hours) is read from the activity
+cube (activity_cube.py) rather than recounted from the loaded transcripts.
 """
 
-import json
+import html
 import os
 import sys
 from collections import defaultdict
-from datetime import datetime
-import html
-import re
+from datetime import datetime, timedelta
+from string import Template
+
+from activity_cube import open_cube
+from profiler import PROFILER, parse_profile_args
+from session_archive import open_session, session_exists, session_stat
+from session_daemon import query as daemon_query
+from session_search import rank_sessions
+from session_model import iter_entries, read_history, clean_text, classify_text, parse_timestamp
+
+
+DEFAULT_PROJECT = '/home/vedat/t/atlassian'
+CONVERSATION_TYPES = frozenset({'user', 'assistant'})
+
+# Smallest plausible transcript record for a user prompt; a file shorter than
+# min_messages of these cannot hold that many prompts
+MIN_PROMPT_BYTES = 200
+
 
 def print_usage():
     print(__doc__)
     sys.exit(1)
 
-# Parse arguments
-if len(sys.argv) < 3:
-    print_usage()
-
-keywords_arg = sys.argv[1]
-output_file = sys.argv[2]
-keywords = [k.strip().lower() for k in keywords_arg.split(',')]
-
-# Optional arguments
-project_path = '/home/vedat/t/atlassian'
-include_current = False
-
-i = 3
-while i < len(sys.argv):
-    if sys.argv[i] == '--project' and i + 1 < len(sys.argv):
-        project_path = sys.argv[i + 1]
-        i += 2
-    elif sys.argv[i] == '--include-current':
-        include_current = True
-        i += 1
-    else:
-        i += 1
 
-print(f"Searching for sessions with keywords: {', '.join(keywords)}")
-print(f"Project: {project_path}")
-print(f"Include current session: {include_current}")
+def parse_args(argv):
+    """Parse command line arguments into an options dict."""
+    argv = argv[:1] + parse_profile_args(argv[1:])
+    if len(argv) < 3:
+        print_usage()
+
+    options = {
+        'keywords': [k.strip().lower() for k in argv[1].split(',')],
+        'output_file': argv[2],
+        'project_path': DEFAULT_PROJECT,
+        'include_current': False,
+        'rank': False,
+        'top': 0,
+        'min_score': 0.0,
+        'since': None,
+        'until': None,
+        'min_messages': 0,
+    }
+
+    i = 3
+    while i < len(argv):
+        if argv[i] == '--project' and i + 1 < len(argv):
+            options['project_path'] = argv[i + 1]
+            i += 2
+        elif argv[i] == '--include-current':
+            options['include_current'] = True
+            i += 1
+        elif argv[i] == '--rank':
+            options['rank'] = True
+            i += 1
+        elif argv[i] == '--top' and i + 1 < len(argv):
+            options['rank'] = True
+            if not argv[i + 1].isdigit():
+                print_usage()
+            options['top'] = int(argv[i + 1])
+            i += 2
+        elif argv[i] == '--min-score' and i + 1 < len(argv):
+            options['rank'] = True
+            if not argv[i + 1].replace('.', '', 1).isdigit():
+                print_usage()
+            options['min_score'] = float(argv[i + 1])
+            i += 2
+        elif argv[i] == '--since' and i + 1 < len(argv):
+            options['since'] = parse_date(argv[i + 1])
+            i += 2
+        elif argv[i] == '--until' and i + 1 < len(argv):
+            options['until'] = parse_date(argv[i + 1], end_of_day=True)
+            i += 2
+        elif argv[i] == '--min-messages' and i + 1 < len(argv):
+            if not argv[i + 1].isdigit():
+                print_usage()
+            options['min_messages'] = int(argv[i + 1])
+            i += 2
+        else:
+            i += 1
+
+    return options
 
-# Paths
-history_file = os.path.expanduser("~/.claude/history.jsonl")
-project_name = project_path.replace('/', '-')
-sessions_dir = os.path.expanduser(f"~/.claude/projects/{project_name}/")
 
-if not os.path.exists(sessions_dir):
-    print(f"Error: Sessions directory not found: {sessions_dir}")
-    sys.exit(1)
+def parse_date(value, end_of_day=False):
+    """Parse a YYYY-MM-DD or ISO datetime argument into epoch seconds (local time if naive)."""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        print(f"Error: invalid date: {value}")
+        sys.exit(1)
+    if end_of_day and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed.timestamp()
+
+
+def prune_sessions(sessions_meta, sessions_dir, since, until, min_messages):
+    """
+    Drop sessions outside the date range or with too few prompts, cheapest source first.
+
+    history.jsonl: a first prompt after `until`, or fewer recorded prompts than
+    `min_messages`. File stat: last write before `since`, or too small to hold
+    `min_messages` prompts. Nothing is opened.
+
+    Returns:
+        (candidate session ids, [(source, pruned count)])
+    """
+    candidates = set()
+    with PROFILER.stage('filter_history'):
+        for session_id, meta in sessions_meta.items():
+            if until is not None and meta.get('timestamp', 0) / 1000 >= until:
+                continue
+            if meta.get('queries', 1) < min_messages:
+                continue
+            candidates.add(session_id)
+    pruned = [('history.jsonl', len(sessions_meta) - len(candidates))]
+
+    remaining = set()
+    with PROFILER.stage('filter_stat'):
+        for session_id in candidates:
+            stat = session_stat(os.path.join(sessions_dir, f"{session_id}.jsonl"))
+            if stat is None:
+                continue
+            if since is not None and stat['mtime'] < since:
+                continue
+            if stat['size'] < min_messages * MIN_PROMPT_BYTES:
+                continue
+            remaining.add(session_id)
+    pruned.append(('file mtime/size', len(candidates) - len(remaining)))
+
+    return remaining, pruned
+
+
+def in_window(messages, since, until):
+    """True if any entry of the conversation falls within [since, until)."""
+    for entry in messages:
+        if not entry.timestamp:
+            continue
+        seconds = parse_timestamp(entry.timestamp).timestamp()
+        if (since is None or seconds >= since) and (until is None or seconds < until):
+            return True
+    return False
+
+
+def find_matching_sessions(sessions_meta, sessions_dir, keywords):
+    """Find sessions whose first query or transcript mentions any keyword."""
+    matching_session_ids = set()
+    for session_id, meta in sessions_meta.items():
+        query = meta['first_query'].lower()
+        if any(kw in query for kw in keywords):
+            matching_session_ids.add(session_id)
+
+    # Also search within conversation content for better matching
+    for session_id in sessions_meta.keys():
+        if session_id in matching_session_ids:
+            continue
+
+        conv_file = os.path.join(sessions_dir, f"{session_id}.jsonl")
+        if not session_exists(conv_file):
+            continue
 
-# Read history to find matching sessions
-sessions_meta = {}
-with open(history_file, 'r') as f:
-    for line in f:
         try:
-            entry = json.loads(line)
-            if entry.get('project') == project_path:
-                session_id = entry.get('sessionId')
-                if session_id and session_id not in sessions_meta:
-                    sessions_meta[session_id] = {
-                        'first_query': entry.get('display', ''),
-                        'timestamp': entry.get('timestamp', 0)
-                    }
-        except:
+            with PROFILER.stage('keyword_search') as span:
+                with open_session(conv_file) as f:
+                    content = f.read().lower()
+                span['bytes'] += len(content)
+                if any(kw in content for kw in keywords):
+                    matching_session_ids.add(session_id)
+        except OSError:
             pass
 
-# Find sessions matching keywords
-matching_session_ids = set()
-for session_id, meta in sessions_meta.items():
-    query = meta['first_query'].lower()
-    if any(kw in query for kw in keywords):
-        matching_session_ids.add(session_id)
+    return matching_session_ids
+
+
+def load_conversations(session_ids, sessions_dir):
+    """Load the user and assistant entries of each session."""
+    conversations = {}
+    for session_id in session_ids:
+        conv_file = os.path.join(sessions_dir, f"{session_id}.jsonl")
+        if not session_exists(conv_file):
+            continue
+
+        messages = list(iter_entries(conv_file, CONVERSATION_TYPES))
+        if messages:
+            conversations[session_id] = messages
 
-# Also search within conversation content for better matching
-for session_id in sessions_meta.keys():
-    if session_id in matching_session_ids:
-        continue
+    return conversations
 
-    conv_file = os.path.join(sessions_dir, f"{session_id}.jsonl")
-    if not os.path.exists(conv_file):
-        continue
 
+def format_time(timestamp):
+    """Format an ISO entry timestamp as HH:MM:SS."""
+    if not timestamp:
+        return ''
     try:
-        with open(conv_file, 'r') as f:
-            content = f.read().lower()
-            if any(kw in content for kw in keywords):
-                matching_session_ids.add(session_id)
-    except:
-        pass
-
-print(f"Found {len(matching_session_ids)} matching sessions")
-
-# Load full conversations
-conversations = {}
-for session_id in matching_session_ids:
-    conv_file = os.path.join(sessions_dir, f"{session_id}.jsonl")
-    if not os.path.exists(conv_file):
-        continue
-
-    messages = []
-    with open(conv_file, 'r') as f:
-        for line in f:
-            try:
-                msg = json.loads(line)
-                if msg.get('type') in ['user', 'assistant']:
-                    messages.append(msg)
-            except:
-                pass
-
-    if messages:
-        conversations[session_id] = messages
-
-# Sort sessions by timestamp
-sorted_sessions = sorted(
-    conversations.items(),
-    key=lambda x: sessions_meta.get(x[0], {}).get('timestamp', 0)
-)
-
-def extract_text_from_content(content, check_tools=False):
-    """Extract text from message content"""
-    has_tools = False
-    if isinstance(content, str):
-        return content, has_tools
-    if isinstance(content, list):
-        texts = []
-        for item in content:
-            if isinstance(item, dict):
-                if item.get('type') == 'text':
-                    texts.append(item.get('text', ''))
-                elif item.get('type') == 'tool_use':
-                    has_tools = True
-                    continue
-            elif isinstance(item, str):
-                texts.append(item)
-        return ' '.join(texts), has_tools
-    return '', has_tools
-
-def clean_user_message(text):
-    """Clean up user messages"""
-    if '[Request interrupted by user]' in text or 'Request interrupted by user' in text:
-        return 'INTERRUPTED'
-
-    # Filter out session continuation messages
-    if 'This session is being continued from a previous conversation' in text:
-        return 'SESSION_CONTINUATION'
-
-    text = re.sub(r'<command-name>.*?</command-name>', '', text)
-    text = re.sub(r'<command-message>.*?</command-message>', '', text)
-    text = re.sub(r'<command-args>.*?</command-args>', '', text)
-    text = re.sub(r'<local-command-stdout>.*?</local-command-stdout>', '', text, flags=re.DOTALL)
-    text = re.sub(r'<user-memory-input>(.*?)</user-memory-input>', r'\1', text)
-    text = re.sub(r'Caveat:.*?user explicitly asks you to\.', '', text, flags=re.DOTALL)
-    text = re.sub(r'<system-reminder>.*?</system-reminder>', '', text, flags=re.DOTALL)
-    return text.strip()
-
-def generate_session_summary(messages, session_id):
-    """Generate a brief summary of what was achieved in the session"""
-    user_queries = []
+        return parse_timestamp(timestamp).strftime('%H:%M:%S')
+    except ValueError:
+        return ''
 
-    for msg in messages:
-        msg_content = msg.get('message', {})
-        content = msg_content.get('content', '')
-        text, _ = extract_text_from_content(content)
-        text = clean_user_message(text)
 
-        if not text or text.startswith('/') or 'Caveat:' in text or text == 'INTERRUPTED' or text == 'SESSION_CONTINUATION':
-            continue
+def user_prompts(messages):
+    """Text of the real user prompts in a conversation."""
+    return [m.message.text for m in messages if m.type == 'user' and m.message.kind == 'prompt']
+
+
+def session_title(meta, messages, length):
+    """Session title from the first history query, falling back to the first prompt."""
+    raw = meta.get('first_query', 'Session')[:length]
+    title = clean_text(raw)
+    kind = classify_text(raw, title)
+    if title.startswith('#'):
+        title = title[1:].strip()
 
-        if msg.get('type') == 'user':
-            user_queries.append(text)
+    if not title or kind != 'prompt':
+        prompts = user_prompts(messages)
+        if prompts:
+            title = prompts[0][:length]
+
+    return title
+
+
+def generate_session_summary(messages, keywords):
+    """Generate a brief summary of what was achieved in the session"""
+    user_queries = user_prompts(messages)
 
     if not user_queries:
         return "Session details not available."
@@ -189,13 +262,14 @@ def generate_session_summary(messages, session_id):
 
     return summary
 
-# Generate HTML with same template as original
-html_content = """<!DOCTYPE html>
+
+# Page header and styles; $keywords is substituted
+HTML_HEAD = Template("""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Session Export - """ + ', '.join(keywords) + """</title>
+    <title>Session Export - $keywords</title>
     <style>
         * {
             margin: 0;
@@ -463,82 +537,62 @@ html_content = """<!DOCTYPE html>
     <div class="container">
         <header>
             <h1>Session Export</h1>
-            <p>Filtered by: """ + ', '.join(keywords) + """</p>
+            <p>Filtered by: $keywords</p>
         </header>
 
         <nav>
             <h2>Table of Contents</h2>
-"""
+""")
 
-# Generate TOC
-toc_data = []
-query_counter = defaultdict(int)
 
-for idx, (session_id, messages) in enumerate(sorted_sessions, 1):
-    meta = sessions_meta.get(session_id, {})
-    first_msg = meta.get('first_query', 'Session')[:80]
-    timestamp = meta.get('timestamp', 0)
-    date_str = datetime.fromtimestamp(timestamp/1000).strftime('%Y-%m-%d %H:%M') if timestamp else 'Unknown'
-
-    first_msg = clean_user_message(first_msg)
-    if first_msg.startswith('#'):
-        first_msg = first_msg[1:].strip()
-    if not first_msg or first_msg.startswith('/') or first_msg == 'INTERRUPTED' or first_msg == 'SESSION_CONTINUATION':
-        for msg in messages:
-            if msg.get('type') == 'user':
-                msg_content = msg.get('message', {})
-                content = msg_content.get('content', '')
-                text, _ = extract_text_from_content(content)
-                text = clean_user_message(text)
-                if text and not text.startswith('/') and text != 'INTERRUPTED' and text != 'SESSION_CONTINUATION':
-                    first_msg = text[:80]
-                    break
-
-    queries = []
-    for msg in messages:
-        if msg.get('type') == 'user':
-            msg_content = msg.get('message', {})
-            content = msg_content.get('content', '')
-            text, _ = extract_text_from_content(content)
-            text = clean_user_message(text)
-            if text and not text.startswith('/') and len(text) > 10 and text != 'INTERRUPTED' and text != 'SESSION_CONTINUATION':
+def render_toc(sorted_sessions, sessions_meta):
+    """Render the table of contents; returns (html, toc_data)."""
+    parts = []
+    toc_data = []
+    query_counter = defaultdict(int)
+
+    for idx, (session_id, messages) in enumerate(sorted_sessions, 1):
+        meta = sessions_meta.get(session_id, {})
+        first_msg = session_title(meta, messages, 80)
+        timestamp = meta.get('timestamp', 0)
+        date_str = datetime.fromtimestamp(timestamp/1000).strftime('%Y-%m-%d %H:%M') if timestamp else 'Unknown'
+
+        queries = []
+        for text in user_prompts(messages):
+            if len(text) > 10:
                 query_counter[session_id] += 1
                 queries.append((query_counter[session_id], text[:100]))
 
-    toc_data.append((idx, session_id, first_msg, date_str, queries))
+        toc_data.append((idx, session_id, first_msg, date_str, queries))
 
-    html_content += f"""
+        parts.append(f"""
             <div class="toc-session">
                 <div class="toc-session-title">
                     <a href="#session-{idx}">Session {idx}: {html.escape(first_msg)}</a>
                 </div>
                 <div style="font-size: 0.9em; color: #6c757d; margin-bottom: 10px;">{date_str} | {len(queries)} queries</div>
                 <ul class="toc-queries">
-"""
+""")
 
-    for q_num, query_text in queries[:10]:
-        html_content += f'                    <li><a href="#session-{idx}-q{q_num}">{html.escape(query_text)}</a></li>\n'
+        for q_num, query_text in queries[:10]:
+            parts.append(f'                    <li><a href="#session-{idx}-q{q_num}">{html.escape(query_text)}</a></li>\n')
 
-    if len(queries) > 10:
-        html_content += f'                    <li><em>... and {len(queries) - 10} more queries</em></li>\n'
+        if len(queries) > 10:
+            parts.append(f'                    <li><em>... and {len(queries) - 10} more queries</em></li>\n')
 
-    html_content += """                </ul>
+        parts.append("""                </ul>
             </div>
-"""
+""")
 
-html_content += """        </nav>
+    return ''.join(parts), toc_data
 
-        <div class="content">
-"""
 
-# Add statistics
-total_messages = sum(len(messages) for _, messages in sorted_sessions)
-total_queries = sum(len(q[4]) for q in toc_data)
-
-html_content += f"""
+def render_stats(session_count, total_queries, activity):
+    """Render the statistics block from the activity cube totals of the exported sessions."""
+    return f"""
             <div class="stats">
                 <div class="stat-item">
-                    <div class="stat-number">{len(sorted_sessions)}</div>
+                    <div class="stat-number">{session_count}</div>
                     <div class="stat-label">Sessions</div>
                 </div>
                 <div class="stat-item">
@@ -546,164 +600,265 @@ html_content += f"""
                     <div class="stat-label">User Queries</div>
                 </div>
                 <div class="stat-item">
-                    <div class="stat-number">{total_messages}</div>
+                    <div class="stat-number">{activity['messages']}</div>
                     <div class="stat-label">Total Messages</div>
                 </div>
                 <div class="stat-item">
-                    <div class="stat-number">{total_queries // len(sorted_sessions) if sorted_sessions else 0}</div>
+                    <div class="stat-number">{activity['calls']}</div>
+                    <div class="stat-label">Tool Calls</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-number">{activity['active_minutes'] / 60:.1f}</div>
+                    <div class="stat-label">Active Hours</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-number">{total_queries // session_count if session_count else 0}</div>
                     <div class="stat-label">Avg Queries/Session</div>
                 </div>
             </div>
 """
 
-# Add full conversations
-for idx, (session_id, messages) in enumerate(sorted_sessions, 1):
-    meta = sessions_meta.get(session_id, {})
-    timestamp = meta.get('timestamp', 0)
-    date_str = datetime.fromtimestamp(timestamp/1000).strftime('%Y-%m-%d %H:%M:%S') if timestamp else 'Unknown'
-
-    first_msg = meta.get('first_query', 'Session')[:100]
-    first_msg = clean_user_message(first_msg)
-    if first_msg.startswith('#'):
-        first_msg = first_msg[1:].strip()
-
-    summary = generate_session_summary(messages, session_id)
 
-    html_content += f"""
-            <div class="session" id="session-{idx}">
-                <div class="session-header">
-                    <h2>Session {idx}: {html.escape(first_msg)}</h2>
-                    <div class="session-meta">
-                        Date: {date_str} | Session ID: {session_id}
-                    </div>
-                    <div class="session-summary">
-                        <strong>Summary:</strong> {html.escape(summary)}
-                    </div>
-                </div>
-                <div class="conversation">
-"""
-
-    # Add messages - merge consecutive assistant responses
+def render_conversation(messages, idx):
+    """Render the messages of one session, merging consecutive assistant responses."""
+    parts = []
     query_num = 0
     i = 0
     while i < len(messages):
-        msg = messages[i]
-        msg_type = msg.get('type')
+        entry = messages[i]
+        msg = entry.message
 
-        if msg_type not in ['user', 'assistant']:
-            i += 1
-            continue
-
-        msg_content = msg.get('message', {})
-        content = msg_content.get('content', '')
-        text, has_tools = extract_text_from_content(content)
-        text = clean_user_message(text)
-
-        if text == 'INTERRUPTED':
-            html_content += """
+        if msg.kind == 'interrupted':
+            parts.append("""
                     <div class="message interrupted">
                         <div class="message-label">⚠ Interrupted</div>
                         <div class="message-text">Request interrupted by user</div>
                     </div>
-"""
+""")
             i += 1
             continue
 
-        if not text or text.startswith('/clear') or text.startswith('/login') or text.startswith('/mcp') or text == 'SESSION_CONTINUATION':
+        if msg.kind != 'prompt':
             i += 1
             continue
 
-        is_user = msg_type == 'user'
-
-        if is_user:
-            msg_timestamp = msg.get('timestamp', '')
-            if msg_timestamp:
-                try:
-                    time_str = datetime.fromisoformat(msg_timestamp.replace('Z', '+00:00')).strftime('%H:%M:%S')
-                except:
-                    time_str = ''
-            else:
-                time_str = ''
-
-            query_num += 1
-            anchor = f' id="session-{idx}-q{query_num}"' if len(text) > 10 else ''
+        if entry.type == 'user':
+            text = msg.text
+            anchor = ''
+            if len(text) > 10:
+                query_num += 1
+                anchor = f' id="session-{idx}-q{query_num}"'
 
-            html_content += f"""
+            parts.append(f"""
                     <div class="message user"{anchor}>
                         <div class="message-label">User Query</div>
                         <div class="message-text">{html.escape(text)}</div>
-                        <div class="timestamp">{time_str}</div>
+                        <div class="timestamp">{format_time(entry.timestamp)}</div>
                     </div>
-"""
+""")
             i += 1
         else:
             merged_texts = []
             used_tools = False
-            first_timestamp = msg.get('timestamp', '')
-
-            while i < len(messages) and messages[i].get('type') == 'assistant':
-                msg_content = messages[i].get('message', {})
-                content = msg_content.get('content', '')
-                text, has_tools = extract_text_from_content(content)
-                text = clean_user_message(text)
+            first_timestamp = entry.timestamp
 
-                if text and not text.startswith('/'):
-                    merged_texts.append(text)
-                if has_tools:
+            while i < len(messages) and messages[i].type == 'assistant':
+                msg = messages[i].message
+                if msg.kind == 'prompt':
+                    merged_texts.append(msg.text)
+                if msg.tool_calls:
                     used_tools = True
                 i += 1
 
-            if merged_texts:
-                if first_timestamp:
-                    try:
-                        time_str = datetime.fromisoformat(first_timestamp.replace('Z', '+00:00')).strftime('%H:%M:%S')
-                    except:
-                        time_str = ''
-                else:
-                    time_str = ''
-
-                combined_text = '\n\n'.join(merged_texts)
-                if used_tools and '<using tool' not in combined_text.lower():
-                    combined_text = '<using tools>\n\n' + combined_text
+            combined_text = '\n\n'.join(merged_texts)
+            if used_tools and '<using tool' not in combined_text.lower():
+                combined_text = '<using tools>\n\n' + combined_text
 
-                html_content += f"""
+            parts.append(f"""
                     <div class="message assistant">
                         <div class="message-label">Assistant Response</div>
                         <div class="message-text">{html.escape(combined_text)}</div>
-                        <div class="timestamp">{time_str}</div>
+                        <div class="timestamp">{format_time(first_timestamp)}</div>
                     </div>
-"""
+""")
+
+    return ''.join(parts)
+
 
-    html_content += """
+def render_session(idx, session_id, messages, meta, keywords):
+    """Render one session with its header and conversation."""
+    timestamp = meta.get('timestamp', 0)
+    date_str = datetime.fromtimestamp(timestamp/1000).strftime('%Y-%m-%d %H:%M:%S') if timestamp else 'Unknown'
+    first_msg = session_title(meta, messages, 100)
+    summary = generate_session_summary(messages, keywords)
+
+    return f"""
+            <div class="session" id="session-{idx}">
+                <div class="session-header">
+                    <h2>Session {idx}: {html.escape(first_msg)}</h2>
+                    <div class="session-meta">
+                        Date: {date_str} | Session ID: {session_id}
+                    </div>
+                    <div class="session-summary">
+                        <strong>Summary:</strong> {html.escape(summary)}
+                    </div>
+                </div>
+                <div class="conversation">
+""" + render_conversation(messages, idx) + """
                 </div>
             </div>
 """
 
-html_content += """
+
+def render_html(sorted_sessions, sessions_meta, keywords, activity):
+    """Render the full export page; returns (html, toc_data, total_queries)."""
+    keywords_str = html.escape(', '.join(keywords))
+    toc_html, toc_data = render_toc(sorted_sessions, sessions_meta)
+
+    total_queries = sum(len(q[4]) for q in toc_data)
+
+    parts = [
+        HTML_HEAD.substitute(keywords=keywords_str),
+        toc_html,
+        """        </nav>
+
+        <div class="content">
+""",
+        render_stats(len(sorted_sessions), total_queries, activity),
+    ]
+
+    for idx, (session_id, messages) in enumerate(sorted_sessions, 1):
+        parts.append(render_session(idx, session_id, messages, sessions_meta.get(session_id, {}), keywords))
+
+    parts.append("""
         </div>
 
         <footer>
             <p>Generated from Claude Code conversation history</p>
-            <p>Keywords: """ + ', '.join(keywords) + """</p>
+            <p>Keywords: """ + keywords_str + """</p>
             <p>Export Date: """ + datetime.now().strftime('%Y-%m-%d %H:%M:%S') + """</p>
         </footer>
     </div>
 </body>
 </html>
-"""
-
-# Make output path absolute if relative
-if not os.path.isabs(output_file):
-    output_file = os.path.abspath(output_file)
-
-# Write HTML file
-with open(output_file, 'w', encoding='utf-8') as f:
-    f.write(html_content)
-
-print(f"\n✓ Session export created: {output_file}")
-print(f"✓ Extracted {len(sorted_sessions)} sessions")
-print(f"✓ Total queries: {total_queries}")
-print(f"✓ Total messages: {total_messages}")
-print("\nSession Overview:")
-for idx, sid, first_msg, date_str, queries in toc_data:
-    print(f"  {idx}. [{date_str}] {first_msg[:70]}... ({len(queries)} queries)")
+""")
+
+    return ''.join(parts), toc_data, total_queries
+
+
+def report_pruning(total, pruned):
+    """Print how many sessions each pushed-down filter stage removed."""
+    for source, count in pruned:
+        print(f"Pruned {count} of {total} sessions by {source}")
+        total -= count
+    print(f"{total} candidate sessions left to open")
+
+
+def main():
+    options = parse_args(sys.argv)
+    keywords = options['keywords']
+    project_path = options['project_path']
+    output_file = options['output_file']
+
+    print(f"Searching for sessions with keywords: {', '.join(keywords)}")
+    print(f"Project: {project_path}")
+    print(f"Include current session: {options['include_current']}")
+
+    # Paths
+    history_file = os.path.expanduser("~/.claude/history.jsonl")
+    project_name = project_path.replace('/', '-')
+    sessions_dir = os.path.expanduser(f"~/.claude/projects/{project_name}/")
+
+    if not os.path.exists(sessions_dir):
+        print(f"Error: Sessions directory not found: {sessions_dir}")
+        sys.exit(1)
+
+    since, until, min_messages = options['since'], options['until'], options['min_messages']
+    filtered = since is not None or until is not None or min_messages > 0
+
+    scores = {}
+    if options['rank']:
+        with PROFILER.stage('history_scan', os.path.getsize(history_file) if os.path.exists(history_file) else 0):
+            sessions_meta = read_history(history_file, project_path)
+        candidates = None
+        if filtered:
+            candidates, pruned = prune_sessions(sessions_meta, sessions_dir, since, until, min_messages)
+            report_pruning(len(sessions_meta), pruned)
+        with PROFILER.stage('bm25_rank'):
+            scores = dict(rank_sessions(project_path, sessions_dir, sessions_meta, keywords,
+                                        options['top'], options['min_score'], candidates))
+        matching_session_ids = set(scores)
+        print(f"Found {len(matching_session_ids)} matching sessions (BM25 ranked)")
+    else:
+        # Ask the session daemon if it is running, otherwise scan history and transcripts
+        with PROFILER.stage('daemon_query'):
+            reply = daemon_query({'op': 'match', 'project': project_path, 'keywords': keywords})
+
+        if reply is not None:
+            sessions_meta = reply['sessions_meta']
+            matching_session_ids = set(reply['matching'])
+            if filtered:
+                candidates, pruned = prune_sessions(sessions_meta, sessions_dir, since, until, min_messages)
+                report_pruning(len(sessions_meta), pruned)
+                matching_session_ids &= candidates
+        else:
+            with PROFILER.stage('history_scan', os.path.getsize(history_file) if os.path.exists(history_file) else 0):
+                sessions_meta = read_history(history_file, project_path)
+            search_meta = sessions_meta
+            if filtered:
+                candidates, pruned = prune_sessions(sessions_meta, sessions_dir, since, until, min_messages)
+                report_pruning(len(sessions_meta), pruned)
+                search_meta = {sid: sessions_meta[sid] for sid in candidates}
+            matching_session_ids = find_matching_sessions(search_meta, sessions_dir, keywords)
+        print(f"Found {len(matching_session_ids)} matching sessions")
+
+    # Load full conversations, sorted by relevance when ranked, otherwise by timestamp
+    with PROFILER.stage('load_conversations'):
+        conversations = load_conversations(matching_session_ids, sessions_dir)
+    if filtered:
+        # Exact checks on the transcripts that survived pushdown and matching
+        loaded = len(conversations)
+        conversations = {
+            sid: messages for sid, messages in conversations.items()
+            if len(user_prompts(messages)) >= min_messages and in_window(messages, since, until)
+        }
+        print(f"Pruned {loaded - len(conversations)} of {loaded} loaded sessions by transcript contents")
+    if scores:
+        sorted_sessions = sorted(conversations.items(), key=lambda x: scores[x[0]], reverse=True)
+    else:
+        sorted_sessions = sorted(
+            conversations.items(),
+            key=lambda x: sessions_meta.get(x[0], {}).get('timestamp', 0)
+        )
+
+    # Totals come from the activity cube, which only re-reads sessions that grew
+    with PROFILER.stage('activity_rollup'):
+        activity = open_cube([project_path], set(conversations)).session_totals(project_path, conversations)
+
+    with PROFILER.stage('render_html') as span:
+        html_content, toc_data, total_queries = render_html(sorted_sessions, sessions_meta, keywords, activity)
+        span['bytes'] = len(html_content)
+
+    # Make output path absolute if relative
+    if not os.path.isabs(output_file):
+        output_file = os.path.abspath(output_file)
+
+    # Write HTML file
+    with PROFILER.stage('write_output', len(html_content)):
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+
+    print(f"\n✓ Session export created: {output_file}")
+    print(f"✓ Extracted {len(sorted_sessions)} sessions")
+    print(f"✓ Total queries: {total_queries}")
+    print(f"✓ Total messages: {activity['messages']}")
+    print("\nSession Overview:")
+    for idx, sid, first_msg, date_str, queries in toc_data:
+        score = f" score {scores[sid]:.2f}" if scores else ''
+        print(f"  {idx}. [{date_str}] {first_msg[:70]}... ({len(queries)} queries{score})")
+
+    PROFILER.finish()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,83 +3,77 @@
 Extract structured data from Claude Code session JSONL files.
 
 Usage:
-    python3 extract_session_data.py <session-file> [session-file...]
+    python3 extract_session_data.py <session-file> [session-file...] [--fields f1,f2,...] [--max-text N]
+                                    [--ndjson] [--profile] [--profile-trace <trace.json>]
 
 Output:
     JSON object with session metadata, user messages, files modified, and commits
+
+Fields: duration, start_time, end_time, total_messages, user_messages, files, commits,
+tool_usage, agents, session_files. --fields keeps only the listed ones and skips the
+work the others need (sub-agent transcripts are only read for agents, files, commits
+and tool_usage). --max-text N cuts user message texts and agent prompts to N
+characters.
+
+--ndjson streams one compact JSON record per line as it is produced instead of
+building the whole object: {"record": "user_message", ...} and {"record": "commit",
+...} while the transcripts are read, {"record": "agent", ...} per sub-agent, and a
+final {"record": "summary", ...} with the remaining requested fields.
+
+Sub-agent transcripts of the sessions (<session-id>/subagents/agent-*.jsonl, or
+agent-*.jsonl next to the session carrying its session id) are parsed as well, in
+parallel when there is enough to parse. Each is linked to the Task tool call that spawned
+it and reported under "agents" with its duration, tool usage and token usage; its
+files and commits are included in the session totals.
 """
 
 import json
+import os
 import sys
-from datetime import datetime, timedelta
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Any
-
-
-def parse_timestamp(ts_str: str) -> datetime:
-    """Parse ISO timestamp string to datetime object."""
-    if not ts_str:
-        return None
-    return datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
-
-
-def extract_text_from_content(content: Any) -> str:
-    """Extract text from message content (handles both array and string formats)."""
-    if isinstance(content, str):
-        return content
-
-    if isinstance(content, list):
-        for item in content:
-            if isinstance(item, dict) and item.get('type') == 'text':
-                return item.get('text', '')
-
-    return ''
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 
+from profiler import PROFILER, parse_profile_args
+from session_archive import archived_members, open_session, session_exists, session_stat
+from session_daemon import query as daemon_query
+from session_model import Entry, clean_text, iter_entries, parse_entry, parse_timestamp
 
-def is_system_message(text: str) -> bool:
-    """Check if message is a system command or reminder."""
-    if not text:
-        return True
 
-    # Skip slash commands
-    if text.startswith('/'):
-        return True
+# Message kinds reported as user messages; continuations are kept so that
+# context compressions can be spotted in the output
+USER_MESSAGE_KINDS = frozenset({'prompt', 'continuation'})
 
-    # Skip command infrastructure messages
-    if text.startswith('<command-') or text.startswith('<local-command-'):
-        return True
+# Tool calls that spawn a sub-agent
+AGENT_TOOLS = frozenset({'Task', 'Agent'})
+TOKEN_FIELDS = ('input_tokens', 'output_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens')
 
-    # Skip caveats
-    if text.startswith('Caveat:'):
-        return True
+FIELDS = ('duration', 'start_time', 'end_time', 'total_messages', 'user_messages', 'files', 'commits',
+          'tool_usage', 'agents', 'session_files')
+# Fields that include the work of sub-agents
+AGENT_FIELDS = frozenset({'files', 'commits', 'tool_usage', 'agents'})
 
-    # Skip system reminders (though these should be in separate blocks)
-    if '<system-reminder>' in text:
-        return True
+# Below this many bytes of sub-agent transcripts, worker start-up and pickling cost more
+# than they save (parsing runs at roughly 60 MB/s; a pool costs ~20 ms before any work)
+PARALLEL_AGENT_BYTES = 32 * 1024 * 1024
 
-    return False
+# sessions_dir -> {'mtime': ns, 'owners': {agent file name: session id}}
+_agent_owners_cache: Dict[str, Dict[str, Any]] = {}
+_agent_owners_lock = threading.Lock()
 
 
-def calculate_duration(entries: List[Dict], user_messages: List[Dict]) -> Dict[str, Any]:
+def calculate_duration(start_timestamp: Optional[str], end_timestamp: Optional[str]) -> Dict[str, Any]:
     """
-    Calculate session duration excluding breaks.
+    Calculate session duration from the first user message to the last entry.
 
     Returns dict with duration string and timestamps.
     """
-    if not user_messages:
+    if not start_timestamp:
         return {'duration': '0h 0m', 'start': None, 'end': None}
 
-    start = parse_timestamp(user_messages[0]['timestamp'])
-
-    # Find last entry timestamp (any type, not just user messages)
-    end = None
-    for entry in reversed(entries):
-        if entry.get('timestamp'):
-            end = parse_timestamp(entry['timestamp'])
-            break
-
-    if not end:
-        end = parse_timestamp(user_messages[-1]['timestamp'])
+    start = parse_timestamp(start_timestamp)
+    end = parse_timestamp(end_timestamp)
 
     # Calculate total duration
     total_duration = end - start
@@ -91,35 +85,34 @@ def calculate_duration(entries: List[Dict], user_messages: List[Dict]) -> Dict[s
 
     return {
         'duration': f'{hours}h {minutes}m',
-        'start': user_messages[0]['timestamp'],
+        'start': start_timestamp,
         'end': end.isoformat(),
         'total_seconds': int(total_duration.total_seconds())
     }
 
 
-def extract_files_from_tools(entries: List[Dict]) -> Dict[str, List[str]]:
+def iter_tool_calls(entries: List[Entry]):
+    """Yield (entry, tool_call) for every tool call in assistant messages."""
+    for entry in entries:
+        if entry.type == 'assistant' and entry.message.tool_calls:
+            for call in entry.message.tool_calls:
+                yield entry, call
+
+
+def extract_files_from_tools(entries: List[Entry]) -> Dict[str, List[str]]:
     """Extract files modified/created from tool calls."""
     files_modified = set()
     files_created = set()
 
-    for entry in entries:
-        # Check for tool_use in assistant messages
-        if entry.get('type') == 'assistant':
-            content = entry.get('message', {}).get('content', [])
-            if isinstance(content, list):
-                for item in content:
-                    if isinstance(item, dict) and item.get('type') == 'tool_use':
-                        tool_name = item.get('name')
-                        params = item.get('input', {})
-
-                        if tool_name == 'Edit':
-                            fp = params.get('file_path')
-                            if fp:
-                                files_modified.add(fp)
-                        elif tool_name == 'Write':
-                            fp = params.get('file_path')
-                            if fp:
-                                files_created.add(fp)
+    for _, call in iter_tool_calls(entries):
+        if call.name == 'Edit':
+            fp = call.input.get('file_path')
+            if fp:
+                files_modified.add(fp)
+        elif call.name == 'Write':
+            fp = call.input.get('file_path')
+            if fp:
+                files_created.add(fp)
 
     return {
         'modified': sorted(files_modified),
@@ -127,111 +120,380 @@ def extract_files_from_tools(entries: List[Dict]) -> Dict[str, List[str]]:
     }
 
 
-def extract_commits(entries: List[Dict]) -> List[Dict[str, str]]:
+def extract_commits(entries: List[Entry]) -> List[Dict[str, str]]:
     """Extract git commits from bash commands."""
     commits = []
 
-    for entry in entries:
-        if entry.get('type') == 'assistant':
-            content = entry.get('message', {}).get('content', [])
-            if isinstance(content, list):
-                for item in content:
-                    if isinstance(item, dict) and item.get('type') == 'tool_use':
-                        if item.get('name') == 'Bash':
-                            cmd = item.get('input', {}).get('command', '')
-                            if 'git commit' in cmd:
-                                commits.append({
-                                    'command': cmd[:200],  # Truncate long commands
-                                    'timestamp': entry.get('timestamp')
-                                })
+    for entry, call in iter_tool_calls(entries):
+        if call.name == 'Bash':
+            cmd = call.input.get('command', '')
+            if 'git commit' in cmd:
+                commits.append({
+                    'command': cmd[:200],  # Truncate long commands
+                    'timestamp': entry.timestamp
+                })
 
     return commits
 
 
-def extract_session_data(session_files: List[str]) -> Dict[str, Any]:
-    """
-    Extract structured data from one or more session files.
+def _agent_owner(path: str) -> Optional[str]:
+    """Session id on the first line of an agent transcript; None while that line is incomplete."""
+    with open_session(path) as f:
+        first = f.readline()
+    try:
+        owner = json.loads(first).get('sessionId')
+    except (json.JSONDecodeError, AttributeError):
+        owner = None
+    if owner is None and first.endswith('\n'):
+        return ''
+    return owner
 
-    Args:
-        session_files: List of paths to JSONL session files
 
-    Returns:
-        Dictionary with session data
+def agent_owners(sessions_dir: str) -> Dict[str, str]:
     """
-    all_entries = []
-
-    # Load all session files
-    for session_file in session_files:
-        path = Path(session_file)
-        if not path.exists():
-            print(f"Warning: {session_file} not found", file=sys.stderr)
-            continue
-
-        with open(path, 'r') as f:
-            for line in f:
-                try:
-                    entry = json.loads(line)
-                    all_entries.append(entry)
-                except json.JSONDecodeError:
-                    continue
-
-    # Extract user messages
-    user_messages = []
-    for entry in all_entries:
-        if entry.get('type') == 'user':
-            content = entry.get('message', {}).get('content')
-            text = extract_text_from_content(content)
-
-            if text and not is_system_message(text):
-                user_messages.append({
-                    'timestamp': entry.get('timestamp'),
-                    'text': text,
-                    'number': len(user_messages) + 1
-                })
-
-    # Calculate duration
-    duration_info = calculate_duration(all_entries, user_messages)
-
-    # Extract files
-    files = extract_files_from_tools(all_entries)
+    Owning session id of every agent-*.jsonl next to the sessions (live or archived).
 
-    # Extract commits
-    commits = extract_commits(all_entries)
+    Built once per directory and reused until the directory's mtime changes (agents
+    added, removed or packed); only transcripts whose first line was still being
+    written are read again.
+    """
+    sessions_dir = os.path.normpath(sessions_dir)
+    try:
+        mtime = os.stat(sessions_dir).st_mtime_ns
+    except OSError:
+        return {}
+
+    with _agent_owners_lock:
+        cached = _agent_owners_cache.get(sessions_dir)
+        if cached is None or cached['mtime'] != mtime:
+            names = set(os.listdir(sessions_dir)) | set(archived_members(sessions_dir))
+            previous = cached['owners'] if cached else {}
+            owners = {name: previous.get(name) for name in names
+                      if name.startswith('agent-') and name.endswith('.jsonl')}
+            cached = _agent_owners_cache[sessions_dir] = {'mtime': mtime, 'owners': owners}
+
+        owners = cached['owners']
+        for name in [n for n, owner in owners.items() if owner is None]:
+            try:
+                owners[name] = _agent_owner(os.path.join(sessions_dir, name))
+            except OSError:
+                continue
+        return {name: owner for name, owner in owners.items() if owner}
+
+
+def find_agent_files(session_file: str) -> List[str]:
+    """Sub-agent transcripts spawned from a session."""
+    session_id = Path(session_file).stem
+    sessions_dir = os.path.dirname(os.path.abspath(session_file))
+
+    nested = os.path.join(sessions_dir, session_id, 'subagents')
+    found = []
+    if os.path.isdir(nested):
+        found = [os.path.join(nested, n) for n in sorted(os.listdir(nested))
+                 if n.startswith('agent-') and n.endswith('.jsonl')]
+
+    # Older layout: agent-*.jsonl next to the sessions, identified by their session id;
+    # session_archive.py packs these along with the sessions
+    owners = agent_owners(sessions_dir)
+    found.extend(os.path.join(sessions_dir, name) for name in sorted(owners) if owners[name] == session_id)
+    return found
+
+
+def parse_agent_file(path: str) -> Dict[str, Any]:
+    """Summary of one sub-agent transcript: timing, tools, tokens, files and commits."""
+    entries = []
+    tokens = dict.fromkeys(TOKEN_FIELDS, 0)
+    counted = set()
+    agent_id = None
+    with open_session(path) as f:
+        for line in f:
+            if not line or line.isspace():
+                continue
+            try:
+                raw = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(raw, dict):
+                continue
+            agent_id = agent_id or raw.get('agentId')
+            entries.append(parse_entry(raw))
+            payload = raw.get('message')
+            usage = payload.get('usage') if isinstance(payload, dict) else None
+            if isinstance(usage, dict):
+                # Streamed responses repeat the usage of one message on every content line
+                message_id = payload.get('id') or raw.get('uuid')
+                if message_id not in counted:
+                    counted.add(message_id)
+                    for field in TOKEN_FIELDS:
+                        tokens[field] += usage.get(field) or 0
+
+    timestamps = [e.timestamp for e in entries if e.timestamp]
+    start = parse_timestamp(timestamps[0]) if timestamps else None
+    end = parse_timestamp(timestamps[-1]) if timestamps else None
+    prompt = next((e.message.text for e in entries if e.type == 'user' and e.message.kind == 'prompt'), '')
 
-    # Count tool usage
     tool_usage = {}
-    for entry in all_entries:
-        if entry.get('type') == 'assistant':
-            content = entry.get('message', {}).get('content', [])
-            if isinstance(content, list):
-                for item in content:
-                    if isinstance(item, dict) and item.get('type') == 'tool_use':
-                        tool_name = item.get('name')
-                        tool_usage[tool_name] = tool_usage.get(tool_name, 0) + 1
+    for _, call in iter_tool_calls(entries):
+        tool_usage[call.name] = tool_usage.get(call.name, 0) + 1
 
     return {
+        'agent_id': agent_id or Path(path).stem[len('agent-'):],
+        'file': Path(path).name,
+        'prompt': prompt,
+        'start_time': timestamps[0] if timestamps else None,
+        'end_time': timestamps[-1] if timestamps else None,
+        'duration_seconds': int((end - start).total_seconds()) if start and end else 0,
+        'tool_usage': tool_usage,
+        'tokens': tokens,
+        'files': extract_files_from_tools(entries),
+        'commits': extract_commits(entries),
+    }
+
+
+def parse_agent_files(paths: List[str]) -> List[Dict[str, Any]]:
+    """
+    Parse sub-agent transcripts, across worker processes when there is enough to parse.
+
+    Stays in-process on a single CPU, while profiling (worker stages would be lost)
+    and outside the main thread (e.g. in a session daemon handler, where forking a
+    multithreaded process is unsafe).
+    """
+    workers = min(len(paths), os.cpu_count() or 1)
+    if (workers < 2 or PROFILER.enabled or threading.current_thread() is not threading.main_thread()
+            or sum((session_stat(p) or {'size': 0})['size'] for p in paths) < PARALLEL_AGENT_BYTES):
+        agents = []
+        for path in paths:
+            with PROFILER.stage('parse_agent'):
+                agents.append(parse_agent_file(path))
+        return agents
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse_agent_file, paths))
+
+
+def link_agents(agents: List[Dict[str, Any]], calls: List[Tuple[Entry, Any]]):
+    """
+    Attach each agent to the Task tool call (entry, call) that spawned it.
+
+    An agent's first prompt is the Task prompt; agents whose prompt matches no call
+    fall back to the latest unclaimed call issued before they started.
+    """
+    claimed = set()
+
+    def claim(agent: Dict[str, Any], entry: Entry, call):
+        claimed.add(call.id)
+        agent.update({
+            'parent_tool_use_id': call.id,
+            'parent_timestamp': entry.timestamp,
+            'subagent_type': call.input.get('subagent_type'),
+            'description': call.input.get('description'),
+        })
+
+    unmatched = []
+    for agent in agents:
+        match = next(((e, c) for e, c in calls if c.id not in claimed
+                      and clean_text(c.input.get('prompt') or '') == agent['prompt']), None)
+        if match:
+            claim(agent, *match)
+        else:
+            unmatched.append(agent)
+
+    for agent in unmatched:
+        start = parse_timestamp(agent['start_time']) if agent['start_time'] else None
+        earlier = [(e, c) for e, c in calls if c.id not in claimed and start and e.timestamp
+                   and parse_timestamp(e.timestamp) <= start]
+        if earlier:
+            claim(agent, *earlier[-1])
+        else:
+            agent.update({'parent_tool_use_id': None, 'parent_timestamp': None,
+                          'subagent_type': None, 'description': None})
+
+
+def iter_records(session_files: List[str], fields: Optional[List[str]] = None,
+                 max_text: int = 0) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Stream the extraction results as (kind, record) pairs.
+
+    User messages and commits are yielded while the transcripts are read, then one
+    'agent' record per sub-agent transcript, then a 'summary' with the other
+    requested fields. Nothing is kept that the requested fields do not need.
+    """
+    wanted = set(fields or FIELDS)
+    first_timestamp = last_timestamp = None
+    number = 0
+    modified, created = set(), set()
+    tool_usage = {}
+    agent_calls = []
+
+    with PROFILER.stage('load_sessions'):
+        for path in session_files:
+            if not session_exists(path):
+                print(f"Warning: {path} not found", file=sys.stderr)
+                continue
+            for entry in iter_entries(path):
+                if entry.timestamp:
+                    last_timestamp = entry.timestamp
+                if entry.type == 'user' and entry.message.kind in USER_MESSAGE_KINDS:
+                    number += 1
+                    if number == 1:
+                        first_timestamp = entry.timestamp
+                    if 'user_messages' in wanted:
+                        text = entry.message.text
+                        yield 'user_message', {
+                            'timestamp': entry.timestamp,
+                            'text': text[:max_text] if max_text else text,
+                            'number': number
+                        }
+                elif entry.type == 'assistant' and entry.message.tool_calls:
+                    for call in entry.message.tool_calls:
+                        tool_usage[call.name] = tool_usage.get(call.name, 0) + 1
+                        if call.name in AGENT_TOOLS:
+                            agent_calls.append((entry, call))
+                    if 'files' in wanted:
+                        files = extract_files_from_tools([entry])
+                        modified.update(files['modified'])
+                        created.update(files['created'])
+                    if 'commits' in wanted:
+                        for commit in extract_commits([entry]):
+                            yield 'commit', commit
+
+    if wanted & AGENT_FIELDS:
+        with PROFILER.stage('load_agents'):
+            with PROFILER.stage('find_agents'):
+                agent_files = [a for f in session_files for a in find_agent_files(f)]
+            agents = parse_agent_files(agent_files)
+            link_agents(agents, agent_calls)
+            agents.sort(key=lambda a: a['duration_seconds'], reverse=True)
+        for agent in agents:
+            modified.update(agent['files']['modified'])
+            created.update(agent['files']['created'])
+            for name, count in agent['tool_usage'].items():
+                tool_usage[name] = tool_usage.get(name, 0) + count
+            if 'commits' in wanted:
+                for commit in agent['commits']:
+                    yield 'commit', dict(commit, agent=agent['subagent_type'] or agent['agent_id'])
+            if 'agents' in wanted:
+                if max_text:
+                    agent['prompt'] = agent['prompt'][:max_text]
+                yield 'agent', agent
+
+    duration_info = calculate_duration(first_timestamp, last_timestamp)
+    summary = {
         'duration': duration_info['duration'],
         'start_time': duration_info['start'],
         'end_time': duration_info['end'],
-        'total_messages': len(user_messages),
-        'user_messages': user_messages,
-        'files': files,
-        'commits': commits,
+        'total_messages': number,
+        'files': {'modified': sorted(modified), 'created': sorted(created)},
         'tool_usage': tool_usage,
-        'session_files': [str(Path(f).name) for f in session_files]
+        'session_files': [str(Path(f).name) for f in session_files],
     }
+    yield 'summary', {name: value for name, value in summary.items() if name in wanted}
+
+
+def project_result(data: Dict[str, Any], fields: Optional[List[str]] = None, max_text: int = 0) -> Dict[str, Any]:
+    """Apply --fields and --max-text to a complete extraction result (e.g. from the daemon)."""
+    if fields:
+        data = {name: data[name] for name in FIELDS if name in fields and name in data}
+    if max_text:
+        if 'user_messages' in data:
+            data['user_messages'] = [dict(m, text=m['text'][:max_text]) for m in data['user_messages']]
+        if 'agents' in data:
+            data['agents'] = [dict(a, prompt=a['prompt'][:max_text]) for a in data['agents']]
+    return data
+
+
+def extract_session_data(session_files: List[str], fields: Optional[List[str]] = None,
+                         max_text: int = 0) -> Dict[str, Any]:
+    """
+    Extract structured data from one or more session files.
+
+    Args:
+        session_files: List of paths to JSONL session files
+        fields: Only these output fields (default: all)
+        max_text: Cut user message texts and agent prompts to this length (0 = no limit)
+
+    Returns:
+        Dictionary with session data
+    """
+    collected = {'user_message': [], 'commit': [], 'agent': []}
+    summary = {}
+    for kind, record in iter_records(session_files, fields, max_text):
+        if kind == 'summary':
+            summary = record
+        else:
+            collected[kind].append(record)
+    collected['commit'].sort(key=lambda c: c['timestamp'] or '')
+
+    data = dict(summary, user_messages=collected['user_message'], commits=collected['commit'],
+                agents=collected['agent'])
+    return {name: data[name] for name in FIELDS if not fields or name in fields}
+
+
+def write_ndjson(session_files: List[str], fields: Optional[List[str]], max_text: int, out=sys.stdout) -> int:
+    """Write each record as one compact JSON line as soon as it is produced; returns bytes written."""
+    written = 0
+    for kind, record in iter_records(session_files, fields, max_text):
+        line = json.dumps({'record': kind, **record}, separators=(',', ':')) + '\n'
+        out.write(line)
+        written += len(line)
+    return written
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python3 extract_session_data.py <session-file> [session-file...]", file=sys.stderr)
+    args = parse_profile_args(sys.argv[1:])
+    session_files = []
+    fields = None
+    max_text = 0
+    ndjson = False
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--fields' and i + 1 < len(args):
+            fields = [f.strip() for f in args[i + 1].split(',') if f.strip()]
+            unknown = [f for f in fields if f not in FIELDS]
+            if unknown:
+                print(f"Unknown field(s): {', '.join(unknown)} (choose from {', '.join(FIELDS)})", file=sys.stderr)
+                sys.exit(1)
+            i += 2
+        elif args[i] == '--max-text' and i + 1 < len(args) and args[i + 1].isdigit():
+            max_text = int(args[i + 1])
+            i += 2
+        elif args[i] == '--ndjson':
+            ndjson = True
+            i += 1
+        elif args[i].startswith('--'):
+            print(__doc__, file=sys.stderr)
+            sys.exit(1)
+        else:
+            session_files.append(args[i])
+            i += 1
+
+    if not session_files:
+        print(__doc__, file=sys.stderr)
         sys.exit(1)
 
-    session_files = sys.argv[1:]
-    data = extract_session_data(session_files)
+    if ndjson:
+        # Streaming always runs locally: the point is never to hold the whole result
+        with PROFILER.stage('write_output') as span:
+            span['bytes'] = write_ndjson(session_files, fields, max_text)
+        PROFILER.finish()
+        return
+
+    # The session daemon caches results until the files change; profiling always runs locally
+    reply = None
+    if not PROFILER.enabled:
+        reply = daemon_query({'op': 'extract', 'files': [os.path.abspath(f) for f in session_files]})
+    if reply is not None:
+        data = project_result(reply['result'], fields, max_text)
+    else:
+        data = extract_session_data(session_files, fields, max_text)
 
     # Output JSON
-    print(json.dumps(data, indent=2))
+    with PROFILER.stage('write_output') as span:
+        output = json.dumps(data, indent=2)
+        span['bytes'] = len(output)
+        print(output)
+
+    PROFILER.finish()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Extract the facts of a handover document (/create-handover) from session transcripts.
+
+Streams the transcripts of the current logical session (or the given files), and
+their sub-agent transcripts, once and collects from the tool calls inside a time
+window:
+
+    files       created (Write), modified (Edit, MultiEdit, NotebookEdit) and
+                referenced (Read only) paths
+    atlassian   Confluence pages, Jira issues and spaces touched by MCP Atlassian
+                calls, with the tools used and titles, plus CQL/JQL searches
+    urls        URLs in Bash commands and WebFetch calls, and the GitHub repositories
+                among them (also from `gh --repo` and `git clone`)
+    commits     git commit messages
+
+The result is a Markdown skeleton in the layout of the handover document, with the
+collected facts filled in and placeholders for the parts that need judgement, or
+the raw facts with --json.
+
+Window (default: the whole logical session):
+    --hours N          the last N hours
+    --since <time>     since an ISO timestamp
+    --since-message N  since the Nth user prompt of the session (1-based)
+    --since-text <s>   since the last user prompt containing <s>
+
+Usage:
+    python3 handover_extract.py [session-file...] [--project <project_path>] [window] [--topic <text>] [--json]
+
+Example:
+    python3 handover_extract.py --hours 3 --topic "SRS conversion"
+    python3 handover_extract.py --since-text "critique review is done" --json
+"""
+
+import json
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from extract_session_data import find_agent_files
+from session_index import current_session, open_index
+from session_model import Entry, iter_entries, parse_timestamp
+
+
+CONVERSATION_TYPES = frozenset({'user', 'assistant'})
+CREATE_TOOLS = frozenset({'Write'})
+MODIFY_TOOLS = frozenset({'Edit', 'MultiEdit', 'NotebookEdit'})
+READ_TOOLS = frozenset({'Read'})
+URL_TOOLS = frozenset({'Bash', 'WebFetch'})
+
+# MCP Atlassian input keys naming a resource, and the kind of resource they name:
+# snake_case for mcp-atlassian (the server in mcp-servers.json), camelCase for the
+# hosted Atlassian MCP server
+ATLASSIAN_KEYS = (
+    ('page_id', 'confluence-page'),
+    ('pageId', 'confluence-page'),
+    ('issue_key', 'jira-issue'),
+    ('issueIdOrKey', 'jira-issue'),
+    ('issueKey', 'jira-issue'),
+    ('inward_issue_key', 'jira-issue'),
+    ('outward_issue_key', 'jira-issue'),
+    ('epic_key', 'jira-issue'),
+    ('space_key', 'confluence-space'),
+    ('spaceId', 'confluence-space'),
+    ('spaceKey', 'confluence-space'),
+    ('project_key', 'jira-project'),
+    ('projectKey', 'jira-project'),
+)
+ATLASSIAN_QUERY_KEYS = ('cql', 'jql')
+# mcp-atlassian's confluence_search takes its CQL as `query`
+CQL_QUERY_TOOLS = frozenset({'confluence_search'})
+ATLASSIAN_TITLE_KEYS = ('title', 'summary')
+
+URL_PATTERN = re.compile(r'https?://[^\s\'"<>)\]}`]+')
+GITHUB_PATTERN = re.compile(r'github\.com[/:]([\w.-]+)/([\w.-]+?)(?:\.git)?(?:[/#?]|$)')
+GH_REPO_PATTERN = re.compile(r'\bgh\b.*?(?:-R|--repo)[ =]([\w.-]+/[\w.-]+)')
+COMMIT_MESSAGE_PATTERN = re.compile(r'git commit[^\n]*?-m\s+(?:"([^"]*)"|\'([^\']*)\')')
+HEREDOC_PATTERN = re.compile(r'^\$\(cat <<-?[\'"]?\w+[\'"]?\s*\n')
+
+# Reference lists are capped to keep the skeleton within the handover token budget
+MAX_REFERENCED = 15
+MAX_URLS = 20
+
+
+def tool_paths(tool_input: Dict[str, Any]) -> List[str]:
+    path = tool_input.get('file_path') or tool_input.get('notebook_path')
+    return [path] if isinstance(path, str) and path else []
+
+
+def strip_url(url: str) -> str:
+    return url.rstrip('.,;:!?\'"')
+
+
+def commit_subject(command: str) -> str:
+    """First line of the -m message of a git commit command (also for heredoc messages)."""
+    match = COMMIT_MESSAGE_PATTERN.search(command)
+    if not match:
+        return ''
+    message = HEREDOC_PATTERN.sub('', match.group(1) if match.group(1) is not None else match.group(2))
+    return message.strip().split('\n', 1)[0][:200]
+
+
+class HandoverFacts:
+    """Facts collected from the tool calls inside the window."""
+
+    def __init__(self):
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.atlassian: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.searches: List[Dict[str, str]] = []
+        self.urls: Dict[str, int] = {}
+        self.repos: Dict[str, int] = {}
+        self.commits: List[Dict[str, str]] = []
+        self.prompts = 0
+        self.first_prompt: Optional[str] = None
+        self.start: Optional[str] = None
+        self.end: Optional[str] = None
+
+    def add_entry(self, entry: Entry, agent: bool = False):
+        message = entry.message
+        if entry.timestamp:
+            if self.start is None or entry.timestamp < self.start:
+                self.start = entry.timestamp
+            if self.end is None or entry.timestamp > self.end:
+                self.end = entry.timestamp
+        if not agent and message.role == 'user' and message.is_prompt:
+            self.prompts += 1
+            if self.first_prompt is None:
+                self.first_prompt = message.text[:200]
+        for call in message.tool_calls:
+            self.add_call(call.name, call.input, entry.timestamp)
+
+    def add_call(self, name: str, tool_input: Dict[str, Any], timestamp: Optional[str]):
+        if name in CREATE_TOOLS or name in MODIFY_TOOLS or name in READ_TOOLS:
+            for path in tool_paths(tool_input):
+                record = self.files.setdefault(path, {'created': False, 'modified': 0, 'read': 0})
+                if name in CREATE_TOOLS:
+                    record['created'] = True
+                elif name in MODIFY_TOOLS:
+                    record['modified'] += 1
+                else:
+                    record['read'] += 1
+
+        elif name.startswith('mcp__') and 'atlassian' in name.lower():
+            self.add_atlassian(name.rsplit('__', 1)[-1], tool_input)
+
+        if name in URL_TOOLS:
+            text = tool_input.get('command') or tool_input.get('url') or ''
+            if not isinstance(text, str):
+                return
+            for url in URL_PATTERN.findall(text):
+                url = strip_url(url)
+                self.urls[url] = self.urls.get(url, 0) + 1
+                match = GITHUB_PATTERN.search(url)
+                if match:
+                    self.add_repo(f'{match.group(1)}/{match.group(2)}')
+            if name == 'Bash':
+                for repo in GH_REPO_PATTERN.findall(text):
+                    self.add_repo(repo)
+                if 'git commit' in text:
+                    self.commits.append({'message': commit_subject(text), 'timestamp': timestamp})
+
+    def add_repo(self, repo: str):
+        self.repos[repo] = self.repos.get(repo, 0) + 1
+
+    def add_atlassian(self, tool: str, tool_input: Dict[str, Any]):
+        for key, kind in ATLASSIAN_KEYS:
+            value = tool_input.get(key)
+            if value in (None, ''):
+                continue
+            record = self.atlassian.setdefault((kind, str(value)), {'tools': [], 'title': None, 'calls': 0})
+            record['calls'] += 1
+            if tool not in record['tools']:
+                record['tools'].append(tool)
+            title = next((tool_input[k] for k in ATLASSIAN_TITLE_KEYS if tool_input.get(k)), None)
+            if title:
+                record['title'] = str(title)[:120]
+            # A page id identifies the resource; its space is context only
+            if kind == 'confluence-page':
+                break
+        for key in ATLASSIAN_QUERY_KEYS:
+            if tool_input.get(key):
+                self.searches.append({'tool': tool, key: str(tool_input[key])[:200]})
+        if tool in CQL_QUERY_TOOLS and tool_input.get('query'):
+            self.searches.append({'tool': tool, 'cql': str(tool_input['query'])[:200]})
+
+    def to_dict(self) -> Dict[str, Any]:
+        created = sorted(p for p, r in self.files.items() if r['created'])
+        modified = sorted(p for p, r in self.files.items() if r['modified'] and not r['created'])
+        referenced = sorted((p for p, r in self.files.items() if r['read'] and not r['created'] and not r['modified']),
+                            key=lambda p: (-self.files[p]['read'], p))
+        return {
+            'window': {'start': self.start, 'end': self.end, 'prompts': self.prompts,
+                       'first_prompt': self.first_prompt},
+            'files': {
+                'created': created,
+                'modified': modified,
+                'referenced': referenced[:MAX_REFERENCED],
+                'referenced_total': len(referenced),
+            },
+            'atlassian': [
+                {'type': kind, 'id': value, **record}
+                for (kind, value), record in sorted(self.atlassian.items())
+            ],
+            'searches': self.searches,
+            'repos': sorted(self.repos, key=lambda r: (-self.repos[r], r)),
+            'urls': sorted(self.urls, key=lambda u: (-self.urls[u], u))[:MAX_URLS],
+            'commits': self.commits,
+        }
+
+
+def iter_window(entries: Iterator[Entry], since: Optional[datetime], since_message: Optional[int],
+                since_text: Optional[str], state: Dict[str, Any]) -> Iterator[Optional[Entry]]:
+    """
+    Entries inside the window.
+
+    A prompt-based start (--since-message, --since-text) cannot be known before the
+    prompt is read, so the window (re)opens at each matching prompt and None is
+    yielded to drop what was collected before it. `state` carries the prompt count
+    and whether the window is open across session files.
+    """
+    for entry in entries:
+        message = entry.message
+        if message is None:
+            continue
+        if since is not None:
+            ts = parse_timestamp(entry.timestamp) if entry.timestamp else None
+            if ts is None or ts < since:
+                continue
+        if message.role == 'user' and message.is_prompt:
+            state['prompt'] += 1
+            if since_message is not None and state['prompt'] == since_message:
+                state['open'] = True
+                yield None
+            elif since_text is not None and since_text.lower() in message.text.lower():
+                state['open'] = True
+                yield None
+        if state['open']:
+            yield entry
+
+
+def extract_handover(session_files: List[str], since: Optional[datetime] = None,
+                     since_message: Optional[int] = None, since_text: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Handover facts of the session files (and their sub-agents) inside the window.
+
+    Sub-agent transcripts count towards the window by timestamp: with a prompt-based
+    start, only agent entries at or after the window's first entry are kept.
+    """
+    facts = HandoverFacts()
+    state = {'prompt': 0, 'open': since_message is None and since_text is None}
+    agent_files = []
+    for path in session_files:
+        for entry in iter_window(iter_entries(path, CONVERSATION_TYPES), since, since_message, since_text, state):
+            if entry is None:
+                facts = HandoverFacts()
+            else:
+                facts.add_entry(entry)
+        agent_files.extend(find_agent_files(path))
+
+    if facts.start is not None:
+        window_start = parse_timestamp(facts.start)
+        for path in agent_files:
+            for entry in iter_entries(path, CONVERSATION_TYPES):
+                ts = parse_timestamp(entry.timestamp) if entry.timestamp else None
+                if entry.message is not None and ts is not None and ts >= window_start:
+                    facts.add_entry(entry, agent=True)
+
+    result = facts.to_dict()
+    result['session_files'] = session_files
+    result['agent_files'] = len(agent_files)
+    return result
+
+
+def render_skeleton(facts: Dict[str, Any], topic: str) -> str:
+    """The handover document layout with the collected facts filled in."""
+    window = facts['window']
+    files = facts['files']
+    date = (window['end'] or datetime.now(timezone.utc).isoformat())[:10]
+    lines = [
+        f"# {topic or '<Task/Topic>'} - Session Handover",
+        '',
+        f"**Date**: {date}",
+        '**Task**: <Brief description>',
+        f"**Window**: {window['start'] or '-'} → {window['end'] or '-'} ({window['prompts']} prompts)",
+        '',
+        '---',
+        '',
+        '## Documents and Locations',
+        '',
+        '### Input Documents',
+    ]
+    lines += [f"- `{p}`" for p in files['referenced']] or ['- (none read)']
+    if files['referenced_total'] > len(files['referenced']):
+        lines.append(f"- ... {files['referenced_total'] - len(files['referenced'])} more read")
+
+    lines += ['', '### External Resources Used']
+    for resource in facts['atlassian']:
+        title = f" - {resource['title']}" if resource['title'] else ''
+        lines.append(f"- **{resource['type']}** {resource['id']}{title} ({', '.join(resource['tools'])})")
+    for search in facts['searches']:
+        query = search.get('cql') or search.get('jql')
+        lines.append(f"- **search** `{query}` ({search['tool']})")
+    lines += [f"- **github** {repo}" for repo in facts['repos']]
+    repo_urls = [u for u in facts['urls'] if not GITHUB_PATTERN.search(u)]
+    lines += [f"- {url}" for url in repo_urls]
+    if not (facts['atlassian'] or facts['searches'] or facts['repos'] or repo_urls):
+        lines.append('- (none)')
+
+    lines += ['', '### Output Documents']
+    lines += [f"- `{p}` (created)" for p in files['created']]
+    lines += [f"- `{p}` (modified)" for p in files['modified']]
+    if not (files['created'] or files['modified']):
+        lines.append('- (none)')
+
+    if facts['commits']:
+        lines += ['', '### Commits']
+        lines += [f"- {c['message'] or '(no message)'}" for c in facts['commits']]
+
+    lines += [
+        '',
+        '---',
+        '',
+        '## Key Context: What Was "Learned"',
+        '',
+        '### 1. <Major Topic Area>',
+        '<Key insights, decisions, or discoveries>',
+        '',
+        '---',
+        '',
+        '## Next Steps (If Continuing This Work)',
+        '',
+        '1. **<Action>**: <Description and rationale>',
+        '',
+        '---',
+        '',
+        '## Critical References for Context Rebuilding',
+        '',
+        '1. Read: `<path>` - <What to focus on>',
+        '',
+        '---',
+        '',
+        f"**Session End**: {window['end'] or '-'}",
+        '**Status**: <complete, in-progress, blocked>',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def main():
+    args = sys.argv[1:]
+    session_files = []
+    project_path = os.getcwd()
+    since = since_message = since_text = None
+    topic = ''
+    as_json = False
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--project' and i + 1 < len(args):
+            project_path = args[i + 1]
+            i += 2
+        elif args[i] == '--hours' and i + 1 < len(args) and args[i + 1].replace('.', '', 1).isdigit():
+            since = datetime.now(timezone.utc) - timedelta(hours=float(args[i + 1]))
+            i += 2
+        elif args[i] == '--since' and i + 1 < len(args):
+            try:
+                since = parse_timestamp(args[i + 1])
+            except ValueError:
+                since = None
+            if since is None:
+                print(f"Error: invalid timestamp: {args[i + 1]}", file=sys.stderr)
+                sys.exit(1)
+            if since.tzinfo is None:
+                since = since.astimezone()
+            i += 2
+        elif args[i] == '--since-message' and i + 1 < len(args) and args[i + 1].isdigit():
+            since_message = int(args[i + 1])
+            i += 2
+        elif args[i] == '--since-text' and i + 1 < len(args):
+            since_text = args[i + 1]
+            i += 2
+        elif args[i] == '--topic' and i + 1 < len(args):
+            topic = args[i + 1]
+            i += 2
+        elif args[i] == '--json':
+            as_json = True
+            i += 1
+        elif not args[i].startswith('--'):
+            session_files.append(args[i])
+            i += 1
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    if not session_files:
+        session = current_session(open_index(project_path))
+        if session is None:
+            print(f"Error: no sessions found for {project_path}", file=sys.stderr)
+            sys.exit(1)
+        session_files = session['files']
+
+    facts = extract_handover(session_files, since, since_message, since_text)
+    if as_json:
+        print(json.dumps(facts, indent=2))
+    else:
+        print(render_skeleton(facts, topic), end='')
+
+
+if __name__ == '__main__':
+    main()
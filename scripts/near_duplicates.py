@@ -0,0 +1,85 @@
+"""
+MinHash signatures and banded LSH for near-duplicate detection.
+
+Shared by rating_memo.py (prompts, character shingles) and context_budget.py
+(markdown sections, word shingles). Standard library only, so importing it pulls
+in nothing else.
+
+Usage in a script:
+    from near_duplicates import LSHIndex, normalize, shingle_signature
+
+    index = LSHIndex()
+    signature = shingle_signature(shingles_of(normalize(text)))
+    match = index.query(signature, 0.8)
+    index.add(key, signature)
+"""
+
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import List, Optional
+
+
+# MinHash configuration: 64 permutations in 16 bands of 4 rows puts the LSH
+# candidate threshold near 0.5; candidates are then checked against the caller's threshold.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MERSENNE_PRIME = (1 << 61) - 1
+
+_rng = random.Random(1)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def normalize(text: str) -> str:
+    """Normalize text so trivially different copies hash the same."""
+    text = text.lower()
+    text = re.sub(r'[^\w\s/]', ' ', text)
+    return ' '.join(text.split())
+
+
+def shingle_signature(shingles) -> List[int]:
+    """MinHash signature of a set of string shingles."""
+    hashed = [zlib.crc32(s.encode('utf-8')) for s in shingles]
+    return [
+        min((a * h + b) % MERSENNE_PRIME for h in hashed)
+        for a, b in PERMUTATIONS
+    ]
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+class LSHIndex:
+    """Banded LSH index mapping signature bands to keys."""
+
+    def __init__(self):
+        self.buckets = defaultdict(list)
+        self.signatures = {}
+
+    def add(self, key: str, signature: List[int]):
+        self.signatures[key] = signature
+        for band in range(BANDS):
+            chunk = tuple(signature[band * ROWS:(band + 1) * ROWS])
+            self.buckets[(band, chunk)].append(key)
+
+    def query(self, signature: List[int], threshold: float) -> Optional[str]:
+        """Return the most similar indexed key at or above threshold, if any."""
+        candidates = set()
+        for band in range(BANDS):
+            chunk = tuple(signature[band * ROWS:(band + 1) * ROWS])
+            candidates.update(self.buckets.get((band, chunk), ()))
+
+        best_key = None
+        best_sim = threshold
+        for key in candidates:
+            sim = similarity(signature, self.signatures[key])
+            if sim >= best_sim:
+                best_key, best_sim = key, sim
+        return best_key
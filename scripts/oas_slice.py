@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Minimal $ref-closure slices of OpenAPI specs.
+
+A spec is parsed once into a cached index (~/.claude/oas-index/) holding its
+components, the $ref graph, the allOf/oneOf/discriminator type hierarchy and the
+operations of every path. Slices are then cut from the cache without touching the
+YAML again: the requested schemas or operations plus every component they reach
+through $ref, written as a standalone OpenAPI document. Discriminator mapping
+entries whose target schema is not part of the slice are dropped, so the slice
+holds no dangling references.
+
+Discriminator mappings are not followed by default: TMF base types map every
+subtype in the spec, which would pull most of it into any slice. Use --subtypes to
+add the subtypes of the requested schemas (and their closures). Examples are left
+out unless --examples is given.
+
+Usage:
+    python3 oas_slice.py resource <spec.yaml> <Schema> [Schema...] [--subtypes] [--examples] [--output <file>]
+    python3 oas_slice.py endpoint <spec.yaml> <path|operationId> [method] [--subtypes] [--examples] [--output <file>]
+    python3 oas_slice.py info <spec.yaml> <Schema>
+    python3 oas_slice.py list <spec.yaml>
+
+Example:
+    python3 oas_slice.py resource TMF621-Trouble_Ticket-v5.0.0.oas.yaml TroubleTicket TroubleTicket_FVO --subtypes
+    python3 oas_slice.py endpoint TMF621-Trouble_Ticket-v5.0.0.oas.yaml /troubleTicket/{id} patch
+"""
+
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, Any, List, Optional, Set
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+CACHE_DIR = os.path.expanduser('~/.claude/oas-index')
+INDEX_VERSION = 1
+HTTP_METHODS = ('get', 'put', 'post', 'delete', 'options', 'head', 'patch', 'trace')
+REF_PREFIX = '#/components/'
+
+
+def iter_refs(node: Any, skip_examples: bool = False):
+    """Yield every local $ref string below a node (discriminator mappings excluded)."""
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, dict):
+            ref = current.get('$ref')
+            if isinstance(ref, str) and ref.startswith(REF_PREFIX):
+                yield ref
+            for key, value in current.items():
+                if key == 'discriminator' or (skip_examples and key in ('example', 'examples')):
+                    continue
+                stack.append(value)
+        elif isinstance(current, list):
+            stack.extend(current)
+
+
+def split_ref(ref: str):
+    """'#/components/schemas/Foo' -> ('schemas', 'Foo')."""
+    kind, _, name = ref[len(REF_PREFIX):].partition('/')
+    return kind, name.replace('~1', '/').replace('~0', '~')
+
+
+def schema_ref_name(ref: str) -> Optional[str]:
+    kind, name = split_ref(ref)
+    return name if kind == 'schemas' else None
+
+
+def build_index(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Refs, type hierarchy and operations of a parsed spec."""
+    components = spec.get('components') or {}
+    refs = {}
+    for kind, items in components.items():
+        for name, node in (items or {}).items():
+            refs[f'{kind}/{name}'] = sorted(set(r[len(REF_PREFIX):] for r in iter_refs(node, skip_examples=True)))
+
+    hierarchy = {}
+    subtypes: Dict[str, Set[str]] = {}
+    for name, schema in (components.get('schemas') or {}).items():
+        if not isinstance(schema, dict):
+            continue
+        parents = [schema_ref_name(p['$ref']) for p in schema.get('allOf', [])
+                   if isinstance(p, dict) and '$ref' in p]
+        variants = [schema_ref_name(p['$ref']) for key in ('oneOf', 'anyOf') for p in schema.get(key, [])
+                    if isinstance(p, dict) and '$ref' in p]
+        discriminator = schema.get('discriminator') or {}
+        mapping = {value: schema_ref_name(ref) for value, ref in (discriminator.get('mapping') or {}).items()}
+        hierarchy[name] = {
+            'parents': [p for p in parents if p],
+            'variants': [v for v in variants if v],
+            'discriminator': discriminator.get('propertyName'),
+            'mapping': mapping,
+        }
+        for parent in parents:
+            if parent:
+                subtypes.setdefault(parent, set()).add(name)
+        for sub in mapping.values():
+            if sub and sub != name:
+                subtypes.setdefault(name, set()).add(sub)
+
+    operations = {}
+    for path, item in (spec.get('paths') or {}).items():
+        for method, operation in (item or {}).items():
+            if method in HTTP_METHODS and isinstance(operation, dict):
+                operations[f'{method} {path}'] = {
+                    'path': path,
+                    'method': method,
+                    'operationId': operation.get('operationId'),
+                    'refs': sorted(set(r[len(REF_PREFIX):] for r in iter_refs(operation, skip_examples=True))),
+                }
+
+    return {
+        'refs': refs,
+        'hierarchy': hierarchy,
+        'subtypes': {name: sorted(names) for name, names in subtypes.items()},
+        'operations': operations,
+    }
+
+
+class SpecIndex:
+    """A parsed spec and its index, cached as JSON next to other specs' indexes."""
+
+    def __init__(self, spec_path: str, cache_dir: str = CACHE_DIR):
+        self.spec_path = os.path.abspath(spec_path)
+        st = os.stat(self.spec_path)
+        key = hashlib.sha1(self.spec_path.encode('utf-8')).hexdigest()[:16]
+        self.cache_path = os.path.join(cache_dir, f'{key}.json')
+        self.spec_size = st.st_size
+
+        cached = self._load_cache(st)
+        if cached is None:
+            cached = self._parse(st)
+        self.spec = cached['spec']
+        self.index = cached['index']
+
+    def _load_cache(self, st) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self.cache_path):
+            return None
+        with open(self.cache_path, 'r') as f:
+            cached = json.load(f)
+        if (cached.get('version') != INDEX_VERSION or cached.get('size') != st.st_size
+                or cached.get('mtime') != st.st_mtime):
+            return None
+        return cached
+
+    def _parse(self, st) -> Dict[str, Any]:
+        if yaml is None:
+            print("Error: PyYAML is required to parse specs (pip install pyyaml)", file=sys.stderr)
+            sys.exit(1)
+        loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        with open(self.spec_path, 'r', encoding='utf-8') as f:
+            spec = yaml.load(f, Loader=loader)
+
+        cached = {
+            'version': INDEX_VERSION,
+            'source': self.spec_path,
+            'size': st.st_size,
+            'mtime': st.st_mtime,
+            'spec': spec,
+            'index': build_index(spec),
+        }
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(cached, f, separators=(',', ':'), default=str)
+        os.replace(tmp_path, self.cache_path)
+        return cached
+
+    def component(self, key: str) -> Any:
+        kind, _, name = key.partition('/')
+        return (self.spec.get('components') or {}).get(kind, {}).get(name)
+
+    def closure(self, roots: List[str], examples: bool = False) -> List[str]:
+        """Component keys ('schemas/Foo') reachable from the roots through $ref."""
+        seen = []
+        seen_set = set()
+        stack = list(roots)
+        while stack:
+            key = stack.pop()
+            if key in seen_set or self.component(key) is None:
+                continue
+            if key.startswith('examples/') and not examples:
+                continue
+            seen_set.add(key)
+            seen.append(key)
+            if examples:
+                stack.extend(r[len(REF_PREFIX):] for r in iter_refs(self.component(key)))
+            else:
+                stack.extend(self.index['refs'].get(key, []))
+        return seen
+
+    def subtypes_of(self, name: str) -> List[str]:
+        """All transitive subtypes of a schema (allOf children and discriminator mappings)."""
+        found = []
+        stack = [name]
+        while stack:
+            for sub in self.index['subtypes'].get(stack.pop(), []):
+                if sub not in found and sub != name:
+                    found.append(sub)
+                    stack.append(sub)
+        return found
+
+    def find_operations(self, selector: str, method: Optional[str] = None) -> List[str]:
+        """Operation keys ('get /path') matching a path or operationId."""
+        matches = []
+        for key, operation in self.index['operations'].items():
+            if selector in (operation['path'], operation['operationId']):
+                if method is None or operation['method'] == method.lower():
+                    matches.append(key)
+        return matches
+
+    def document(self, components: List[str], operations: List[str] = (), examples: bool = False) -> Dict[str, Any]:
+        """A standalone OpenAPI document holding only the given components and operations."""
+        info = self.spec.get('info') or {}
+        schemas = {key[len('schemas/'):] for key in components if key.startswith('schemas/')}
+        out: Dict[str, Any] = {
+            'openapi': self.spec.get('openapi'),
+            'info': {'title': info.get('title'), 'version': info.get('version')},
+        }
+        paths: Dict[str, Any] = {}
+        for key in operations:
+            operation = self.index['operations'][key]
+            node = self.spec['paths'][operation['path']][operation['method']]
+            if not examples:
+                node = strip_examples(node)
+            paths.setdefault(operation['path'], {})[operation['method']] = prune_mappings(node, schemas)
+        out['paths'] = paths
+
+        grouped: Dict[str, Dict[str, Any]] = {}
+        for key in sorted(components):
+            kind, _, name = key.partition('/')
+            node = self.component(key)
+            node = node if examples else strip_examples(node)
+            grouped.setdefault(kind, {})[name] = prune_mappings(node, schemas)
+        out['components'] = grouped
+        return out
+
+
+def strip_examples(node: Any) -> Any:
+    """Copy of a node without example/examples keys (they can dwarf the schema)."""
+    if isinstance(node, dict):
+        return {k: strip_examples(v) for k, v in node.items() if k not in ('example', 'examples')}
+    if isinstance(node, list):
+        return [strip_examples(v) for v in node]
+    return node
+
+
+def prune_mappings(node: Any, schemas: Set[str]) -> Any:
+    """Copy of a node whose discriminator mappings only point at the given schemas."""
+    if isinstance(node, list):
+        return [prune_mappings(v, schemas) for v in node]
+    if not isinstance(node, dict):
+        return node
+    out = {}
+    for key, value in node.items():
+        if key == 'discriminator' and isinstance(value, dict) and isinstance(value.get('mapping'), dict):
+            # Mapping values are schema $refs or bare schema names
+            mapping = {name: ref for name, ref in value['mapping'].items()
+                       if (schema_ref_name(ref) if ref.startswith(REF_PREFIX) else ref) in schemas}
+            out[key] = {k: v for k, v in value.items() if k != 'mapping'}
+            if mapping:
+                out[key]['mapping'] = mapping
+        else:
+            out[key] = prune_mappings(value, schemas)
+    return out
+
+
+def dump(document: Dict[str, Any]) -> str:
+    if yaml is not None:
+        return yaml.safe_dump(document, sort_keys=False, allow_unicode=True, width=120)
+    return json.dumps(document, indent=2)
+
+
+def print_info(spec: SpecIndex, name: str):
+    info = spec.index['hierarchy'].get(name)
+    if info is None:
+        print(f"Error: schema not found: {name}", file=sys.stderr)
+        sys.exit(1)
+    referenced_by = sorted(key for key, refs in spec.index['refs'].items() if f'schemas/{name}' in refs)
+    closure = spec.closure([f'schemas/{name}'])
+    print(f"{name}")
+    print(f"  parents (allOf):  {', '.join(info['parents']) or '-'}")
+    print(f"  variants (oneOf): {', '.join(info['variants']) or '-'}")
+    if info['discriminator']:
+        print(f"  discriminator:    {info['discriminator']} → {', '.join(sorted(info['mapping'])) or '-'}")
+    print(f"  subtypes:         {', '.join(spec.subtypes_of(name)) or '-'}")
+    print(f"  referenced by:    {', '.join(referenced_by) or '-'}")
+    print(f"  closure:          {len(closure)} components")
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] not in ('resource', 'endpoint', 'info', 'list'):
+        print(__doc__)
+        sys.exit(1)
+
+    command, spec_path = args[0], args[1]
+    positional = []
+    subtypes = examples = False
+    output_file = None
+    i = 2
+    while i < len(args):
+        if args[i] == '--subtypes':
+            subtypes = True
+            i += 1
+        elif args[i] == '--examples':
+            examples = True
+            i += 1
+        elif args[i] == '--output' and i + 1 < len(args):
+            output_file = args[i + 1]
+            i += 2
+        else:
+            positional.append(args[i])
+            i += 1
+
+    if not os.path.exists(spec_path):
+        print(f"Error: spec not found: {spec_path}", file=sys.stderr)
+        sys.exit(1)
+    spec = SpecIndex(spec_path)
+
+    if command == 'list':
+        for name, info in sorted(spec.index['hierarchy'].items()):
+            size = len(json.dumps(spec.component(f'schemas/{name}')))
+            extends = f" extends {', '.join(info['parents'])}" if info['parents'] else ''
+            print(f"{name:<50} {size:>8,} bytes{extends}")
+        print(f"\n{len(spec.index['operations'])} operations:")
+        for key, operation in sorted(spec.index['operations'].items(), key=lambda x: (x[1]['path'], x[1]['method'])):
+            print(f"  {operation['method'].upper():<7} {operation['path']}  ({operation['operationId']})")
+        return
+
+    if not positional:
+        print(__doc__)
+        sys.exit(1)
+
+    if command == 'info':
+        print_info(spec, positional[0])
+        return
+
+    operations = []
+    if command == 'resource':
+        missing = [n for n in positional if n not in spec.index['hierarchy']]
+        if missing:
+            print(f"Error: schema(s) not found: {', '.join(missing)}", file=sys.stderr)
+            sys.exit(1)
+        roots = [f'schemas/{n}' for n in positional]
+    else:
+        operations = spec.find_operations(positional[0], positional[1] if len(positional) > 1 else None)
+        if not operations:
+            print(f"Error: no operation matches {' '.join(positional)}", file=sys.stderr)
+            sys.exit(1)
+        roots = []
+        for key in operations:
+            if examples:
+                operation = spec.index['operations'][key]
+                node = spec.spec['paths'][operation['path']][operation['method']]
+                roots.extend(r[len(REF_PREFIX):] for r in iter_refs(node))
+            else:
+                roots.extend(spec.index['operations'][key]['refs'])
+
+    if subtypes:
+        for root in list(roots):
+            kind, _, name = root.partition('/')
+            if kind == 'schemas':
+                roots.extend(f'schemas/{sub}' for sub in spec.subtypes_of(name))
+
+    components = spec.closure(roots, examples)
+    text = dump(spec.document(components, operations, examples))
+
+    if output_file:
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    schemas = sum(1 for c in components if c.startswith('schemas/'))
+    print(f"Slice: {len(operations)} operation(s), {schemas} schema(s), {len(components)} component(s); "
+          f"{len(text.encode('utf-8')):,} of {spec.spec_size:,} bytes", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
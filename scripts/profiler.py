@@ -0,0 +1,174 @@
+"""
+Per-stage profiling for the session scripts (--profile).
+
+Records wall time, call count and bytes processed per pipeline stage plus the
+tracemalloc peak, prints a summary table and can write a Chrome trace-event JSON
+file (open it in chrome://tracing or https://ui.perfetto.dev).
+
+The module-level PROFILER is disabled by default; hot loops check
+`PROFILER.enabled` once and only then pay for timing calls.
+
+Usage in a script:
+    from profiler import PROFILER
+
+    with PROFILER.stage('keyword_search') as span:
+        ...
+        span['bytes'] += len(content)
+    PROFILER.add('json_decode', seconds, len(line))    # fine-grained accumulation
+
+Stages may nest (json_decode happens inside load_conversations, for example), so
+the percentages in the table need not add up to 100.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+# Coarse stage events kept for the trace; fine-grained add() calls only go to the table
+MAX_TRACE_EVENTS = 20000
+
+
+class StageStats:
+    __slots__ = ('seconds', 'calls', 'bytes')
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.bytes = 0
+
+
+class Profiler:
+    """Collects per-stage timings for one process."""
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_file: Optional[str] = None
+        self.stages: Dict[str, StageStats] = {}
+        self.events: List[Dict] = []
+        self.start_time = 0.0
+        self._lock = threading.Lock()
+
+    def enable(self, trace_file: Optional[str] = None):
+        """Start profiling; tracemalloc is started here as well."""
+        self.enabled = True
+        self.trace_file = trace_file
+        self.start_time = time.perf_counter()
+        tracemalloc.start()
+
+    def add(self, name: str, seconds: float, nbytes: int = 0, calls: int = 1):
+        """Accumulate time, bytes and calls for a stage."""
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = StageStats()
+            stats.seconds += seconds
+            stats.calls += calls
+            stats.bytes += nbytes
+
+    @contextmanager
+    def stage(self, name: str, nbytes: int = 0):
+        """
+        Time a block as one call of a stage and record it as a trace event.
+
+        Yields a dict whose 'bytes' entry the block may increase.
+        """
+        span = {'bytes': nbytes}
+        if not self.enabled:
+            yield span
+            return
+
+        start = time.perf_counter()
+        try:
+            yield span
+        finally:
+            end = time.perf_counter()
+            self.add(name, end - start, span['bytes'])
+            if len(self.events) < MAX_TRACE_EVENTS:
+                self.events.append({
+                    'name': name,
+                    'ph': 'X',
+                    'ts': (start - self.start_time) * 1e6,
+                    'dur': (end - start) * 1e6,
+                    'pid': os.getpid(),
+                    'tid': threading.get_ident(),
+                    'args': {'bytes': span['bytes']},
+                })
+
+    def finish(self, out=sys.stderr):
+        """Print the summary table and write the trace file if requested."""
+        if not self.enabled:
+            return
+
+        total = time.perf_counter() - self.start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print("\n" + "=" * 72, file=out)
+        print("PROFILE", file=out)
+        print("=" * 72, file=out)
+        print(f"{'Stage':24} {'Wall (s)':>10} {'%':>6} {'Calls':>10} {'Bytes':>14}", file=out)
+        print("-" * 72, file=out)
+        for name, stats in sorted(self.stages.items(), key=lambda kv: kv[1].seconds, reverse=True):
+            pct = 100 * stats.seconds / total if total else 0
+            print(f"{name:24} {stats.seconds:10.4f} {pct:6.1f} {stats.calls:10,} {stats.bytes:14,}", file=out)
+        print("-" * 72, file=out)
+        print(f"{'total':24} {total:10.4f}", file=out)
+        print(f"tracemalloc peak: {peak / 1024 / 1024:.2f} MiB", file=out)
+
+        if self.trace_file:
+            self.write_trace(self.trace_file, total, peak)
+            print(f"Trace written to {self.trace_file}", file=out)
+
+    def write_trace(self, path: str, total: float, peak: int):
+        """Write a Chrome trace-event JSON file."""
+        pid = os.getpid()
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': pid,
+                   'args': {'name': os.path.basename(sys.argv[0])}}]
+        events.extend(self.events)
+        events.append({'name': 'total', 'ph': 'X', 'ts': 0, 'dur': total * 1e6,
+                       'pid': pid, 'tid': 0})
+        summary = {name: {'seconds': s.seconds, 'calls': s.calls, 'bytes': s.bytes}
+                   for name, s in self.stages.items()}
+        with open(path, 'w') as f:
+            json.dump({
+                'traceEvents': events,
+                'displayTimeUnit': 'ms',
+                'otherData': {'stages': summary, 'tracemalloc_peak_bytes': peak},
+            }, f)
+
+
+PROFILER = Profiler()
+
+
+def parse_profile_args(args: List[str]) -> List[str]:
+    """
+    Strip --profile and --profile-trace <file> from an argument list, enabling the
+    profiler when present. Returns the remaining arguments.
+    """
+    remaining = []
+    trace_file = None
+    enabled = False
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--profile':
+            enabled = True
+            i += 1
+        elif args[i] == '--profile-trace' and i + 1 < len(args):
+            enabled = True
+            trace_file = args[i + 1]
+            i += 2
+        else:
+            remaining.append(args[i])
+            i += 1
+
+    if enabled:
+        PROFILER.enable(trace_file)
+
+    return remaining
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Reuse prompt ratings across work-log runs.
+
+Prompts are keyed by a hash of their normalized text and clustered with MinHash/LSH,
+so only prompts that are new (neither cached nor a near-duplicate of another prompt
+in the run) need to be rated.
+
+Usage:
+    python3 rating_memo.py plan <session-file> [session-file...] --output <plan.csv> [--memo <memo.json>] [--threshold <0-1>]
+    python3 rating_memo.py apply <plan.csv> --output <ratings.csv> [--memo <memo.json>]
+
+Workflow:
+    1. `plan` writes a CSV with one row per prompt. Rows with Source=rate are cluster
+       representatives and need their C1..C10 columns filled in. Rows with
+       Source=cached already carry ratings; rows with Source=member copy the ratings
+       of the prompt named in Rep_ID.
+    2. Fill in the ratings for the Source=rate rows.
+    3. `apply` propagates the ratings to cluster members, stores the new ratings in
+       the memo and writes a ratings CSV for score_prompts_with_corrections.py.
+
+Options:
+    --memo       Memo file (default: ~/.claude/prompt-ratings-memo.json)
+    --threshold  Estimated Jaccard similarity above which prompts share ratings (default: 0.8)
+"""
+
+import csv
+import hashlib
+import json
+import os
+import sys
+from typing import List, Dict, Any
+
+from extract_session_data import extract_session_data
+from near_duplicates import LSHIndex, normalize, shingle_signature
+
+
+DEFAULT_MEMO = os.path.expanduser('~/.claude/prompt-ratings-memo.json')
+
+PRINCIPLES = ['C1', 'C2', 'C3', 'C4', 'C5', 'C6', 'C7', 'C8', 'C9', 'C10']
+
+# Column names used by score_prompts_with_corrections.py
+RATING_COLUMNS = {
+    'C1': 'C1_Clarity',
+    'C2': 'C2_Context',
+    'C3': 'C3_Constraint',
+    'C4': 'C4_Output',
+    'C5': 'C5_Verify',
+    'C6': 'C6_Iterate',
+    'C7': 'C7_Decomp',
+    'C8': 'C8_Source',
+    'C9': 'C9_Role',
+    'C10': 'C10_Example',
+}
+
+BASE_COLUMNS = ['ID', 'Timestamp', 'Prompt_Preview'] + [RATING_COLUMNS[c] for c in PRINCIPLES]
+PLAN_COLUMNS = BASE_COLUMNS + ['Source', 'Rep_ID', 'Hash']
+
+# Character shingle length of prompt signatures (see near_duplicates.py)
+SHINGLE_SIZE = 4
+
+
+def prompt_hash(normalized: str) -> str:
+    """Content hash of a normalized prompt."""
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()
+
+
+def minhash(normalized: str) -> List[int]:
+    """MinHash signature over character shingles of a normalized prompt."""
+    if len(normalized) <= SHINGLE_SIZE:
+        shingles = {normalized}
+    else:
+        shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    return shingle_signature(shingles)
+
+
+def load_memo(memo_path: str) -> Dict[str, Any]:
+    """Load the rating memo ({hash: {ratings, signature, preview}})."""
+    if not os.path.exists(memo_path):
+        return {}
+    with open(memo_path, 'r') as f:
+        return json.load(f)
+
+
+def save_memo(memo: Dict[str, Any], memo_path: str):
+    """Write the rating memo atomically."""
+    os.makedirs(os.path.dirname(memo_path) or '.', exist_ok=True)
+    tmp_path = memo_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(memo, f)
+    os.replace(tmp_path, memo_path)
+
+
+def plan_ratings(user_messages: List[Dict], memo: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Decide for each prompt whether it is cached, a new representative, or a member
+    of a representative's cluster.
+
+    Returns list of plan rows (PLAN_COLUMNS keys).
+    """
+    memo_index = LSHIndex()
+    for key, cached in memo.items():
+        memo_index.add(key, cached['signature'])
+
+    run_index = LSHIndex()
+    run_by_hash = {}   # hash -> representative ID in this run
+    rows = []
+
+    for msg in user_messages:
+        pid = f"P{msg['number']}"
+        normalized = normalize(msg['text'])
+        digest = prompt_hash(normalized)
+        row = {
+            'ID': pid,
+            'Timestamp': msg['timestamp'],
+            'Prompt_Preview': msg['text'][:100].replace('\n', ' '),
+            'Source': 'rate',
+            'Rep_ID': '',
+            'Hash': digest,
+            'signature': None,
+        }
+        for c in PRINCIPLES:
+            row[RATING_COLUMNS[c]] = ''
+
+        cached_key = digest if digest in memo else None
+        signature = None
+        if cached_key is None:
+            signature = minhash(normalized)
+            row['signature'] = signature
+            if digest not in run_by_hash:
+                cached_key = memo_index.query(signature, threshold)
+
+        if cached_key is not None:
+            row['Source'] = 'cached'
+            for c in PRINCIPLES:
+                row[RATING_COLUMNS[c]] = memo[cached_key]['ratings'][c]
+        elif digest in run_by_hash:
+            row['Source'] = 'member'
+            row['Rep_ID'] = run_by_hash[digest]
+        else:
+            rep_id = run_index.query(signature, threshold)
+            if rep_id is not None:
+                row['Source'] = 'member'
+                row['Rep_ID'] = rep_id
+                run_by_hash[digest] = rep_id
+            else:
+                run_index.add(pid, signature)
+                run_by_hash[digest] = pid
+
+        rows.append(row)
+
+    return rows
+
+
+def report(rows: List[Dict[str, Any]]):
+    """Print how much rating work the memo and clustering avoided."""
+    total = len(rows)
+    cached = sum(1 for r in rows if r['Source'] == 'cached')
+    members = sum(1 for r in rows if r['Source'] == 'member')
+    to_rate = total - cached - members
+    avoided = (cached + members) / total if total else 0.0
+
+    print(f"Prompts: {total}", file=sys.stderr)
+    print(f"  Cached ratings reused: {cached}", file=sys.stderr)
+    print(f"  Near-duplicates of a representative: {members}", file=sys.stderr)
+    print(f"  To rate: {to_rate}", file=sys.stderr)
+    print(f"Rating work avoided: {avoided:.0%}", file=sys.stderr)
+
+
+def write_csv(rows: List[Dict[str, Any]], columns: List[str], output_file: str):
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def signatures_path(plan_csv: str) -> str:
+    """Sidecar file holding full-text signatures, keeping them out of the CSV that gets rated."""
+    return plan_csv + '.signatures.json'
+
+
+def load_signatures(plan_csv: str) -> Dict[str, List[int]]:
+    with open(signatures_path(plan_csv), 'r') as f:
+        return json.load(f)
+
+
+def cmd_plan(session_files: List[str], output_file: str, memo_path: str, threshold: float):
+    data = extract_session_data(session_files)
+    memo = load_memo(memo_path)
+    rows = plan_ratings(data['user_messages'], memo, threshold)
+    write_csv(rows, PLAN_COLUMNS, output_file)
+    with open(signatures_path(output_file), 'w') as f:
+        json.dump({r['Hash']: r['signature'] for r in rows if r['Source'] != 'cached'}, f)
+    print(f"Wrote rating plan to {output_file}", file=sys.stderr)
+    report(rows)
+
+
+def cmd_apply(plan_csv: str, output_file: str, memo_path: str):
+    with open(plan_csv, 'r') as f:
+        rows = list(csv.DictReader(f))
+
+    by_id = {r['ID']: r for r in rows}
+    memo = load_memo(memo_path)
+
+    for row in rows:
+        if row['Source'] == 'member':
+            rep = by_id[row['Rep_ID']]
+            for c in PRINCIPLES:
+                row[RATING_COLUMNS[c]] = rep[RATING_COLUMNS[c]]
+
+    missing = [r['ID'] for r in rows if any(r[RATING_COLUMNS[c]] == '' for c in PRINCIPLES)]
+    if missing:
+        print(f"Error: ratings missing for {', '.join(missing)}", file=sys.stderr)
+        sys.exit(1)
+
+    # Remember every newly rated prompt under its exact hash, with its signature
+    # so later runs can match near-duplicates against it
+    signatures = load_signatures(plan_csv)
+    for row in rows:
+        if row['Source'] == 'cached' or row['Hash'] in memo:
+            continue
+        memo[row['Hash']] = {
+            'ratings': {c: int(row[RATING_COLUMNS[c]]) for c in PRINCIPLES},
+            'signature': signatures[row['Hash']],
+            'preview': row['Prompt_Preview'][:60],
+        }
+
+    save_memo(memo, memo_path)
+    write_csv(rows, BASE_COLUMNS, output_file)
+    print(f"Wrote ratings to {output_file} ({len(memo)} prompts in memo)", file=sys.stderr)
+    report(rows)
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('plan', 'apply'):
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    inputs = []
+    output_file = None
+    memo_path = DEFAULT_MEMO
+    threshold = 0.8
+
+    i = 1
+    while i < len(args):
+        if args[i] == '--output' and i + 1 < len(args):
+            output_file = args[i + 1]
+            i += 2
+        elif args[i] == '--memo' and i + 1 < len(args):
+            memo_path = os.path.expanduser(args[i + 1])
+            i += 2
+        elif args[i] == '--threshold' and i + 1 < len(args) and args[i + 1].replace('.', '', 1).isdigit():
+            threshold = float(args[i + 1])
+            i += 2
+        elif args[i].startswith('--'):
+            print(__doc__)
+            sys.exit(1)
+        else:
+            inputs.append(args[i])
+            i += 1
+
+    if not inputs or not output_file:
+        print(__doc__)
+        sys.exit(1)
+
+    if command == 'plan':
+        cmd_plan(inputs, output_file, memo_path, threshold)
+    else:
+        cmd_apply(inputs[0], output_file, memo_path)
+
+
+if __name__ == '__main__':
+    main()
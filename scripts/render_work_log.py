@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Render weekly work-log files from session data, updating entries in place.
+
+For every logical session (see session_index.py) that started in the given ISO week,
+the extract_session_data() result is rendered as a work-log entry in
+`<docs>/<project-slug>_work-log_YYYY-WXX.md`. Each generated entry is preceded by a
+marker comment carrying its logical-session id and a fingerprint of its source
+transcripts (the sessions and their sub-agent transcripts):
+
+    <!-- work-log-entry id=<logical-session-id> source=<fingerprint> -->
+
+On a re-run, entries whose fingerprint is unchanged are copied byte for byte without
+re-reading their transcripts. Changed entries get a fresh duration and outcomes,
+while the title and the hand-written sections (goals, prompt patterns,
+anti-patterns, lessons learned, ...) are kept. New entries are inserted
+in date order, newest first, and entries without a marker are never touched.
+Marked entries whose logical session no longer exists this week (e.g. because a
+new session merged two of them) are removed.
+The transcripts of the week's sessions are always re-stat'ed, so work appended to
+an already rendered (resumed) session is picked up; --rescan re-checks every
+transcript of the project (see session_index.py).
+
+Usage:
+    python3 render_work_log.py [--week YYYY-Www] [--project <project_path>]... [--docs <dir>]
+                               [--dry-run] [--rescan]
+
+Example:
+    python3 render_work_log.py --week 2025-W51 --project /home/vedat/t/ai-sdlc --project /home/vedat/t/atlassian
+"""
+
+import hashlib
+import os
+import re
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+from extract_session_data import extract_session_data, find_agent_files
+from session_archive import session_stat
+from session_index import open_index
+
+
+DOCS_DIR = os.path.expanduser('~/.claude/docs')
+
+MARKER_PATTERN = re.compile(r'^<!-- work-log-entry id=(\S+) source=(\S+) -->$')
+HEADING_PATTERN = re.compile(r'^## (\d{4}-\d{2}-\d{2}) - (.*)$')
+COMMIT_MESSAGE_PATTERN = re.compile(r'''-m\s+(?:"\$\(cat <<'?EOF'?\s*\n(.*?)\n|"([^"]*)"|'([^']*)')''', re.DOTALL)
+
+GENERATED_SECTIONS = ('Outcomes',)
+RENDERED_FIELDS = ['duration', 'user_messages', 'files', 'commits']
+
+
+def project_slug(project_path: str) -> str:
+    """Repository name from the git remote, otherwise the last path component."""
+    try:
+        url = subprocess.run(['git', '-C', project_path, 'remote', 'get-url', 'origin'],
+                             capture_output=True, text=True, timeout=5).stdout.strip()
+    except (OSError, subprocess.TimeoutExpired):
+        url = ''
+    name = url.rstrip('/').rsplit('/', 1)[-1] if url else os.path.basename(project_path.rstrip('/'))
+    return name[:-len('.git')] if name.endswith('.git') else name
+
+
+def fingerprint(index, group: Dict[str, Any]) -> str:
+    """Hash of the size and mtime of every transcript (sessions and sub-agents) of a logical session."""
+    h = hashlib.sha1()
+    for session_id in sorted(group['sessions']):
+        record = index.sessions[session_id]
+        h.update(f"{session_id}:{record['size']}:{record['mtime']}\n".encode())
+        for agent_path in find_agent_files(index.session_path(session_id)):
+            stat = session_stat(agent_path) or {'size': 0, 'mtime': 0}
+            h.update(f"{os.path.basename(agent_path)}:{stat['size']}:{stat['mtime']}\n".encode())
+    return h.hexdigest()[:16]
+
+
+class Block:
+    """One entry of a work-log file: raw text plus its marker id, if generated."""
+
+    __slots__ = ('text', 'entry_id', 'source', 'date')
+
+    def __init__(self, text: str):
+        self.text = text
+        self.entry_id = self.source = self.date = None
+        lines = text.split('\n', 2)
+        marker = MARKER_PATTERN.match(lines[0])
+        if marker:
+            self.entry_id, self.source = marker.groups()
+            lines = lines[1:]
+        heading = HEADING_PATTERN.match(lines[0]) if lines else None
+        if heading:
+            self.date = heading.group(1)
+
+
+def parse_log(text: str) -> Tuple[str, List[Block]]:
+    """Split a work-log file into its header and entry blocks (each starting at a marker or `## `)."""
+    lines = text.splitlines(keepends=True)
+    starts = []
+    for i, line in enumerate(lines):
+        if line.startswith('## '):
+            marked = i and MARKER_PATTERN.match(lines[i - 1].rstrip('\n'))
+            starts.append(i - 1 if marked else i)
+
+    if not starts:
+        return text, []
+    header = ''.join(lines[:starts[0]])
+    blocks = [Block(''.join(lines[start:end])) for start, end in zip(starts, starts[1:] + [len(lines)])]
+    return header, blocks
+
+
+def split_sections(text: str) -> Tuple[str, List[Tuple[str, str]]]:
+    """Split an entry body into its preamble and (`### ` title, text) sections."""
+    parts = re.split(r'^(?=### )', text, flags=re.MULTILINE)
+    sections = []
+    for part in parts[1:]:
+        title = part.split('\n', 1)[0][4:].strip()
+        sections.append((title, part))
+    return parts[0], sections
+
+
+def commit_message(command: str) -> str:
+    match = COMMIT_MESSAGE_PATTERN.search(command)
+    if not match:
+        return command.split('\n', 1)[0]
+    message = next(g for g in match.groups() if g is not None)
+    return message.strip().split('\n', 1)[0]
+
+
+def render_goals(data: Dict[str, Any]) -> str:
+    prompts = [m['text'] for m in data['user_messages'] if len(m['text']) > 10]
+    goal = prompts[0].split('\n', 1)[0][:200] if prompts else '[Inferred from initial user messages]'
+    return f"### Goals\n\n- {goal}\n\n"
+
+
+def render_outcomes(data: Dict[str, Any]) -> str:
+    created = data['files']['created']
+    modified = [f for f in data['files']['modified'] if f not in created]
+    parts = ["### Outcomes\n\n"]
+    for label, files in (('Files created', created), ('Files modified', modified)):
+        if files:
+            parts.append(f"**{label}:**\n\n" + ''.join(f"- `{f}`\n" for f in files) + "\n")
+    if data['commits']:
+        messages = ''.join(commit_message(c['command']) + '\n' for c in data['commits'])
+        parts.append(f"**Commits:**\n\n```\n{messages}```\n\n")
+    if len(parts) == 1:
+        parts.append("- No file changes or commits recorded\n\n")
+    return ''.join(parts)
+
+
+def render_entry(entry_id: str, source: str, date: str, title: str, data: Dict[str, Any],
+                 previous: Optional[Block] = None) -> str:
+    """Render an entry, keeping the title and hand-written sections of the previous version."""
+    sections = [('Goals', render_goals(data)), ('Outcomes', render_outcomes(data))]
+    if previous is not None:
+        body = previous.text.split('\n', 1)[1] if previous.entry_id else previous.text
+        preamble, old_sections = split_sections(body)
+        heading = HEADING_PATTERN.match(preamble.split('\n', 1)[0])
+        if heading:
+            title = heading.group(2)
+        if old_sections:
+            generated = dict(sections)
+            sections = [(name, generated[name] if name in GENERATED_SECTIONS else text)
+                        for name, text in old_sections]
+            for name in GENERATED_SECTIONS:
+                if name not in dict(old_sections):
+                    sections.append((name, generated[name]))
+
+    text = (f"<!-- work-log-entry id={entry_id} source={source} -->\n"
+            f"## {date} - {title}\n\n"
+            f"**Duration:** {data['duration']}\n\n"
+            + ''.join(text if text.endswith('\n\n') else text.rstrip('\n') + '\n\n' for _, text in sections))
+    return text
+
+
+def entry_title(group: Dict[str, Any], index) -> str:
+    title = index.sessions[group['id']]['title'].split('\n', 1)[0].lstrip('#').strip()
+    return title[:80] or 'Session'
+
+
+def update_week(project_path: str, week: str, docs_dir: str, dry_run: bool = False,
+                rescan: bool = False) -> Dict[str, Any]:
+    """
+    Bring one project's work-log file for a week up to date.
+
+    Returns:
+        {'file', 'unchanged', 'updated', 'added', 'removed', 'written'}
+    """
+    index = open_index(project_path, rescan)
+    start = datetime.strptime(week + '-1', '%G-W%V-%u').timestamp()
+    end = start + 7 * 86400
+    # The index only re-stats recently written sessions; older ones of this week may
+    # have been resumed since they were rendered
+    week_sessions = [sid for g in index.groups_between(start, end) for sid in g['sessions']]
+    if index.recheck(week_sessions):
+        index.save()
+    groups = [g for g in index.groups_between(start, end) if start <= g['start'] < end]
+
+    slug = project_slug(project_path)
+    path = os.path.join(docs_dir, f'{slug}_work-log_{week}.md')
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            original = f.read()
+    else:
+        original = f'# {slug} Work Log - {week}\n\n'
+    header, blocks = parse_log(original)
+
+    stats = {'file': path, 'unchanged': 0, 'updated': 0, 'added': 0, 'removed': 0, 'written': False}
+    # Entries of logical sessions that were merged into another (or moved out of the week)
+    group_ids = {g['id'] for g in groups}
+    kept = [b for b in blocks if not b.entry_id or b.entry_id in group_ids]
+    stats['removed'] = len(blocks) - len(kept)
+    blocks = kept
+    by_id = {b.entry_id: i for i, b in enumerate(blocks) if b.entry_id}
+
+    new_blocks = []
+    for group in groups:
+        source = fingerprint(index, group)
+        position = by_id.get(group['id'])
+        if position is not None and blocks[position].source == source:
+            stats['unchanged'] += 1
+            continue
+
+        data = extract_session_data([index.session_path(sid) for sid in group['sessions']], RENDERED_FIELDS, 200)
+        date = datetime.fromtimestamp(group['start']).strftime('%Y-%m-%d')
+        if position is not None:
+            text = render_entry(group['id'], source, date, entry_title(group, index), data, blocks[position])
+            blocks[position] = Block(text)
+            stats['updated'] += 1
+        else:
+            new_blocks.append(Block(render_entry(group['id'], source, date, entry_title(group, index), data)))
+            stats['added'] += 1
+
+    # Newest first: each new entry goes before the first entry that is not newer
+    for block in sorted(new_blocks, key=lambda b: b.date):
+        position = next((i for i, b in enumerate(blocks) if b.date and b.date <= block.date), len(blocks))
+        if position == len(blocks) and blocks and not blocks[-1].text.endswith('\n\n'):
+            blocks[-1] = Block(blocks[-1].text.rstrip('\n') + '\n\n')
+        blocks.insert(position, block)
+
+    content = header + ''.join(b.text for b in blocks)
+    # Keep the file's own trailing newlines (one for a new file)
+    trailer = original[len(original.rstrip('\n')):] if os.path.exists(path) else '\n'
+    content = content.rstrip('\n') + trailer
+    if content != original and not dry_run:
+        os.makedirs(docs_dir, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        stats['written'] = True
+    return stats
+
+
+def main():
+    args = sys.argv[1:]
+    week = datetime.now().strftime('%G-W%V')
+    projects = []
+    docs_dir = DOCS_DIR
+    dry_run = False
+    rescan = False
+
+    i = 0
+    while i < len(args):
+        if args[i] == '--week' and i + 1 < len(args):
+            week = args[i + 1]
+            i += 2
+        elif args[i] == '--project' and i + 1 < len(args):
+            projects.append(args[i + 1])
+            i += 2
+        elif args[i] == '--docs' and i + 1 < len(args):
+            docs_dir = os.path.expanduser(args[i + 1])
+            i += 2
+        elif args[i] == '--dry-run':
+            dry_run = True
+            i += 1
+        elif args[i] == '--rescan':
+            rescan = True
+            i += 1
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    for project_path in projects or [os.getcwd()]:
+        stats = update_week(project_path, week, docs_dir, dry_run, rescan)
+        action = 'would write' if dry_run and (stats['updated'] or stats['added'] or stats['removed']) else (
+            'written' if stats['written'] else 'unchanged')
+        print(f"{stats['file']}: {stats['added']} added, {stats['updated']} updated, "
+              f"{stats['removed']} removed, {stats['unchanged']} unchanged ({action})")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,7 +3,7 @@
 Score prompts with correction penalties applied.
 
 Usage:
-    python3 score_prompts_with_corrections.py <ratings.csv> [corrections.json]
+    python3 score_prompts_with_corrections.py <ratings.csv> [corrections.json] [--profile] [--profile-trace <trace.json>]
 
 Ratings CSV format:
     ID,Timestamp,Prompt_Preview,C1_Clarity,C2_Context,C3_Constraint,C4_Output,C5_Verify,C6_Iterate,C7_Decomp,C8_Source,C9_Role,C10_Example
@@ -25,6 +25,8 @@ import csv
 import json
 import sys
 
+from profiler import PROFILER, parse_profile_args
+
 # Principle weights based on user priority: 1, 2, 4, 5, 6, 7, 3, 8, 9, 10
 WEIGHTS = {
     'C1': 1.00,  # Clarity - priority 1
@@ -130,15 +132,17 @@ def apply_corrections(ratings, corrections):
 
 
 def main():
-    if len(sys.argv) < 2:
+    args = parse_profile_args(sys.argv[1:])
+    if len(args) < 1:
         print(__doc__)
         sys.exit(1)
 
-    ratings_csv = sys.argv[1]
-    corrections_json = sys.argv[2] if len(sys.argv) > 2 else None
+    ratings_csv = args[0]
+    corrections_json = args[1] if len(args) > 1 else None
 
     # Load ratings
-    ratings = load_ratings(ratings_csv)
+    with PROFILER.stage('load_ratings'):
+        ratings = load_ratings(ratings_csv)
 
     # Calculate base scores
     print("=" * 80)
@@ -161,8 +165,9 @@ def main():
 
     # Apply corrections if provided
     if corrections_json:
-        with open(corrections_json, 'r') as f:
-            corrections = json.load(f)
+        with PROFILER.stage('load_corrections'):
+            with open(corrections_json, 'r') as f:
+                corrections = json.load(f)
 
         print(f"\n" + "=" * 80)
         print(f"APPLYING {len(corrections)} CORRECTION(S)")
@@ -175,7 +180,8 @@ def main():
             if corr.get('collateral_pids'):
                 print(f"  Collateral: {', '.join(corr['collateral_pids'])} (×{p['collateral_mult']:.3f}, +{p['collateral_add']})")
 
-        adj_scores, adj_violations = apply_corrections(ratings, corrections)
+        with PROFILER.stage('apply_corrections'):
+            adj_scores, adj_violations = apply_corrections(ratings, corrections)
 
         # Update results
         for r in results:
@@ -218,6 +224,8 @@ def main():
     print(f"PATTERNS: {','.join(r['pid'] for r in by_score[:7])}")
     print(f"ANTI_PATTERNS: {','.join(r['pid'] for r in by_violation[:5])}")
 
+    PROFILER.finish()
+
 
 if __name__ == '__main__':
     main()
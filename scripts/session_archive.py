@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Compressed archive for old Claude Code session transcripts.
+
+Sessions older than N days are packed into per-month containers under
+`<sessions_dir>/archive/`. Every session is compressed as an independent gzip (or xz)
+member and appended to the container; a JSON index next to it records each member's
+offset, compressed length, original size and mtime, so a single session can be read
+without decompressing the rest.
+
+The scripts read sessions through open_session()/session_exists(), which fall back
+to the archive when `<sessions_dir>/<name>.jsonl` is no longer on disk. Callers keep
+using the original path.
+
+Usage:
+    python3 session_archive.py pack <sessions_dir> [--older-than DAYS] [--format gz|xz] [--dry-run]
+    python3 session_archive.py list <sessions_dir>
+    python3 session_archive.py unpack <sessions_dir> <session-name> [...]
+
+Example:
+    python3 session_archive.py pack ~/.claude/projects/-home-vedat-t-atlassian --older-than 30
+"""
+
+import glob
+import gzip
+import io
+import json
+import lzma
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
+
+
+ARCHIVE_DIR = 'archive'
+INDEX_SUFFIX = '.idx.json'
+
+COMPRESSORS = {
+    'gz': (lambda data: gzip.compress(data, compresslevel=6), gzip.decompress),
+    'xz': (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+# sessions_dir -> (archive dir mtime, {member name: (container path, index record)})
+_index_cache: Dict[str, Tuple[Optional[int], Dict[str, Any]]] = {}
+
+
+def container_format(container: str) -> str:
+    return container.rsplit('.', 1)[-1]
+
+
+def load_index(sessions_dir: str) -> Dict[str, Any]:
+    """
+    Load (and cache) the member index of every container in a sessions directory.
+
+    Indexes are always replaced inside the archive directory (write_index), so its
+    mtime tells whether another process packed or unpacked since the cache was filled.
+    """
+    sessions_dir = os.path.normpath(sessions_dir)
+    try:
+        mtime = os.stat(os.path.join(sessions_dir, ARCHIVE_DIR)).st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = _index_cache.get(sessions_dir)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    members = {}
+    for index_file in sorted(glob.glob(os.path.join(sessions_dir, ARCHIVE_DIR, '*' + INDEX_SUFFIX))):
+        container = index_file[:-len(INDEX_SUFFIX)]
+        with open(index_file, 'r') as f:
+            for name, record in json.load(f).items():
+                members[name] = (container, record)
+
+    _index_cache[sessions_dir] = (mtime, members)
+    return members
+
+
+def invalidate_index(sessions_dir: str):
+    """Forget the cached index so containers packed by another process are seen."""
+    _index_cache.pop(os.path.normpath(sessions_dir), None)
+
+
+def archived_members(sessions_dir: str) -> Dict[str, Dict[str, Any]]:
+    """Index records ({offset, length, size, mtime}) of every archived session, by name."""
+    return {name: record for name, (_, record) in load_index(sessions_dir).items()}
+
+
+def _locate(path: str):
+    sessions_dir, filename = os.path.split(path)
+    return load_index(sessions_dir).get(filename)
+
+
+def read_member(container: str, record: Dict[str, Any]) -> bytes:
+    """Decompress a single member of a container."""
+    _, decompress = COMPRESSORS[container_format(container)]
+    with open(container, 'rb') as f:
+        f.seek(record['offset'])
+        return decompress(f.read(record['length']))
+
+
+def session_exists(path: str) -> bool:
+    """True if the session is on disk or in the archive."""
+    return os.path.exists(path) or _locate(path) is not None
+
+
+def session_stat(path: str) -> Optional[Dict[str, Any]]:
+    """Size and mtime of a live or archived session, without decompressing it."""
+    try:
+        st = os.stat(path)
+        return {'size': st.st_size, 'mtime': st.st_mtime}
+    except FileNotFoundError:
+        located = _locate(path)
+        if located is None:
+            return None
+        _, record = located
+        return {'size': record['size'], 'mtime': record['mtime']}
+
+
+def open_session(path: str):
+    """
+    Open a session transcript for reading as text.
+
+    Live files are opened directly; archived sessions are decompressed on demand.
+    """
+    if os.path.exists(path):
+        return open(path, 'r', encoding='utf-8', errors='replace')
+
+    located = _locate(path)
+    if located is None:
+        raise FileNotFoundError(path)
+
+    container, record = located
+    return io.TextIOWrapper(io.BytesIO(read_member(container, record)), encoding='utf-8', errors='replace')
+
+
+def write_index(container: str, index: Dict[str, Any]):
+    """Write a container index atomically."""
+    tmp_path = container + INDEX_SUFFIX + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, container + INDEX_SUFFIX)
+
+
+def read_container_index(container: str) -> Dict[str, Any]:
+    index_file = container + INDEX_SUFFIX
+    if not os.path.exists(index_file):
+        return {}
+    with open(index_file, 'r') as f:
+        return json.load(f)
+
+
+def pack(sessions_dir: str, older_than_days: int, fmt: str = 'gz', dry_run: bool = False) -> List[str]:
+    """
+    Move sessions whose mtime is older than older_than_days into monthly containers.
+
+    Each session is appended and indexed before its original file is removed, so an
+    interrupted run never loses a transcript.
+
+    Returns:
+        Names of the sessions packed
+    """
+    compress, _ = COMPRESSORS[fmt]
+    cutoff = time.time() - older_than_days * 86400
+    archive_dir = os.path.join(sessions_dir, ARCHIVE_DIR)
+    packed = []
+
+    candidates = []
+    for path in glob.glob(os.path.join(sessions_dir, '*.jsonl')):
+        st = os.stat(path)
+        if st.st_mtime < cutoff:
+            candidates.append((st.st_mtime, path, st))
+    candidates.sort()
+
+    indexes = {}
+    for mtime, path, st in candidates:
+        name = os.path.basename(path)
+        month = datetime.fromtimestamp(mtime).strftime('%Y-%m')
+        container = os.path.join(archive_dir, f'sessions-{month}.jsonl.{fmt}')
+
+        if dry_run:
+            packed.append(name)
+            continue
+
+        os.makedirs(archive_dir, exist_ok=True)
+        if container not in indexes:
+            indexes[container] = read_container_index(container)
+        index = indexes[container]
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        member = compress(data)
+
+        with open(container, 'ab') as f:
+            offset = f.tell()
+            f.write(member)
+            f.flush()
+            os.fsync(f.fileno())
+
+        index[name] = {
+            'offset': offset,
+            'length': len(member),
+            'size': len(data),
+            'mtime': mtime,
+        }
+        write_index(container, index)
+        os.remove(path)
+        packed.append(name)
+
+    invalidate_index(sessions_dir)
+    return packed
+
+
+def unpack(sessions_dir: str, names: List[str]) -> List[str]:
+    """Restore archived sessions as live files (the archive copy is left in place)."""
+    restored = []
+    members = load_index(sessions_dir)
+    for name in names:
+        if not name.endswith('.jsonl'):
+            name += '.jsonl'
+        located = members.get(name)
+        if located is None:
+            print(f"Warning: {name} not in archive", file=sys.stderr)
+            continue
+        container, record = located
+        path = os.path.join(sessions_dir, name)
+        with open(path, 'wb') as f:
+            f.write(read_member(container, record))
+        os.utime(path, (record['mtime'], record['mtime']))
+        restored.append(name)
+    return restored
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] not in ('pack', 'list', 'unpack'):
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    sessions_dir = os.path.expanduser(args[1])
+    if not os.path.isdir(sessions_dir):
+        print(f"Error: Sessions directory not found: {sessions_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    if command == 'pack':
+        older_than = 30
+        fmt = 'gz'
+        dry_run = False
+        i = 2
+        while i < len(args):
+            if args[i] == '--older-than' and i + 1 < len(args) and args[i + 1].isdigit():
+                older_than = int(args[i + 1])
+                i += 2
+            elif args[i] == '--format' and i + 1 < len(args) and args[i + 1] in COMPRESSORS:
+                fmt = args[i + 1]
+                i += 2
+            elif args[i] == '--dry-run':
+                dry_run = True
+                i += 1
+            else:
+                print(__doc__)
+                sys.exit(1)
+
+        before = sum(os.path.getsize(p) for p in glob.glob(os.path.join(sessions_dir, '*.jsonl')))
+        packed = pack(sessions_dir, older_than, fmt, dry_run)
+        verb = 'Would pack' if dry_run else 'Packed'
+        print(f"{verb} {len(packed)} session(s) older than {older_than} days")
+        if not dry_run and packed:
+            after = sum(os.path.getsize(p) for p in glob.glob(os.path.join(sessions_dir, '*.jsonl')))
+            archived = sum(os.path.getsize(p) for p in glob.glob(os.path.join(sessions_dir, ARCHIVE_DIR, '*.jsonl.*'))
+                           if not p.endswith(INDEX_SUFFIX))
+            print(f"Live transcripts: {before:,} → {after:,} bytes; archive now {archived:,} bytes")
+
+    elif command == 'list':
+        for name, (container, record) in sorted(load_index(sessions_dir).items()):
+            ratio = record['length'] / record['size'] if record['size'] else 0
+            date = datetime.fromtimestamp(record['mtime']).strftime('%Y-%m-%d %H:%M')
+            print(f"{name}  {date}  {record['size']:>12,} → {record['length']:>10,} ({ratio:.0%})  {os.path.basename(container)}")
+
+    else:
+        restored = unpack(sessions_dir, args[2:])
+        print(f"Restored {len(restored)} session(s)")
+
+
+if __name__ == '__main__':
+    main()
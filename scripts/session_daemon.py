@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Resident session-query daemon.
+
+Keeps the parsed history.jsonl, per-session file metadata and a keyword index of
+every indexed project in memory and answers queries from the session scripts over
+a UNIX domain socket. A background thread polls the projects directory and
+history.jsonl for changes; appended data is indexed incrementally. Every query also
+refreshes the queried project first (a directory scan with stat calls), so answers
+are never staler than the files on disk.
+
+The scripts call query() and fall back to scanning the disk themselves when the
+daemon is not running (or CLAUDE_SESSION_DAEMON=off).
+
+Usage:
+    python3 session_daemon.py start [--foreground] [--interval SECONDS]
+    python3 session_daemon.py stop
+    python3 session_daemon.py status
+
+Protocol: one JSON request line per connection, one JSON response line back.
+    {"op": "ping"}
+    {"op": "history", "project": "/path"}               -> {"sessions_meta": {...}}
+    {"op": "match", "project": "/path", "keywords": []} -> {"sessions_meta": {...}, "matching": [...]}
+    {"op": "sessions", "project": "/path"}              -> {"sessions": {id: {size, mtime}}}
+    {"op": "extract", "files": ["/path/a.jsonl"]}       -> extract_session_data() result
+    {"op": "shutdown"}
+"""
+
+import glob
+import json
+import os
+import re
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from session_archive import archived_members, invalidate_index, open_session, session_stat
+from session_model import add_history_record
+
+
+CLAUDE_DIR = os.path.expanduser('~/.claude')
+SOCKET_PATH = os.path.join(CLAUDE_DIR, 'session-daemon.sock')
+PID_FILE = os.path.join(CLAUDE_DIR, 'session-daemon.pid')
+LOG_FILE = os.path.join(CLAUDE_DIR, 'session-daemon.log')
+HISTORY_FILE = os.path.join(CLAUDE_DIR, 'history.jsonl')
+PROJECTS_DIR = os.path.join(CLAUDE_DIR, 'projects')
+
+CLIENT_TIMEOUT = 30.0
+TOKEN_PATTERN = re.compile(r'\w+')
+EXTRACT_CACHE_SIZE = 64
+
+
+def daemon_enabled() -> bool:
+    return os.environ.get('CLAUDE_SESSION_DAEMON', '').lower() not in ('off', '0', 'no')
+
+
+def query(request: Dict[str, Any], timeout: float = CLIENT_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """
+    Send a request to the daemon.
+
+    Returns the decoded response, or None if the daemon is not running or failed,
+    in which case the caller should do the work itself.
+    """
+    if not daemon_enabled() or not os.path.exists(SOCKET_PATH):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(SOCKET_PATH)
+            sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+            with sock.makefile('rb') as f:
+                line = f.readline()
+    except (OSError, socket.timeout):
+        return None
+
+    if not line:
+        return None
+    response = json.loads(line)
+    if 'error' in response:
+        print(f"Warning: session daemon: {response['error']}", file=sys.stderr)
+        return None
+    return response
+
+
+class SessionIndex:
+    """Keyword postings and file state of one session transcript."""
+
+    __slots__ = ('offset', 'size', 'mtime', 'tokens')
+
+    def __init__(self):
+        self.offset = 0
+        self.size = 0
+        self.mtime = 0.0
+        self.tokens = set()
+
+
+class ProjectIndex:
+    """In-memory keyword index over the sessions of one project."""
+
+    def __init__(self, project_path: str):
+        self.project_path = project_path
+        self.sessions_dir = os.path.join(PROJECTS_DIR, project_path.replace('/', '-'))
+        self.sessions: Dict[str, SessionIndex] = {}
+        self.postings: Dict[str, set] = {}
+        self.archived_loaded = False
+
+    def _add_tokens(self, session_id: str, text: str):
+        index = self.sessions[session_id]
+        for token in set(TOKEN_PATTERN.findall(text.lower())):
+            if token not in index.tokens:
+                index.tokens.add(token)
+                self.postings.setdefault(sys.intern(token), set()).add(session_id)
+
+    def _drop(self, session_id: str):
+        index = self.sessions.pop(session_id, None)
+        if index is None:
+            return
+        for token in index.tokens:
+            ids = self.postings.get(token)
+            if ids is not None:
+                ids.discard(session_id)
+                if not ids:
+                    del self.postings[token]
+
+    def _index_file(self, session_id: str, path: str, size: int, mtime: float):
+        index = self.sessions.get(session_id)
+        if index is not None and size < index.offset:
+            # Rewritten rather than appended; start over
+            self._drop(session_id)
+            index = None
+        if index is None:
+            index = self.sessions[session_id] = SessionIndex()
+
+        with open(path, 'rb') as f:
+            f.seek(index.offset)
+            data = f.read(size - index.offset)
+        # Only index whole lines; a partially written last line is picked up next time
+        end = data.rfind(b'\n') + 1
+        if end:
+            self._add_tokens(session_id, data[:end].decode('utf-8', errors='replace'))
+            index.offset += end
+        index.size = size
+        index.mtime = mtime
+
+    def refresh(self):
+        """Index new and grown session files; forget deleted ones."""
+        if not self.archived_loaded and os.path.isdir(self.sessions_dir):
+            for name, record in archived_members(self.sessions_dir).items():
+                session_id = name[:-len('.jsonl')]
+                self.sessions[session_id] = SessionIndex()
+                with open_session(os.path.join(self.sessions_dir, name)) as f:
+                    self._add_tokens(session_id, f.read())
+                index = self.sessions[session_id]
+                index.offset = index.size = record['size']
+                index.mtime = record['mtime']
+            self.archived_loaded = True
+
+        seen = set()
+        for path in glob.glob(os.path.join(self.sessions_dir, '*.jsonl')):
+            session_id = os.path.basename(path)[:-len('.jsonl')]
+            seen.add(session_id)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            index = self.sessions.get(session_id)
+            if index is None or st.st_size != index.size or st.st_mtime != index.mtime:
+                self._index_file(session_id, path, st.st_size, st.st_mtime)
+
+        vanished = [sid for sid in self.sessions if sid not in seen]
+        if vanished:
+            # Possibly packed into the archive by another process; the content is unchanged
+            invalidate_index(self.sessions_dir)
+        for session_id in vanished:
+            if session_stat(os.path.join(self.sessions_dir, f'{session_id}.jsonl')) is None:
+                self._drop(session_id)
+
+    def match(self, keywords: List[str], candidates) -> set:
+        """Sessions whose transcript contains any keyword (substring semantics)."""
+        matching = set()
+        for kw in keywords:
+            if not kw:
+                continue
+            if TOKEN_PATTERN.fullmatch(kw):
+                # A word-only keyword can only occur inside a single token
+                for token, ids in self.postings.items():
+                    if kw in token:
+                        matching.update(ids)
+            else:
+                parts = TOKEN_PATTERN.findall(kw)
+                possible = set(candidates)
+                for part in parts:
+                    with_part = set()
+                    for token, ids in self.postings.items():
+                        if part in token:
+                            with_part.update(ids)
+                    possible &= with_part
+                # Confirm phrase keywords against the transcript text
+                for session_id in possible - matching:
+                    path = os.path.join(self.sessions_dir, f'{session_id}.jsonl')
+                    with open_session(path) as f:
+                        if kw in f.read().lower():
+                            matching.add(session_id)
+        return matching & set(candidates)
+
+
+class DaemonState:
+    """History and project indexes shared by the request handlers."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.history_offset = 0
+        self.history_size = -1
+        self.history: Dict[str, Dict[str, Dict[str, Any]]] = {}   # project -> sessions_meta
+        self.projects: Dict[str, ProjectIndex] = {}
+        self.extract_cache: Dict[str, Any] = {}
+
+    def refresh_history(self):
+        try:
+            size = os.path.getsize(HISTORY_FILE)
+        except FileNotFoundError:
+            return
+        if size == self.history_size:
+            return
+        if size < self.history_offset:
+            self.history = {}
+            self.history_offset = 0
+
+        with open(HISTORY_FILE, 'rb') as f:
+            f.seek(self.history_offset)
+            data = f.read(size - self.history_offset)
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(entry, dict):
+                continue
+            add_history_record(self.history.setdefault(entry.get('project'), {}), entry)
+        self.history_offset += end
+        self.history_size = size
+
+    def project(self, project_path: str) -> ProjectIndex:
+        index = self.projects.get(project_path)
+        if index is None:
+            index = self.projects[project_path] = ProjectIndex(project_path)
+        index.refresh()
+        return index
+
+    def refresh_all(self):
+        with self.lock:
+            self.refresh_history()
+            for index in self.projects.values():
+                index.refresh()
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get('op')
+        with self.lock:
+            if op == 'ping':
+                return {'ok': True, 'projects': sorted(self.projects), 'pid': os.getpid()}
+
+            if op == 'extract':
+                return self.extract(request['files'])
+
+            project_path = request.get('project')
+            if not project_path:
+                return {'error': f'missing project for {op}'}
+
+            self.refresh_history()
+            sessions_meta = self.history.get(project_path, {})
+
+            if op == 'history':
+                return {'sessions_meta': sessions_meta}
+
+            index = self.project(project_path)
+            if op == 'sessions':
+                return {'sessions': {sid: {'size': s.size, 'mtime': s.mtime}
+                                     for sid, s in index.sessions.items()}}
+            if op == 'match':
+                keywords = request.get('keywords', [])
+                matching = {sid for sid, meta in sessions_meta.items()
+                            if any(kw in meta['first_query'].lower() for kw in keywords)}
+                rest = [sid for sid in sessions_meta if sid not in matching and sid in index.sessions]
+                matching |= index.match(keywords, rest)
+                return {'sessions_meta': sessions_meta, 'matching': sorted(matching)}
+
+        return {'error': f'unknown op {op}'}
+
+    def extract(self, files: List[str]) -> Dict[str, Any]:
+        """extract_session_data() result, cached until one of the files changes."""
+        from extract_session_data import extract_session_data, find_agent_files
+
+        # Sub-agent transcripts can grow while the session file itself is unchanged
+        sources = files + [a for f in files for a in find_agent_files(f)]
+        key = json.dumps([(f, session_stat(f)) for f in sources])
+        result = self.extract_cache.get(key)
+        if result is None:
+            result = extract_session_data(files)
+            if len(self.extract_cache) >= EXTRACT_CACHE_SIZE:
+                self.extract_cache.clear()
+            self.extract_cache[key] = result
+        return {'result': result}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            request = json.loads(line)
+            if request.get('op') == 'shutdown':
+                self.wfile.write(b'{"ok": true}\n')
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+                return
+            response = self.server.state.handle(request)
+        except Exception as e:  # report to the client instead of killing the handler
+            response = {'error': f'{type(e).__name__}: {e}'}
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def watch(state: DaemonState, interval: float, stop: threading.Event):
+    while not stop.wait(interval):
+        try:
+            state.refresh_all()
+        except OSError as e:
+            print(f"Warning: refresh failed: {e}", file=sys.stderr)
+
+
+def serve(interval: float):
+    if os.path.exists(SOCKET_PATH):
+        if query({'op': 'ping'}, timeout=2) is not None:
+            print("Session daemon already running", file=sys.stderr)
+            sys.exit(1)
+        os.remove(SOCKET_PATH)
+
+    state = DaemonState()
+    state.refresh_history()
+
+    server = Server(SOCKET_PATH, RequestHandler)
+    server.state = state
+    os.chmod(SOCKET_PATH, 0o600)
+    with open(PID_FILE, 'w') as f:
+        f.write(str(os.getpid()))
+
+    stop = threading.Event()
+    threading.Thread(target=watch, args=(state, interval, stop), daemon=True).start()
+    print(f"Session daemon listening on {SOCKET_PATH}", flush=True)
+
+    try:
+        server.serve_forever()
+    finally:
+        stop.set()
+        server.server_close()
+        for path in (SOCKET_PATH, PID_FILE):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('start', 'stop', 'status'):
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    foreground = '--foreground' in args
+    interval = 2.0
+    if '--interval' in args:
+        value = args[args.index('--interval') + 1:][:1]
+        if not value or not value[0].replace('.', '', 1).isdigit():
+            print(__doc__)
+            sys.exit(1)
+        interval = float(value[0])
+
+    if command == 'start':
+        if foreground:
+            serve(interval)
+            return
+        with open(LOG_FILE, 'a') as log:
+            subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), 'start', '--foreground', '--interval', str(interval)],
+                stdout=log, stderr=log, stdin=subprocess.DEVNULL, start_new_session=True
+            )
+        for _ in range(50):
+            time.sleep(0.1)
+            if query({'op': 'ping'}, timeout=1) is not None:
+                print(f"Session daemon started ({SOCKET_PATH})")
+                return
+        print(f"Error: daemon did not start, see {LOG_FILE}", file=sys.stderr)
+        sys.exit(1)
+
+    elif command == 'stop':
+        if query({'op': 'shutdown'}, timeout=2) is None:
+            print("Session daemon not running")
+        else:
+            print("Session daemon stopped")
+
+    else:
+        status = query({'op': 'ping'}, timeout=2)
+        if status is None:
+            print("Session daemon not running")
+            sys.exit(1)
+        print(f"Session daemon running (pid {status['pid']}), indexed projects: {', '.join(status['projects']) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
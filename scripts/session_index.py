@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Cached session index and logical-session grouping for one project.
+
+Keeps a per-project index (~/.claude/session-index/<project-name>.json) of every
+session transcript (live or archived, excluding agent-*.jsonl) with its size, mtime,
+first and last entry timestamps, first prompt, and whether it opens with a
+context-compression continuation. Sessions are grouped into logical sessions:
+
+  - a continuation joins the group of the session it continues (the session whose
+    last entry most closely precedes it), even across days
+  - otherwise a session joins the previous group when it starts on the same day
+    within 2 hours of that group's last entry
+
+A group's id is the id of its first session and does not change as the group grows.
+
+Refreshing does not stat every file: the directory mtime reveals added or removed
+files, and only the most recently written sessions (the ones that can still grow)
+are re-checked. Use --rescan after resuming an old session. Lookups by time window
+bisect the sorted group starts.
+
+Usage:
+    python3 session_index.py latest [--project <project_path>]
+    python3 session_index.py mark [--project <project_path>]
+    python3 session_index.py current [--project <project_path>]
+    python3 session_index.py groups [--project <project_path>] [--day YYYY-MM-DD | --week YYYY-Www]
+    (all commands accept --rescan)
+
+Commands:
+    latest   Print the most recently written session file
+    mark     Write session-start-marker.txt for the latest session (/start-work)
+    current  JSON for the logical session to log: everything since the marker, or
+             the group containing the latest session
+    groups   JSON list of logical sessions overlapping a day or ISO week
+             (default: the day of the latest session)
+
+Example:
+    python3 session_index.py groups --project /home/vedat/t/atlassian --week 2025-W49
+"""
+
+import bisect
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional
+
+from session_archive import archived_members, invalidate_index, session_stat
+from session_model import iter_entries, parse_timestamp
+
+
+INDEX_DIR = os.path.expanduser('~/.claude/session-index')
+INDEX_VERSION = 1
+MARKER_FILE = 'session-start-marker.txt'
+
+GROUP_GAP = 2 * 3600
+ACTIVE_TAIL = 8
+CONVERSATION_TYPES = frozenset({'user', 'assistant'})
+
+
+def sessions_dir_for(project_path: str) -> str:
+    return os.path.expanduser(f"~/.claude/projects/{project_path.replace('/', '-')}")
+
+
+def is_session_file(name: str) -> bool:
+    return name.endswith('.jsonl') and not name.startswith('agent-')
+
+
+def format_epoch(seconds: Optional[float]) -> Optional[str]:
+    if seconds is None:
+        return None
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def scan_session(path: str) -> Dict[str, Any]:
+    """First/last entry timestamps, first prompt and continuation flag of a transcript."""
+    first = last = None
+    title = ''
+    continuation = None
+    for entry in iter_entries(path, CONVERSATION_TYPES):
+        if entry.timestamp:
+            seconds = parse_timestamp(entry.timestamp).timestamp()
+            if first is None:
+                first = seconds
+            last = seconds
+        if entry.type == 'user' and entry.message.kind in ('prompt', 'continuation'):
+            if continuation is None:
+                continuation = entry.message.kind == 'continuation'
+            if not title and entry.message.kind == 'prompt':
+                title = entry.message.text[:100]
+    return {'first': first, 'last': last, 'title': title, 'continuation': bool(continuation)}
+
+
+class SessionIndex:
+    """Persistent session metadata and logical-session groups for one project."""
+
+    def __init__(self, project_path: str, index_dir: str = INDEX_DIR):
+        self.project_path = project_path
+        self.sessions_dir = sessions_dir_for(project_path)
+        self.path = os.path.join(index_dir, project_path.replace('/', '-') + '.json')
+        self.dir_mtime = None
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.groups: List[Dict[str, Any]] = []
+        self.dirty = False
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                self.dir_mtime = data['dir_mtime']
+                self.sessions = data['sessions']
+                self.groups = data['groups']
+        self._derive()
+
+    def session_path(self, session_id: str) -> str:
+        return os.path.join(self.sessions_dir, f'{session_id}.jsonl')
+
+    def _index(self, session_id: str, stat: Dict[str, Any]):
+        record = scan_session(self.session_path(session_id))
+        record.update(size=stat['size'], mtime=stat['mtime'])
+        self.sessions[session_id] = record
+        self.dirty = True
+
+    def refresh(self, rescan: bool = False) -> int:
+        """
+        Bring the index up to date.
+
+        Returns:
+            Number of sessions added, re-read or removed
+        """
+        try:
+            dir_mtime = os.stat(self.sessions_dir).st_mtime
+        except FileNotFoundError:
+            return 0
+
+        changed = 0
+        check = set(self._by_mtime[-ACTIVE_TAIL:])
+        if rescan or dir_mtime != self.dir_mtime:
+            invalidate_index(self.sessions_dir)
+            present = {name[:-len('.jsonl')] for name in os.listdir(self.sessions_dir) if is_session_file(name)}
+            present |= {name[:-len('.jsonl')] for name in archived_members(self.sessions_dir) if is_session_file(name)}
+            for session_id in [sid for sid in self.sessions if sid not in present]:
+                del self.sessions[session_id]
+                changed += 1
+            check |= present if rescan else present - set(self.sessions)
+            self.dir_mtime = dir_mtime
+            self.dirty = True
+
+        changed += self._check(check)
+        if changed:
+            self._group()
+        self._derive()
+        return changed
+
+    def _check(self, session_ids) -> int:
+        """Re-read the given sessions whose size or mtime changed; drop vanished ones."""
+        changed = 0
+        for session_id in session_ids:
+            stat = session_stat(self.session_path(session_id))
+            cached = self.sessions.get(session_id)
+            if stat is None:
+                if cached is not None:
+                    del self.sessions[session_id]
+                    changed += 1
+                continue
+            if cached is None or cached['size'] != stat['size'] or cached['mtime'] != stat['mtime']:
+                self._index(session_id, stat)
+                changed += 1
+        return changed
+
+    def recheck(self, session_ids: List[str]) -> int:
+        """
+        Re-check specific sessions, e.g. older ones outside the recently written tail
+        that refresh() looks at, and regroup if any of them changed.
+
+        Returns:
+            Number of sessions re-read or removed
+        """
+        changed = self._check(session_ids)
+        if changed:
+            self._group()
+            self._derive()
+        return changed
+
+    def _group(self):
+        """Recompute the logical-session groups from the session records."""
+        timed = sorted((r['first'], sid) for sid, r in self.sessions.items() if r['first'] is not None)
+        ends: List[tuple] = []              # sorted (last, session_id) of sessions seen so far
+        group_of: Dict[str, Dict[str, Any]] = {}
+        groups: List[Dict[str, Any]] = []
+
+        for first, session_id in timed:
+            record = self.sessions[session_id]
+            target = None
+            if record['continuation']:
+                pos = bisect.bisect_right(ends, (first, '\uffff')) - 1
+                if pos >= 0:
+                    target = group_of[ends[pos][1]]
+            if target is None and groups:
+                previous = groups[-1]
+                same_day = (datetime.fromtimestamp(first).date()
+                            == datetime.fromtimestamp(previous['end']).date())
+                if same_day and first - previous['end'] <= GROUP_GAP:
+                    target = previous
+
+            if target is None:
+                target = {'id': session_id, 'start': first, 'end': record['last'], 'sessions': []}
+                groups.append(target)
+            target['sessions'].append(session_id)
+            target['end'] = max(target['end'], record['last'])
+            group_of[session_id] = target
+            bisect.insort(ends, (record['last'], session_id))
+
+        self.groups = groups
+        self.dirty = True
+
+    def _derive(self):
+        """Lookup structures: group starts, running maximum of group ends, sessions by mtime."""
+        self._by_mtime = sorted(self.sessions, key=lambda sid: self.sessions[sid]['mtime'])
+        self._starts = [g['start'] for g in self.groups]
+        self._max_ends = []
+        running = float('-inf')
+        for g in self.groups:
+            running = max(running, g['end'])
+            self._max_ends.append(running)
+        self._group_of = {sid: g for g in self.groups for sid in g['sessions']}
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'version': INDEX_VERSION,
+                'dir_mtime': self.dir_mtime,
+                'sessions': self.sessions,
+                'groups': self.groups,
+            }, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def latest(self) -> Optional[str]:
+        """Id of the most recently written session."""
+        return self._by_mtime[-1] if self._by_mtime else None
+
+    def group_of(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._group_of.get(session_id)
+
+    def groups_between(self, start: float, end: float) -> List[Dict[str, Any]]:
+        """Groups with activity overlapping [start, end), in start order."""
+        first = bisect.bisect_left(self._max_ends, start)
+        stop = bisect.bisect_left(self._starts, end)
+        return [g for g in self.groups[first:stop] if g['end'] >= start]
+
+    def sessions_since(self, since: float) -> List[str]:
+        """Sessions with entries at or after `since`, in start order."""
+        return [sid for g in self.groups_between(since, float('inf')) for sid in g['sessions']
+                if self.sessions[sid]['last'] >= since]
+
+    def describe(self, group: Dict[str, Any], session_ids: Optional[List[str]] = None) -> Dict[str, Any]:
+        """JSON-ready view of a group (or of a subset of its sessions)."""
+        session_ids = session_ids or group['sessions']
+        records = [self.sessions[sid] for sid in session_ids]
+        # Sessions without timestamps (e.g. only a summary line) have no first/last
+        firsts = [r['first'] for r in records if r['first'] is not None]
+        lasts = [r['last'] for r in records if r['last'] is not None]
+        return {
+            'id': group['id'],
+            'title': self.sessions[group['id']]['title'],
+            'start': format_epoch(min(firsts)) if firsts else None,
+            'end': format_epoch(max(lasts)) if lasts else None,
+            'sessions': session_ids,
+            'continuations': sum(1 for r in records if r['continuation']),
+            'files': [self.session_path(sid) for sid in session_ids],
+        }
+
+
+def open_index(project_path: str, rescan: bool = False) -> SessionIndex:
+    """Load, refresh and save the index of a project."""
+    index = SessionIndex(project_path)
+    index.refresh(rescan)
+    index.save()
+    return index
+
+
+def read_marker(sessions_dir: str) -> Optional[Dict[str, Any]]:
+    """The session file and start time written by write_marker(), if any."""
+    path = os.path.join(sessions_dir, MARKER_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        name, _, timestamp = f.read().strip().partition('|')
+    return {'session': name[:-len('.jsonl')], 'timestamp': timestamp}
+
+
+def write_marker(index: SessionIndex) -> Optional[str]:
+    """Mark the latest session as the start of a new logical work session."""
+    session_id = index.latest()
+    if session_id is None:
+        return None
+    now = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+    with open(os.path.join(index.sessions_dir, MARKER_FILE), 'w') as f:
+        f.write(f'{session_id}.jsonl|{now}\n')
+    return session_id
+
+
+def current_session(index: SessionIndex) -> Optional[Dict[str, Any]]:
+    """The logical session to log: everything since the marker, else the latest group."""
+    marker = read_marker(index.sessions_dir)
+    if marker and marker['timestamp']:
+        since = parse_timestamp(marker['timestamp']).timestamp()
+        session_ids = index.sessions_since(since)
+        if marker['session'] in index.sessions and marker['session'] not in session_ids:
+            session_ids.insert(0, marker['session'])
+        if session_ids:
+            group = index.group_of(session_ids[0]) or {'id': session_ids[0]}
+            described = index.describe(group, session_ids)
+            described['marker'] = marker
+            return described
+
+    latest = index.latest()
+    group = index.group_of(latest) if latest else None
+    return index.describe(group) if group else None
+
+
+def window(day: Optional[str], week: Optional[str], index: SessionIndex):
+    """[start, end) epoch seconds of a local day or ISO week; ValueError if either is malformed."""
+    if week:
+        start = datetime.strptime(week + '-1', '%G-W%V-%u')
+        return start.timestamp(), (start + timedelta(days=7)).timestamp()
+    if day:
+        start = datetime.strptime(day, '%Y-%m-%d')
+    else:
+        latest = index.latest()
+        last = index.sessions[latest]['last'] if latest else None
+        start = datetime.fromtimestamp(last) if last else datetime.now()
+        start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] not in ('latest', 'mark', 'current', 'groups'):
+        print(__doc__)
+        sys.exit(1)
+
+    command = args[0]
+    project_path = os.getcwd()
+    day = week = None
+    rescan = False
+
+    i = 1
+    while i < len(args):
+        if args[i] == '--project' and i + 1 < len(args):
+            project_path = args[i + 1]
+            i += 2
+        elif args[i] == '--day' and i + 1 < len(args):
+            day = args[i + 1]
+            i += 2
+        elif args[i] == '--week' and i + 1 < len(args):
+            week = args[i + 1]
+            i += 2
+        elif args[i] == '--rescan':
+            rescan = True
+            i += 1
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    try:
+        if week:
+            datetime.strptime(week + '-1', '%G-W%V-%u')
+        if day:
+            datetime.strptime(day, '%Y-%m-%d')
+    except ValueError:
+        print(__doc__)
+        sys.exit(1)
+
+    index = open_index(project_path, rescan)
+    if not os.path.isdir(index.sessions_dir):
+        print(f"Error: Sessions directory not found: {index.sessions_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    if command == 'latest':
+        latest = index.latest()
+        if latest is None:
+            sys.exit(1)
+        print(index.session_path(latest))
+
+    elif command == 'mark':
+        session_id = write_marker(index)
+        if session_id is None:
+            print("Error: no session files found", file=sys.stderr)
+            sys.exit(1)
+        print(f"Session file: {session_id}.jsonl")
+        print(f"Marker created: {os.path.join(index.sessions_dir, MARKER_FILE)}")
+
+    elif command == 'current':
+        print(json.dumps(current_session(index), indent=2))
+
+    else:
+        start, end = window(day, week, index)
+        print(json.dumps([index.describe(g) for g in index.groups_between(start, end)], indent=2))
+
+
+if __name__ == '__main__':
+    main()
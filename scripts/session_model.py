@@ -0,0 +1,299 @@
+"""
+Shared session model for the Claude Code session scripts.
+
+Parses session JSONL files into compact `__slots__` records instead of keeping the raw
+nested dicts around, and holds the single definition of how message text is extracted
+and how system messages are recognized.
+
+Records:
+    Entry     One JSONL line: type, timestamp, uuid, session id and (for user and
+              assistant lines) a Message
+    Message   Role, cleaned text, message kind and tool calls
+    ToolCall  Tool name, input and tool_use id
+
+Message kinds:
+    prompt        A real user prompt (or assistant text)
+    command       Slash command or command infrastructure output
+    system        Only system reminders, caveats or other injected text
+    interrupted   "[Request interrupted by user]"
+    continuation  Context-compression continuation ("This session is being continued ...")
+    empty         No text at all (e.g. tool results only)
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime
+from typing import List, Dict, Any, Iterator, Optional
+
+from profiler import PROFILER
+from session_archive import open_session, session_exists
+
+
+CONTINUATION_MARKER = 'This session is being continued from a previous conversation'
+INTERRUPTED_MARKER = 'Request interrupted by user'
+
+# Injected markup removed from message text. Order matters: user-memory-input keeps
+# its content, everything else is dropped.
+_CLEANUP_PATTERNS = [
+    (re.compile(r'<command-name>.*?</command-name>', re.DOTALL), ''),
+    (re.compile(r'<command-message>.*?</command-message>', re.DOTALL), ''),
+    (re.compile(r'<command-args>.*?</command-args>', re.DOTALL), ''),
+    (re.compile(r'<local-command-stdout>.*?</local-command-stdout>', re.DOTALL), ''),
+    (re.compile(r'<user-memory-input>(.*?)</user-memory-input>', re.DOTALL), r'\1'),
+    (re.compile(r'Caveat:.*?user explicitly asks you to\.', re.DOTALL), ''),
+    (re.compile(r'<system-reminder>.*?</system-reminder>', re.DOTALL), ''),
+]
+
+
+def parse_timestamp(ts_str: str) -> Optional[datetime]:
+    """Parse ISO timestamp string to datetime object."""
+    if not ts_str:
+        return None
+    return datetime.fromisoformat(ts_str.replace('Z', '+00:00'))
+
+
+def clean_text(text: str) -> str:
+    """Strip command markup, caveats and system reminders from message text."""
+    if '<' not in text and 'Caveat:' not in text:
+        return text.strip()
+    if PROFILER.enabled:
+        start = time.perf_counter()
+        size = len(text)
+    for pattern, replacement in _CLEANUP_PATTERNS:
+        text = pattern.sub(replacement, text)
+    if PROFILER.enabled:
+        PROFILER.add('regex_clean', time.perf_counter() - start, size)
+    return text.strip()
+
+
+def classify_text(raw: str, cleaned: str) -> str:
+    """Determine the message kind from raw and cleaned text."""
+    if not raw:
+        return 'empty'
+    if INTERRUPTED_MARKER in raw:
+        return 'interrupted'
+    if CONTINUATION_MARKER in raw:
+        return 'continuation'
+    if raw.startswith('<command-') or raw.startswith('<local-command-') or cleaned.startswith('/'):
+        return 'command'
+    if not cleaned or cleaned.startswith('Caveat:'):
+        return 'system'
+    return 'prompt'
+
+
+class ToolCall:
+    """A tool_use block from an assistant message."""
+
+    __slots__ = ('id', 'name', 'input')
+
+    def __init__(self, id: str, name: str, input: Dict[str, Any]):
+        self.id = id
+        self.name = name
+        self.input = input
+
+
+class Message:
+    """The message payload of a user or assistant entry."""
+
+    __slots__ = ('role', 'text', 'kind', 'tool_calls')
+
+    def __init__(self, role: str, text: str, kind: str, tool_calls: List[ToolCall]):
+        self.role = role
+        self.text = text
+        self.kind = kind
+        self.tool_calls = tool_calls
+
+    @property
+    def is_prompt(self) -> bool:
+        return self.kind == 'prompt'
+
+
+class Entry:
+    """One line of a session JSONL file."""
+
+    __slots__ = ('type', 'timestamp', 'uuid', 'session_id', 'message')
+
+    def __init__(self, type: str, timestamp: str, uuid: Optional[str], session_id: Optional[str],
+                 message: Optional[Message]):
+        self.type = type
+        self.timestamp = timestamp
+        self.uuid = uuid
+        self.session_id = session_id
+        self.message = message
+
+
+_NO_TOOLS: List[ToolCall] = []
+
+
+def parse_content(content: Any):
+    """
+    Split message content into joined text and tool calls.
+
+    Content is either a plain string or a list of blocks; all text blocks are joined
+    with a space.
+
+    Returns:
+        (raw_text, tool_calls)
+    """
+    if isinstance(content, str):
+        return content, _NO_TOOLS
+
+    if not isinstance(content, list):
+        return '', _NO_TOOLS
+
+    texts = []
+    tool_calls = _NO_TOOLS
+    for item in content:
+        if isinstance(item, dict):
+            block_type = item.get('type')
+            if block_type == 'text':
+                texts.append(item.get('text', ''))
+            elif block_type == 'tool_use':
+                if tool_calls is _NO_TOOLS:
+                    tool_calls = []
+                tool_calls.append(ToolCall(
+                    item.get('id'),
+                    sys.intern(item.get('name') or ''),
+                    item.get('input') or {}
+                ))
+        elif isinstance(item, str):
+            texts.append(item)
+
+    return ' '.join(texts), tool_calls
+
+
+def parse_entry(raw: Dict[str, Any]) -> Entry:
+    """Convert a decoded JSONL line into an Entry."""
+    entry_type = raw.get('type') or ''
+    message = None
+
+    if entry_type == 'user' or entry_type == 'assistant':
+        payload = raw.get('message')
+        content = payload.get('content') if isinstance(payload, dict) else None
+        text, tool_calls = parse_content(content)
+        cleaned = clean_text(text) if text else ''
+        message = Message(entry_type, cleaned, classify_text(text, cleaned), tool_calls)
+
+    return Entry(
+        sys.intern(entry_type),
+        raw.get('timestamp'),
+        raw.get('uuid'),
+        raw.get('sessionId'),
+        message
+    )
+
+
+def iter_entries(path: str, types: Optional[frozenset] = None) -> Iterator[Entry]:
+    """
+    Stream entries from a session JSONL file (live or archived).
+
+    Args:
+        path: Path to the JSONL file
+        types: Optional set of entry types to keep (e.g. {'user', 'assistant'})
+
+    Undecodable lines are skipped.
+    """
+    if PROFILER.enabled:
+        yield from _iter_entries_profiled(path, types)
+        return
+
+    loads = json.loads
+    with open_session(path) as f:
+        for line in f:
+            if not line or line.isspace():
+                continue
+            try:
+                raw = loads(line)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(raw, dict):
+                continue
+            if types is not None and raw.get('type') not in types:
+                continue
+            yield parse_entry(raw)
+
+
+def _iter_entries_profiled(path: str, types: Optional[frozenset]) -> Iterator[Entry]:
+    """iter_entries() with file reads and JSON decoding timed separately."""
+    loads = json.loads
+    perf_counter = time.perf_counter
+    with open_session(path) as f:
+        readline = f.readline
+        while True:
+            start = perf_counter()
+            line = readline()
+            PROFILER.add('file_read', perf_counter() - start, len(line))
+            if not line:
+                break
+            if line.isspace():
+                continue
+            start = perf_counter()
+            try:
+                raw = loads(line)
+            except json.JSONDecodeError:
+                continue
+            finally:
+                PROFILER.add('json_decode', perf_counter() - start, len(line))
+            if not isinstance(raw, dict):
+                continue
+            if types is not None and raw.get('type') not in types:
+                continue
+            yield parse_entry(raw)
+
+
+def load_entries(paths: List[str], types: Optional[frozenset] = None) -> List[Entry]:
+    """Load entries from several session files, warning about missing ones."""
+    entries = []
+    for path in paths:
+        if not session_exists(path):
+            print(f"Warning: {path} not found", file=sys.stderr)
+            continue
+        entries.extend(iter_entries(path, types))
+    return entries
+
+
+def add_history_record(sessions_meta: Dict[str, Dict[str, Any]], entry: Dict[str, Any]):
+    """Fold one history.jsonl record into the per-session metadata."""
+    session_id = entry.get('sessionId')
+    if not session_id:
+        return
+    timestamp = entry.get('timestamp', 0)
+    meta = sessions_meta.get(session_id)
+    if meta is None:
+        sessions_meta[session_id] = {
+            'first_query': entry.get('display', ''),
+            'timestamp': timestamp,
+            'last_timestamp': timestamp,
+            'queries': 1,
+        }
+    else:
+        meta['last_timestamp'] = max(meta['last_timestamp'], timestamp)
+        meta['queries'] += 1
+
+
+def read_history(history_file: str, project_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the history.jsonl records of every session in a project.
+
+    Returns:
+        {session_id: {'first_query': str, 'timestamp': int (ms), 'last_timestamp': int (ms),
+                      'queries': int}}
+    """
+    sessions_meta = {}
+    if not os.path.exists(history_file):
+        return sessions_meta
+
+    loads = json.loads
+    with open(history_file, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            try:
+                entry = loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(entry, dict) and entry.get('project') == project_path:
+                add_history_record(sessions_meta, entry)
+
+    return sessions_meta
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+BM25 relevance ranking of Claude Code sessions.
+
+Sessions are scored with BM25F over two fields: the user and assistant message text
+of the transcript, and the first query from history.jsonl (boosted). Term statistics
+are kept in a per-project store (~/.claude/term-stats/<project-name>.json) that is
+updated incrementally: only sessions whose size or mtime changed are re-read. The
+store keeps a postings list per term and a sorted vocabulary, so query terms are
+expanded by binary search and only the sessions containing a matching term are
+scored.
+
+Query terms match as prefixes of indexed terms ("auth" also scores "authentication").
+
+Usage:
+    python3 session_search.py <keywords> [--project <project_path>] [--top K] [--min-score X]
+
+Example:
+    python3 session_search.py "oauth,login" --project /home/vedat/t/myproject --top 10
+"""
+
+import bisect
+import json
+import math
+import os
+import re
+import sys
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from session_archive import session_stat
+from session_model import iter_entries, read_history
+
+
+STORE_DIR = os.path.expanduser('~/.claude/term-stats')
+STORE_VERSION = 3
+
+# BM25F parameters
+K1 = 1.2
+B = 0.75
+TITLE_BOOST = 3.0
+
+TERM_PATTERN = re.compile(r'\w+')
+CONVERSATION_TYPES = frozenset({'user', 'assistant'})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word terms, skipping single characters and bare numbers."""
+    return [t for t in TERM_PATTERN.findall(text.lower()) if len(t) > 1 and not t.isdigit()]
+
+
+def term_counts(terms: List[str]) -> Dict[str, int]:
+    counts = {}
+    for t in terms:
+        counts[t] = counts.get(t, 0) + 1
+    return counts
+
+
+def query_terms(keywords: List[str]) -> List[str]:
+    """Split comma-separated keywords (possibly multi-word) into unique query terms."""
+    terms = []
+    for kw in keywords:
+        for t in tokenize(kw):
+            if t not in terms:
+                terms.append(t)
+    return terms
+
+
+class TermStore:
+    """
+    Persistent per-session term statistics for one project.
+
+    Layout: {"version": 3, "postings": {term: [session_id]}, "vocabulary": [sorted terms],
+    "total_length": float, "sessions": {session_id: {"size", "mtime", "length",
+    "tf": {term: count}, "title_length", "title_tf": {term: count}}}}
+
+    Postings (whose lengths are the document frequencies), the sorted vocabulary and
+    the total field length are maintained incrementally as sessions are added,
+    replaced or dropped, so ranking never walks the whole store.
+    """
+
+    def __init__(self, project_path: str, store_dir: str = STORE_DIR):
+        self.project_path = project_path
+        self.path = os.path.join(store_dir, project_path.replace('/', '-') + '.json')
+        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.postings: Dict[str, List[str]] = {}
+        self.vocabulary: List[str] = []
+        self.total_length = 0.0
+        self.dirty = False
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == STORE_VERSION:
+                self.sessions = data['sessions']
+                self.postings = data['postings']
+                self.vocabulary = data['vocabulary']
+                self.total_length = data['total_length']
+
+    @staticmethod
+    def _field_length(stats: Dict[str, Any]) -> float:
+        return stats['length'] + TITLE_BOOST * stats['title_length']
+
+    def _remove(self, session_id: str):
+        stats = self.sessions.pop(session_id, None)
+        if stats is None:
+            return
+        for term in set(stats['tf']) | set(stats['title_tf']):
+            sessions = self.postings.get(term)
+            if sessions is None:
+                continue
+            sessions.remove(session_id)
+            if not sessions:
+                del self.postings[term]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+        self.total_length -= self._field_length(stats)
+        self.dirty = True
+
+    def _add(self, session_id: str, stats: Dict[str, Any]):
+        self.sessions[session_id] = stats
+        for term in set(stats['tf']) | set(stats['title_tf']):
+            sessions = self.postings.get(term)
+            if sessions is None:
+                self.postings[term] = [session_id]
+                bisect.insort(self.vocabulary, term)
+            else:
+                sessions.append(session_id)
+        self.total_length += self._field_length(stats)
+        self.dirty = True
+
+    def update(self, sessions_dir: str, sessions_meta: Dict[str, Dict[str, Any]],
+               candidates: Optional[Set[str]] = None) -> int:
+        """
+        Bring the store up to date for the sessions in sessions_meta.
+
+        With candidates, only those sessions are re-read; the rest keep their
+        (possibly stale) statistics until a later unrestricted update.
+
+        Returns:
+            Number of sessions (re)indexed
+        """
+        indexed = 0
+        for session_id in (sessions_meta if candidates is None else candidates):
+            meta = sessions_meta[session_id]
+            path = os.path.join(sessions_dir, f'{session_id}.jsonl')
+            stat = session_stat(path)
+            if stat is None:
+                self._remove(session_id)
+                continue
+
+            cached = self.sessions.get(session_id)
+            if cached and cached['size'] == stat['size'] and cached['mtime'] == stat['mtime']:
+                continue
+
+            body = []
+            for entry in iter_entries(path, CONVERSATION_TYPES):
+                if entry.message.kind == 'prompt':
+                    body.extend(tokenize(entry.message.text))
+            title = tokenize(meta.get('first_query', ''))
+
+            self._remove(session_id)
+            self._add(session_id, {
+                'size': stat['size'],
+                'mtime': stat['mtime'],
+                'length': len(body),
+                'tf': term_counts(body),
+                'title_length': len(title),
+                'title_tf': term_counts(title),
+            })
+            indexed += 1
+
+        # Sessions no longer in history are dropped as well
+        for session_id in [sid for sid in self.sessions if sid not in sessions_meta]:
+            self._remove(session_id)
+
+        return indexed
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'version': STORE_VERSION,
+                'postings': self.postings,
+                'vocabulary': self.vocabulary,
+                'total_length': self.total_length,
+                'sessions': self.sessions,
+            }, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def rank(self, keywords: List[str], top: int = 0, min_score: float = 0.0,
+             candidates: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+        """
+        Score sessions (all, or only the candidates) against the keywords with BM25F.
+
+        Returns:
+            [(session_id, score)] with score > min_score, best first, at most top (0 = all)
+        """
+        n = len(self.sessions)
+        if not n:
+            return []
+
+        vocabulary = self.vocabulary
+
+        # Expand each query term to the indexed terms it prefixes
+        expanded = set()
+        for term in query_terms(keywords):
+            i = bisect.bisect_left(vocabulary, term)
+            while i < len(vocabulary) and vocabulary[i].startswith(term):
+                expanded.add(vocabulary[i])
+                i += 1
+
+        idf = {}
+        matching = set()
+        for term in expanded:
+            sessions = self.postings[term]
+            df = len(sessions)
+            idf[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            matching.update(sessions)
+        if candidates is not None:
+            matching &= candidates
+        avg_length = self.total_length / n or 1.0
+
+        scores = []
+        for session_id in sorted(matching):
+            stats = self.sessions[session_id]
+            length = self._field_length(stats)
+            norm = K1 * (1 - B + B * length / avg_length)
+            score = 0.0
+            for term in expanded:
+                tf = stats['tf'].get(term, 0) + TITLE_BOOST * stats['title_tf'].get(term, 0)
+                if tf:
+                    score += idf[term] * tf * (K1 + 1) / (tf + norm)
+            if score > min_score:
+                scores.append((session_id, score))
+
+        scores.sort(key=lambda x: x[1], reverse=True)
+        return scores[:top] if top else scores
+
+
+def rank_sessions(project_path: str, sessions_dir: str, sessions_meta: Dict[str, Dict[str, Any]],
+                  keywords: List[str], top: int = 0, min_score: float = 0.0,
+                  candidates: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+    """Update the project's term store and rank its sessions (or only the candidates)."""
+    store = TermStore(project_path)
+    store.update(sessions_dir, sessions_meta, candidates)
+    store.save()
+    return store.rank(keywords, top, min_score, candidates)
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0].startswith('--'):
+        print(__doc__)
+        sys.exit(1)
+
+    keywords = [k.strip().lower() for k in args[0].split(',')]
+    project_path = os.getcwd()
+    top = 20
+    min_score = 0.0
+
+    i = 1
+    while i < len(args):
+        if args[i] == '--project' and i + 1 < len(args):
+            project_path = args[i + 1]
+            i += 2
+        elif args[i] == '--top' and i + 1 < len(args) and args[i + 1].isdigit():
+            top = int(args[i + 1])
+            i += 2
+        elif args[i] == '--min-score' and i + 1 < len(args) and args[i + 1].replace('.', '', 1).isdigit():
+            min_score = float(args[i + 1])
+            i += 2
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    sessions_dir = os.path.expanduser(f"~/.claude/projects/{project_path.replace('/', '-')}/")
+    sessions_meta = read_history(os.path.expanduser('~/.claude/history.jsonl'), project_path)
+    for rank, (session_id, score) in enumerate(
+            rank_sessions(project_path, sessions_dir, sessions_meta, keywords, top, min_score), 1):
+        print(f"{rank:3}. {score:7.3f}  {session_id}  {sessions_meta[session_id]['first_query'][:70]}")
+
+
+if __name__ == '__main__':
+    main()
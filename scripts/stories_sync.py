@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Change-detecting sync planner for stories.md (/sync-jira).
+
+Parses the :jira: stories of an epic's stories.md into normalized records (title,
+description without the Implementation Guide, status, synced metadata, depends_on
+links) and compares per-field hashes with the snapshot of the last sync
+(~/.claude/story-sync/<epic-id>.json). Only what changed goes into the plan, grouped
+into batches:
+
+    create      new stories (PRND-{tbd-N}), with epic link, bulk-created 50 per batch
+    update      changed title, description or metadata, per story
+    transition  status changes, one batch per target status
+    link        "is blocked by" links added or removed from depends_on
+
+Unchanged stories cost no remote call, so a routine sync is a handful of calls.
+After the plan has been executed, `commit` replaces the placeholders in stories.md
+with the created keys and records the new snapshot. `sync` plans, executes and
+commits in one go against a local fake tracker (a JSON file), for trying out and
+testing the flow without JIRA; --verify first reads the tracked issues back in one
+search and re-plans fields that drifted from the snapshot.
+
+Usage:
+    python3 stories_sync.py plan <stories.md> <epic-id> [--force] [--status-only] [--json]
+    python3 stories_sync.py commit <stories.md> <epic-id> [--created <placeholder>=<key>]... [--status-only]
+    python3 stories_sync.py sync <stories.md> <epic-id> --fake <tracker.json> [--force] [--status-only] [--verify]
+
+Example:
+    python3 stories_sync.py plan epics/PRND-12345-trouble-ticket-api/stories.md PRND-12345
+    python3 stories_sync.py commit epics/PRND-12345-trouble-ticket-api/stories.md PRND-12345 --created "PRND-{tbd-1}=PRND-45001"
+"""
+
+import hashlib
+import json
+import os
+import re
+import sys
+from typing import Dict, Any, List, Optional
+
+
+SNAPSHOT_DIR = os.path.expanduser('~/.claude/story-sync')
+SNAPSHOT_VERSION = 1
+CREATE_BATCH_SIZE = 50
+
+STATUS_MAP = {
+    'BACKLOG': 'To Do',
+    'DOING': 'In Progress',
+    'HELD': 'Blocked',
+    'REVIEWING': 'In Review',
+    'DONE': 'Done',
+}
+# Metadata keys mirrored to JIRA (start time, duration); the rest stays local
+SYNCED_METADATA = ('started', 'duration')
+HASHED_FIELDS = ('title', 'description', 'metadata', 'status')
+
+HEADING_PATTERN = re.compile(
+    r'^#{1,6} \[(' + '|'.join(STATUS_MAP) + r')\] (\S+?): (.*?)((?:\s+:[\w-]+:)*)\s*$')
+METADATA_PATTERN = re.compile(r'^<!--(.*?)-->\s*$')
+ANCHOR_PATTERN = re.compile(r'^<a id="[^"]*"></a>\s*$')
+GUIDE_PATTERN = re.compile(r'^#{2,6} Implementation Guide\s*$')
+KEY_PATTERN = re.compile(r'[A-Z][A-Z0-9]+-(?:\{tbd-\d+\}|\d+)')
+PLACEHOLDER_PATTERN = re.compile(r'^[A-Z][A-Z0-9]+-\{tbd-\d+\}$')
+
+
+def is_placeholder(key: str) -> bool:
+    return bool(PLACEHOLDER_PATTERN.match(key))
+
+
+def parse_metadata(line: str) -> Optional[Dict[str, str]]:
+    """`<!-- key: value | key2: value2 -->` as a dict, or None for other lines."""
+    match = METADATA_PATTERN.match(line.strip())
+    if not match or ':' not in match.group(1):
+        return None
+    metadata = {}
+    for part in match.group(1).split('|'):
+        key, sep, value = part.partition(':')
+        if sep:
+            metadata[key.strip()] = value.strip()
+    return metadata
+
+
+def normalize_text(lines: List[str]) -> str:
+    """Body text with trailing whitespace and blank-line runs normalized."""
+    text = '\n'.join(line.rstrip() for line in lines)
+    return re.sub(r'\n{3,}', '\n\n', text).strip()
+
+
+def parse_stories(text: str) -> List[Dict[str, Any]]:
+    """
+    The :jira: stories of a stories.md file, in file order.
+
+    Returns:
+        [{'key', 'title', 'status', 'tags', 'metadata', 'description', 'depends_on', 'line'}]
+    """
+    lines = text.splitlines()
+    headings = [(i, HEADING_PATTERN.match(line)) for i, line in enumerate(lines)]
+    headings = [(i, m) for i, m in headings if m]
+
+    stories = []
+    for n, (start, match) in enumerate(headings):
+        status, key, title, tags = match.groups()
+        tags = re.findall(r':([\w-]+):', tags or '')
+        if 'jira' not in tags:
+            continue
+        end = headings[n + 1][0] if n + 1 < len(headings) else len(lines)
+        body = lines[start + 1:end]
+
+        metadata = {}
+        if body and parse_metadata(body[0]) is not None:
+            metadata = parse_metadata(body[0])
+            body = body[1:]
+        # The next story's anchor sits right above its heading
+        while body and (not body[-1].strip() or ANCHOR_PATTERN.match(body[-1])):
+            body.pop()
+        guide = next((i for i, line in enumerate(body) if GUIDE_PATTERN.match(line)), None)
+        if guide is not None:
+            body = body[:guide]
+
+        if metadata.get('jira'):
+            key = metadata['jira']
+        stories.append({
+            'key': key,
+            'title': title.strip(),
+            'status': status,
+            'tags': tags,
+            'metadata': {k: metadata[k] for k in SYNCED_METADATA if metadata.get(k)},
+            'description': normalize_text(body),
+            'depends_on': sorted(set(KEY_PATTERN.findall(metadata.get('depends_on', ''))) - {key}),
+            'line': start + 1,
+        })
+    return stories
+
+
+def field_hash(value: Any) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+def story_hashes(story: Dict[str, Any]) -> Dict[str, str]:
+    return {name: field_hash(story[name]) for name in HASHED_FIELDS}
+
+
+class Snapshot:
+    """Per-field hashes and links of every story as of the last sync of an epic."""
+
+    def __init__(self, epic: str, snapshot_dir: str = SNAPSHOT_DIR):
+        self.epic = epic
+        self.path = os.path.join(snapshot_dir, f'{epic}.json')
+        self.stories: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == SNAPSHOT_VERSION:
+                self.stories = data['stories']
+
+    def record(self, stories: List[Dict[str, Any]], fields: Optional[List[str]] = None):
+        """
+        Remember the given (non-placeholder) stories as the remote state.
+
+        With fields, only those hashes of already recorded stories are updated.
+        """
+        for story in stories:
+            key = story['key']
+            if is_placeholder(key):
+                continue
+            if fields is None:
+                self.stories[key] = {'hashes': story_hashes(story), 'links': story['depends_on']}
+            elif key in self.stories:
+                hashes = story_hashes(story)
+                self.stories[key]['hashes'].update({name: hashes[name] for name in fields})
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': SNAPSHOT_VERSION, 'epic': self.epic, 'stories': self.stories},
+                      f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def issue_fields(story: Dict[str, Any]) -> Dict[str, Any]:
+    """JIRA-side fields of a story."""
+    return {
+        'summary': story['title'],
+        'description': story['description'],
+        'metadata': story['metadata'],
+    }
+
+
+def plan_sync(epic: str, stories: List[Dict[str, Any]], snapshot: Snapshot, force: bool = False,
+              status_only: bool = False) -> Dict[str, Any]:
+    """
+    Batched operations that bring the tracker in line with the stories.
+
+    Returns:
+        {'epic', 'batches': [{'op', 'items'}], 'unchanged': [keys], 'untracked': [keys]}
+        where create items carry the placeholder as 'ref' and link items may name
+        placeholders that the create results resolve.
+    """
+    creates, updates, links, unlinks = [], [], [], []
+    transitions: Dict[str, List[str]] = {}
+    unchanged = []
+
+    for story in stories:
+        key = story['key']
+        hashes = story_hashes(story)
+        previous = None if force else snapshot.stories.get(key)
+
+        if is_placeholder(key):
+            if status_only:
+                continue
+            creates.append(dict(issue_fields(story), ref=key, parent=epic, status=STATUS_MAP[story['status']]))
+            links.extend({'issue': key, 'blocked_by': target} for target in story['depends_on'])
+            continue
+
+        changed = [name for name in HASHED_FIELDS if previous is None or previous['hashes'][name] != hashes[name]]
+        if status_only:
+            changed = [name for name in changed if name == 'status']
+        if 'status' in changed:
+            transitions.setdefault(STATUS_MAP[story['status']], []).append(key)
+        fields = issue_fields(story)
+        names = {'title': 'summary', 'description': 'description', 'metadata': 'metadata'}
+        update = {names[name]: fields[names[name]] for name in changed if name in names}
+        if update:
+            updates.append({'issue': key, 'fields': update})
+
+        old_links = set() if previous is None else set(previous['links'])
+        new_links = set(story['depends_on'])
+        if not status_only:
+            # Without a snapshot the tracker may already have the links; adding is idempotent
+            links.extend({'issue': key, 'blocked_by': t} for t in sorted(new_links - old_links))
+            unlinks.extend({'issue': key, 'blocked_by': t} for t in sorted(old_links - new_links))
+
+        if not changed and (status_only or old_links == new_links):
+            unchanged.append(key)
+
+    batches = []
+    for start in range(0, len(creates), CREATE_BATCH_SIZE):
+        batches.append({'op': 'create', 'items': creates[start:start + CREATE_BATCH_SIZE]})
+    if updates:
+        batches.append({'op': 'update', 'items': updates})
+    for status, keys in transitions.items():
+        batches.append({'op': 'transition', 'status': status, 'items': keys})
+    if unlinks:
+        batches.append({'op': 'unlink', 'items': unlinks})
+    if links:
+        batches.append({'op': 'link', 'items': links})
+
+    present = {story['key'] for story in stories}
+    return {
+        'epic': epic,
+        'batches': batches,
+        'unchanged': unchanged,
+        'untracked': sorted(key for key in snapshot.stories if key not in present),
+    }
+
+
+def replace_placeholders(text: str, created: Dict[str, str]) -> str:
+    """Swap placeholders for their created keys and record the key in each heading's metadata."""
+    if not created:
+        return text
+    lines = text.splitlines(keepends=True)
+    for i, line in enumerate(lines):
+        match = HEADING_PATTERN.match(line.rstrip('\n'))
+        if not match or match.group(2) not in created:
+            continue
+        key = created[match.group(2)]
+        following = lines[i + 1] if i + 1 < len(lines) else ''
+        metadata = parse_metadata(following)
+        if metadata is None:
+            lines.insert(i + 1, f'<!-- jira: {key} -->\n')
+        elif 'jira' not in metadata:
+            lines[i + 1] = re.sub(r'^<!--\s*', f'<!-- jira: {key} | ', following, count=1)
+    text = ''.join(lines)
+    pattern = re.compile('|'.join(re.escape(p) for p in sorted(created, key=len, reverse=True)))
+    return pattern.sub(lambda m: created[m.group(0)], text)
+
+
+def commit_sync(path: str, epic: str, created: Dict[str, str], status_only: bool = False) -> List[Dict[str, Any]]:
+    """
+    Write the created keys into stories.md and record the synced stories in the snapshot.
+
+    After a --status-only sync only the status hashes are recorded, so the other
+    changes stay pending for the next full sync.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    updated = replace_placeholders(text, created)
+    if updated != text:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(updated)
+        os.replace(tmp_path, path)
+
+    # Record what the tracker received: texts still naming placeholders differ from the
+    # rewritten file, so the next plan sends them once more with the real keys
+    sent = []
+    for story in parse_stories(text):
+        sent.append(dict(story, key=created.get(story['key'], story['key']),
+                         depends_on=sorted(created.get(d, d) for d in story['depends_on'])))
+    snapshot = Snapshot(epic)
+    snapshot.record(sent, ['status'] if status_only else None)
+    snapshot.save()
+    return parse_stories(updated)
+
+
+class FakeTracker:
+    """
+    A local issue tracker in a JSON file, counting calls per operation.
+
+    Layout: {"next": int, "issues": {key: {"summary", "description", "metadata",
+    "status", "parent", "blocked_by": [keys]}}, "calls": {op: count}}
+    """
+
+    def __init__(self, path: str, project: str):
+        self.path = path
+        self.project = project
+        self.data = {'next': 45001, 'issues': {}, 'calls': {}}
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.data = json.load(f)
+        self.calls: Dict[str, int] = {}
+
+    def _call(self, op: str):
+        self.calls[op] = self.calls.get(op, 0) + 1
+        self.data['calls'][op] = self.data['calls'].get(op, 0) + 1
+
+    def search(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        self._call('search')
+        return {k: self.data['issues'][k] for k in keys if k in self.data['issues']}
+
+    def create_issues(self, items: List[Dict[str, Any]]) -> List[str]:
+        self._call('create')
+        keys = []
+        for item in items:
+            key = f"{self.project}-{self.data['next']}"
+            self.data['next'] += 1
+            self.data['issues'][key] = {
+                'summary': item['summary'], 'description': item['description'], 'metadata': item['metadata'],
+                'status': item['status'], 'parent': item['parent'], 'blocked_by': [],
+            }
+            keys.append(key)
+        return keys
+
+    def update_issues(self, items: List[Dict[str, Any]]):
+        self._call('update')
+        for item in items:
+            self.data['issues'][item['issue']].update(item['fields'])
+
+    def transition_issues(self, keys: List[str], status: str):
+        self._call('transition')
+        for key in keys:
+            self.data['issues'][key]['status'] = status
+
+    def link_issues(self, items: List[Dict[str, str]], remove: bool = False):
+        self._call('unlink' if remove else 'link')
+        for item in items:
+            blocked_by = self.data['issues'][item['issue']]['blocked_by']
+            if remove and item['blocked_by'] in blocked_by:
+                blocked_by.remove(item['blocked_by'])
+            elif not remove and item['blocked_by'] not in blocked_by:
+                blocked_by.append(item['blocked_by'])
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.data, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def verify_snapshot(tracker: FakeTracker, stories: List[Dict[str, Any]], snapshot: Snapshot) -> List[str]:
+    """Forget snapshot fields that no longer match the tracker (one search call); returns drifted keys."""
+    keys = [s['key'] for s in stories if s['key'] in snapshot.stories]
+    remote = tracker.search(keys) if keys else {}
+    drifted = []
+    for key in keys:
+        issue = remote.get(key)
+        if issue is None:
+            del snapshot.stories[key]
+            drifted.append(key)
+            continue
+        seen = {
+            'title': field_hash(issue['summary']),
+            'description': field_hash(issue['description']),
+            'metadata': field_hash(issue['metadata']),
+        }
+        hashes = snapshot.stories[key]['hashes']
+        status = next((s for s, name in STATUS_MAP.items() if name == issue['status']), None)
+        stale = [name for name, value in seen.items() if hashes[name] != value]
+        if status is None or field_hash(status) != hashes['status']:
+            stale.append('status')
+        if sorted(issue['blocked_by']) != snapshot.stories[key]['links']:
+            snapshot.stories[key]['links'] = sorted(issue['blocked_by'])
+            stale.append('links')
+        for name in stale:
+            if name in hashes:
+                hashes[name] = ''
+        if stale:
+            drifted.append(key)
+    return drifted
+
+
+def execute_plan(tracker: FakeTracker, plan: Dict[str, Any]) -> Dict[str, str]:
+    """Run the batches against a tracker; returns {placeholder: created key}."""
+    created: Dict[str, str] = {}
+    for batch in plan['batches']:
+        if batch['op'] == 'create':
+            for item, key in zip(batch['items'], tracker.create_issues(batch['items'])):
+                created[item['ref']] = key
+        elif batch['op'] == 'update':
+            tracker.update_issues(batch['items'])
+        elif batch['op'] == 'transition':
+            tracker.transition_issues(batch['items'], batch['status'])
+        else:
+            items = [{'issue': created.get(i['issue'], i['issue']), 'blocked_by': created.get(i['blocked_by'], i['blocked_by'])}
+                     for i in batch['items']]
+            tracker.link_issues(items, remove=batch['op'] == 'unlink')
+    return created
+
+
+def print_plan(plan: Dict[str, Any]):
+    batches = plan['batches']
+    if not batches:
+        print(f"All stories of {plan['epic']} are in sync. No updates needed.")
+    for batch in batches:
+        if batch['op'] == 'create':
+            print(f"CREATE ({len(batch['items'])} issues, epic {plan['epic']}):")
+            for item in batch['items']:
+                print(f"  {item['ref']} --> \"{item['summary']}\" [{item['status']}]")
+        elif batch['op'] == 'update':
+            print(f"UPDATE ({len(batch['items'])} issues):")
+            for item in batch['items']:
+                print(f"  {item['issue']}: {', '.join(sorted(item['fields']))}")
+        elif batch['op'] == 'transition':
+            print(f"TRANSITION to {batch['status']}: {', '.join(batch['items'])}")
+        else:
+            verb = 'LINK' if batch['op'] == 'link' else 'UNLINK'
+            print(f"{verb} ({len(batch['items'])}):")
+            for item in batch['items']:
+                print(f"  {item['issue']} is blocked by {item['blocked_by']}")
+    if plan['unchanged']:
+        print(f"Unchanged: {len(plan['unchanged'])} stories")
+    if plan['untracked']:
+        print(f"In the last sync but no longer :jira: stories here (left alone): {', '.join(plan['untracked'])}")
+    print(f"{len(batches)} batches")
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) < 3 or args[0] not in ('plan', 'commit', 'sync'):
+        print(__doc__)
+        sys.exit(1)
+
+    command, path, epic = args[:3]
+    force = status_only = as_json = verify = False
+    fake = None
+    created = {}
+
+    i = 3
+    while i < len(args):
+        if args[i] == '--force':
+            force = True
+            i += 1
+        elif args[i] == '--status-only':
+            status_only = True
+            i += 1
+        elif args[i] == '--json':
+            as_json = True
+            i += 1
+        elif args[i] == '--verify':
+            verify = True
+            i += 1
+        elif args[i] == '--fake' and i + 1 < len(args):
+            fake = args[i + 1]
+            i += 2
+        elif args[i] == '--created' and i + 1 < len(args) and '=' in args[i + 1]:
+            placeholder, key = args[i + 1].split('=', 1)
+            created[placeholder.strip()] = key.strip()
+            i += 2
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    if not os.path.exists(path):
+        print(f"Error: {path} not found", file=sys.stderr)
+        sys.exit(1)
+
+    if command == 'commit':
+        stories = commit_sync(path, epic, created, status_only)
+        print(f"Recorded {len(stories)} stories of {epic}; {len(created)} placeholders replaced")
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        stories = parse_stories(f.read())
+    snapshot = Snapshot(epic)
+
+    if command == 'plan':
+        plan = plan_sync(epic, stories, snapshot, force, status_only)
+        if as_json:
+            print(json.dumps(plan, indent=2))
+        else:
+            print_plan(plan)
+        return
+
+    if fake is None:
+        print("Error: sync needs --fake <tracker.json>; for JIRA run `plan`, apply it, then `commit`",
+              file=sys.stderr)
+        sys.exit(1)
+    tracker = FakeTracker(fake, epic.split('-', 1)[0])
+    if verify:
+        drifted = verify_snapshot(tracker, stories, snapshot)
+        if drifted:
+            print(f"Drifted from the snapshot: {', '.join(drifted)}")
+    plan = plan_sync(epic, stories, snapshot, force, status_only)
+    print_plan(plan)
+    created = execute_plan(tracker, plan)
+    tracker.save()
+    commit_sync(path, epic, created, status_only)
+    calls = ', '.join(f'{op} {n}' for op, n in sorted(tracker.calls.items())) or 'none'
+    print(f"Tracker calls: {sum(tracker.calls.values())} ({calls})")
+
+
+if __name__ == '__main__':
+    main()
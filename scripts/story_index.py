@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Persistent cross-epic story index for /list-stories.
+
+Indexes every story heading (JIRA stories, child stories, review items) of the
+stories files under the epics folder (<epic-folder>/stories.md or
+<epic-folder>/*.stories.md) into ~/.claude/story-index/index.json, with secondary
+indexes on status, tag, epic and kind (jira or local). Each file is re-parsed only
+when its mtime or size changed; unchanged files cost one stat, and filtered
+listings are set intersections over the secondary indexes.
+
+Without filters, BACKLOG, DOING and REVIEWING stories are listed.
+
+Usage:
+    python3 story_index.py [STATUS]... [:tag:]... [--epic <id>] [--jira | --local] [--root <epics-dir>] [--json]
+
+Example:
+    python3 story_index.py
+    python3 story_index.py DOING --jira
+    python3 story_index.py :urgent: --root ~/work/dnext-dev-support/epics
+"""
+
+import json
+import os
+import re
+import sys
+from typing import Dict, Any, List, Optional, Set
+
+from stories_sync import HEADING_PATTERN, STATUS_MAP, parse_metadata
+
+
+INDEX_PATH = os.path.expanduser('~/.claude/story-index/index.json')
+INDEX_VERSION = 1
+DEFAULT_ROOT = 'dnext-dev-support/epics'
+DEFAULT_STATUSES = ('DOING', 'BACKLOG', 'REVIEWING')
+STATUS_ORDER = ('DOING', 'HELD', 'REVIEWING', 'BACKLOG', 'DONE')
+SECONDARY = ('status', 'tag', 'epic', 'kind')
+
+FRONT_MATTER_PATTERN = re.compile(r'^---\n(.*?)\n---\n', re.DOTALL)
+EPIC_PATTERN = re.compile(r'[A-Z][A-Z0-9]+-\d+')
+
+
+def find_story_files(root: str) -> Dict[str, Dict[str, int]]:
+    """Stories files under the epic folders of root, with their mtime and size."""
+    files = {}
+    if not os.path.isdir(root):
+        return files
+    for folder in os.scandir(root):
+        if not folder.is_dir() or folder.name.startswith('.'):
+            continue
+        for entry in os.scandir(folder.path):
+            if entry.name == 'stories.md' or entry.name.endswith('.stories.md'):
+                stat = entry.stat()
+                files[entry.path] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+    return files
+
+
+def parse_front_matter(text: str) -> Dict[str, str]:
+    match = FRONT_MATTER_PATTERN.match(text)
+    if not match:
+        return {}
+    fields = {}
+    for line in match.group(1).splitlines():
+        key, sep, value = line.partition(':')
+        if sep and not line.startswith((' ', '\t')):
+            fields[key.strip()] = value.strip().strip('"\'')
+    return fields
+
+
+def parse_story_file(path: str) -> Dict[str, Any]:
+    """
+    All story headings of a stories file.
+
+    Returns:
+        {'epic', 'epic_title', 'stories': [{'key', 'title', 'status', 'tags', 'metadata',
+        'kind', 'parent', 'line'}]}
+    """
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        text = f.read()
+    front = parse_front_matter(text)
+    folder = os.path.basename(os.path.dirname(path))
+    match = EPIC_PATTERN.match(front.get('epic', '')) or EPIC_PATTERN.match(folder)
+    epic = match.group(0) if match else folder
+
+    lines = text.splitlines()
+    stories = []
+    story_parent = child_parent = None
+    for i, line in enumerate(lines):
+        match = HEADING_PATTERN.match(line)
+        if not match:
+            continue
+        status, key, title, tags = match.groups()
+        tags = re.findall(r':([\w-]+):', tags or '')
+        metadata = parse_metadata(lines[i + 1]) if i + 1 < len(lines) else None
+        metadata = metadata or {}
+        if metadata.get('jira'):
+            key = metadata['jira']
+
+        # Children follow their JIRA story, review items follow their child story
+        if not key.startswith('#'):
+            parent = None
+            story_parent, child_parent = key, None
+        elif '.R' in key:
+            parent = child_parent or story_parent
+        else:
+            parent = story_parent
+            child_parent = key
+
+        stories.append({
+            'key': key,
+            'title': title.strip(),
+            'status': status,
+            'tags': tags,
+            'metadata': metadata,
+            'kind': 'jira' if 'jira' in tags else 'local',
+            'parent': parent,
+            'line': i + 1,
+        })
+    return {'epic': epic, 'epic_title': front.get('title', ''), 'stories': stories}
+
+
+class StoryIndex:
+    """
+    Parsed stories per file plus secondary indexes over them.
+
+    Layout: {"version": 1, "files": {path: {"mtime", "size", "epic", "epic_title",
+    "stories": [...]}}}. Story ids are "<path>:<line>"; the secondary indexes
+    ({field: {value: ids}}) are rebuilt from the files on load and maintained
+    per file on update.
+    """
+
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.indexes: Dict[str, Dict[str, Set[str]]] = {name: {} for name in SECONDARY}
+        self.dirty = False
+
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                self.files = data['files']
+        for file_path in self.files:
+            self._add_to_indexes(file_path)
+
+    @staticmethod
+    def _index_values(record: Dict[str, Any], story: Dict[str, Any]) -> Dict[str, List[str]]:
+        return {
+            'status': [story['status']],
+            'tag': story['tags'],
+            'epic': [record['epic']],
+            'kind': [story['kind']],
+        }
+
+    def _add_to_indexes(self, file_path: str):
+        record = self.files[file_path]
+        for story in record['stories']:
+            story_id = f"{file_path}:{story['line']}"
+            for name, values in self._index_values(record, story).items():
+                for value in values:
+                    self.indexes[name].setdefault(value, set()).add(story_id)
+
+    def _remove_file(self, file_path: str):
+        record = self.files.pop(file_path, None)
+        if record is None:
+            return
+        for story in record['stories']:
+            story_id = f"{file_path}:{story['line']}"
+            for name, values in self._index_values(record, story).items():
+                for value in values:
+                    ids = self.indexes[name].get(value)
+                    if ids is None:
+                        continue
+                    ids.discard(story_id)
+                    if not ids:
+                        del self.indexes[name][value]
+        self.dirty = True
+
+    def update(self, root: str) -> int:
+        """
+        Re-parse the stories files under root that changed since the last update.
+
+        Returns:
+            Number of files (re)parsed
+        """
+        root = os.path.abspath(os.path.expanduser(root))
+        current = find_story_files(root)
+
+        prefix = root + os.sep
+        for file_path in [p for p in self.files if p.startswith(prefix) and p not in current]:
+            self._remove_file(file_path)
+
+        parsed = 0
+        for file_path, stat in current.items():
+            record = self.files.get(file_path)
+            if record and record['mtime'] == stat['mtime'] and record['size'] == stat['size']:
+                continue
+            self._remove_file(file_path)
+            try:
+                self.files[file_path] = {**stat, **parse_story_file(file_path)}
+            except OSError:
+                continue
+            self._add_to_indexes(file_path)
+            self.dirty = True
+            parsed += 1
+        return parsed
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': INDEX_VERSION, 'files': self.files}, f, separators=(',', ':'))
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+    def story(self, story_id: str) -> Dict[str, Any]:
+        file_path, _, line = story_id.rpartition(':')
+        record = self.files[file_path]
+        story = next(s for s in record['stories'] if s['line'] == int(line))
+        return {**story, 'epic': record['epic'], 'epic_title': record['epic_title'], 'file': file_path}
+
+    def query(self, root: str, statuses: Optional[List[str]] = None, tags: Optional[List[str]] = None,
+              epic: Optional[str] = None, kind: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Stories under root matching all given filters, ordered by status, epic and position.
+
+        Without any filter, the BACKLOG, DOING and REVIEWING stories are returned.
+        """
+        if not (statuses or tags or epic or kind):
+            statuses = list(DEFAULT_STATUSES)
+
+        candidates: List[Set[str]] = []
+        if statuses:
+            candidates.append(set().union(*(self.indexes['status'].get(s, set()) for s in statuses)))
+        for tag in tags or []:
+            candidates.append(self.indexes['tag'].get(tag, set()))
+        if epic:
+            candidates.append(self.indexes['epic'].get(epic, set()))
+        if kind:
+            candidates.append(self.indexes['kind'].get(kind, set()))
+        ids = set.intersection(*sorted(candidates, key=len))
+
+        prefix = os.path.abspath(os.path.expanduser(root)) + os.sep
+        stories = [self.story(story_id) for story_id in ids if story_id.startswith(prefix)]
+        stories.sort(key=lambda s: (STATUS_ORDER.index(s['status']), s['epic'], s['file'], s['line']))
+        return stories
+
+
+def open_index(root: str = DEFAULT_ROOT) -> StoryIndex:
+    """Load the index, bring it up to date for root and save it."""
+    index = StoryIndex()
+    index.update(root)
+    index.save()
+    return index
+
+
+def print_stories(stories: List[Dict[str, Any]]):
+    if not stories:
+        print("No stories found")
+        return
+    status = None
+    for story in stories:
+        if story['status'] != status:
+            status = story['status']
+            count = sum(1 for s in stories if s['status'] == status)
+            print(f"\n{status} ({STATUS_MAP[status]}) - {count}")
+            print('─' * 60)
+        metadata = story['metadata']
+        modules = f"  [{metadata['modules']}]" if metadata.get('modules') else ''
+        print(f"  {story['key']:<14} {story['title']}{modules}")
+
+        details = [f"Epic: {story['epic']}"]
+        if story['parent']:
+            details.append(f"Parent: {story['parent']}")
+        if metadata.get('started'):
+            details.append(f"Started: {metadata['started']}")
+        if metadata.get('hours'):
+            details.append(f"Est: {metadata['hours']}h")
+        if story['tags']:
+            details.append(' '.join(f':{t}:' for t in story['tags']))
+        print(f"  {'':<14} {' | '.join(details)}")
+
+    summary = ', '.join(f"{sum(1 for s in stories if s['status'] == st)} {st}"
+                        for st in STATUS_ORDER if any(s['status'] == st for s in stories))
+    print(f"\nSummary: {summary}")
+
+
+def main():
+    args = sys.argv[1:]
+    statuses = []
+    tags = []
+    epic = kind = None
+    root = DEFAULT_ROOT
+    as_json = False
+
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.upper() in STATUS_MAP:
+            statuses.append(arg.upper())
+            i += 1
+        elif re.match(r'^:[\w-]+:$', arg):
+            tags.append(arg.strip(':'))
+            i += 1
+        elif arg == '--epic' and i + 1 < len(args):
+            epic = args[i + 1]
+            i += 2
+        elif arg in ('--jira', '--local'):
+            kind = arg[2:]
+            i += 1
+        elif arg == '--root' and i + 1 < len(args):
+            root = args[i + 1]
+            i += 2
+        elif arg == '--json':
+            as_json = True
+            i += 1
+        else:
+            print(__doc__)
+            sys.exit(1)
+
+    index = open_index(root)
+    stories = index.query(root, statuses, tags, epic, kind)
+    if as_json:
+        print(json.dumps(stories, indent=2))
+    else:
+        print_stories(stories)
+
+
+if __name__ == '__main__':
+    main()